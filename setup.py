@@ -75,6 +75,10 @@ setup(
             "modlunky2=modlunky2.cli:main",
             "modlunky2-asset-extract=modlunky2.assets.extractor:main",
             "modlunky2-soundbank-extract=modlunky2.assets.soundbank:main",
+            "modlunky2-fingerprint-cache=modlunky2.assets.hashing:main",
+            "modlunky2-hash-strings=modlunky2.assets.string_hashing:main",
+            "modlunky2-optimize-pngs=modlunky2.assets.png_optimizer:main",
+            "modlunky2-compile-entity-chunks=modlunky2.sprites.entity_chunks:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,245 @@
+import io
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PurePath
+from threading import Lock
+from typing import Dict, List, Optional, Set
+
+import zstandard as zstd
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.chacha import chacha_rest_range, chacha_v2_key
+from modlunky2.assets.compression import FRAME_HEADER_MAX_SIZE, content_size
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = 128 * 1024 * 1024
+STREAM_READ_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class AssetStat:
+    path: str
+    is_dir: bool
+    # Size of the decoded asset, None for directories or when the compressed
+    # data doesn't record it.
+    size: Optional[int] = None
+    # Size of the asset as stored in the exe.
+    stored_size: Optional[int] = None
+    is_encrypted: bool = False
+
+
+class DecryptingReader(io.RawIOBase):
+    """Reads an encrypted asset a piece at a time."""
+
+    def __init__(self, data, filepath: bytes, key: int):
+        super().__init__()
+        self.data = data
+        self.pos = 0
+        self.block_key = chacha_v2_key(filepath, len(data), key)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        end = min(self.pos + len(buffer), len(self.data))
+        decrypted = chacha_rest_range(
+            self.data[self.pos : end], self.block_key, self.pos, len(self.data)
+        )
+        buffer[: len(decrypted)] = decrypted
+        self.pos = end
+        return len(decrypted)
+
+    def readall(self):
+        # A piece at a time, so the keystream for the whole asset is never
+        # built at once.
+        chunks = []
+        chunk = self.read(STREAM_READ_SIZE)
+        while chunk:
+            chunks.append(chunk)
+            chunk = self.read(STREAM_READ_SIZE)
+        return b"".join(chunks)
+
+
+class AssetFS:
+    """Read-only access to the assets in an exe, without extracting them.
+
+    Paths are the asset filepaths, e.g. `Data/Levels/dwelling.lvl`. Assets are
+    decrypted and decompressed when read and the results are kept in an LRU
+    cache of at most `cache_bytes`. The data is what the game stores, so
+    textures are DDS rather than PNG.
+    """
+
+    def __init__(self, asset_store: AssetStore, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.asset_store = asset_store
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self._handle_lock = Lock()
+
+        self._files = {
+            asset.filepath: asset for asset in asset_store.assets if asset.filepath
+        }
+        self._dirs: Dict[str, Set[str]] = {"": set()}
+        for filepath in self._files:
+            parent, _, name = filepath.rpartition("/")
+            self._dirs.setdefault(parent, set()).add(name)
+            # Register each ancestor with its parent
+            while parent:
+                grandparent, _, name = parent.rpartition("/")
+                self._dirs.setdefault(grandparent, set()).add(name)
+                self._dirs.setdefault(parent, set())
+                parent = grandparent
+
+    @classmethod
+    def from_exe(cls, exe_path: Path, cache_bytes=DEFAULT_CACHE_BYTES):
+        """Opens the exe at `exe_path`, which stays open until `close`."""
+        exe_handle = exe_path.open("rb")
+        try:
+            asset_store = AssetStore.load_from_file(exe_handle)
+        except Exception:
+            exe_handle.close()
+            raise
+        return cls(asset_store, cache_bytes)
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+            self.cached_bytes = 0
+        self.asset_store.close_mapping()
+        self.asset_store.exe_handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _normalize(path) -> str:
+        if isinstance(path, PurePath):
+            path = path.as_posix()
+        return "/".join(part for part in path.replace("\\", "/").split("/") if part)
+
+    def _asset(self, path):
+        filepath = self._normalize(path)
+        asset = self._files.get(filepath)
+        if asset is None:
+            if filepath in self._dirs:
+                raise IsADirectoryError(filepath)
+            raise FileNotFoundError(filepath)
+        return filepath, asset
+
+    def _stored_data(self, asset):
+        """The asset's bytes as stored in the exe, without copying if mapped."""
+        source = self.asset_store.data_source
+        if isinstance(source, memoryview):
+            start = asset.asset_block.asset_offset
+            return source[start : start + asset.asset_block.asset_len]
+        with self._handle_lock:
+            return asset.asset_block.read_data(source)
+
+    def _decode(self, asset):
+        data = self._stored_data(asset)
+        if not asset.asset_block.is_encrypted:
+            return bytes(data)
+        reader = DecryptingReader(data, asset.filepath.encode(), self.asset_store.key)
+        return zstd.ZstdDecompressor().decompress(reader.read())
+
+    def exists(self, path) -> bool:
+        filepath = self._normalize(path)
+        return filepath in self._files or filepath in self._dirs
+
+    def listdir(self, path="") -> List[str]:
+        dirpath = self._normalize(path)
+        if dirpath in self._files:
+            raise NotADirectoryError(dirpath)
+        if dirpath not in self._dirs:
+            raise FileNotFoundError(dirpath)
+        return sorted(self._dirs[dirpath])
+
+    def stat(self, path) -> AssetStat:
+        filepath = self._normalize(path)
+        if filepath not in self._files and filepath in self._dirs:
+            return AssetStat(filepath, is_dir=True)
+
+        filepath, asset = self._asset(filepath)
+        block = asset.asset_block
+        with self._lock:
+            cached = self._cache.get(filepath)
+        if cached is not None:
+            size = len(cached)
+        elif not block.is_encrypted:
+            size = block.asset_len
+        else:
+            # Only the frame header needs decrypting to find the size.
+            header = DecryptingReader(
+                self._stored_data(asset), filepath.encode(), self.asset_store.key
+            ).read(FRAME_HEADER_MAX_SIZE)
+            size = content_size(header)
+
+        return AssetStat(
+            filepath,
+            is_dir=False,
+            size=size,
+            stored_size=block.asset_len,
+            is_encrypted=block.is_encrypted,
+        )
+
+    def read_bytes(self, path) -> bytes:
+        filepath, asset = self._asset(path)
+        with self._lock:
+            data = self._cache.get(filepath)
+            if data is not None:
+                self._cache.move_to_end(filepath)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self._decode(asset)
+        self._remember(filepath, data)
+        return data
+
+    def _remember(self, filepath, data):
+        if len(data) > self.cache_bytes:
+            return
+        with self._lock:
+            if filepath in self._cache:
+                return
+            self._cache[filepath] = data
+            self.cached_bytes += len(data)
+            while self.cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self.cached_bytes -= len(evicted)
+
+    def open(self, path, mode="rb"):
+        """Returns a file object with the decoded contents of the asset."""
+        if mode not in ("r", "rb"):
+            raise ValueError(f"AssetFS is read-only, can't open with mode {mode!r}")
+        return io.BytesIO(self.read_bytes(path))
+
+    def open_stream(self, path):
+        """Returns a reader that decrypts and decompresses the asset as it's
+        read, so large assets never need to be held in memory at once.
+
+        Cached assets are served from the cache, and streamed assets aren't
+        added to it.
+        """
+        filepath, asset = self._asset(path)
+        with self._lock:
+            data = self._cache.get(filepath)
+        if data is not None:
+            return io.BytesIO(data)
+
+        stored = self._stored_data(asset)
+        if not asset.asset_block.is_encrypted:
+            return io.BytesIO(stored)
+        reader = io.BufferedReader(
+            DecryptingReader(stored, filepath.encode(), self.asset_store.key),
+            buffer_size=STREAM_READ_SIZE,
+        )
+        return zstd.ZstdDecompressor().stream_reader(reader, read_size=STREAM_READ_SIZE)
@@ -1,45 +1,99 @@
 import hashlib
+import io
 import logging
+import mmap
 import os
 import sys
 import traceback
-import json
+import multiprocessing
 from collections import defaultdict
-from concurrent.futures import wait
+from concurrent.futures import as_completed, wait
 from concurrent.futures.thread import ThreadPoolExecutor
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path
-from struct import pack, unpack
+from struct import pack, unpack, unpack_from
+from typing import Optional
 
-import zstandard as zstd
 from PIL import Image
 
 from modlunky2.assets.constants import KNOWN_TEXTURES_V1
 from modlunky2.assets.exc import NonSiblingAsset
+from modlunky2.sprites.base_classes import BaseJsonSpriteLoader
+from modlunky2.sprites.base_classes.base_sprite_merger import (
+    index_sprite_loaders,
+    merger_from_spec,
+)
+from modlunky2.sprites.entity_chunks import load_entity_chunks
 from modlunky2.sprites.sprite_loaders import get_all_sprite_loaders
+from modlunky2.sprites.merge_cache import SpriteMergeCache
+from modlunky2.sprites.shared_sheets import SharedSheets, attach_shared_sheets
 from modlunky2.sprites.sprite_mergers import get_all_sprite_mergers
-from modlunky2.constants import BASE_DIR
 
-from modlunky2.assets.chacha import Key, chacha, hash_filepath
+from modlunky2.assets.chacha import (
+    Key,
+    chacha,
+    chacha_rest_range,
+    chacha_v2_key,
+    hash_filepath,
+    hash_filepaths,
+)
+from modlunky2.assets.compression import (
+    ALL_CORES,
+    FRAME_HEADER_MAX_SIZE,
+    compress,
+    content_size,
+    decompress,
+    threads_per_worker,
+)
 from modlunky2.assets.constants import (
     BANK_ALIGNMENT,
     DDS_PNGS,
     DEFAULT_COMPRESSION_LEVEL,
-    FILENAMES_TO_FILEPATHS,
+    DEFAULT_MAX_IN_FLIGHT_BYTES,
+    DEFAULT_PNG_COMPRESS_LEVEL,
     KNOWN_FILEPATHS,
-    PNG_NAMES_TO_DDS_NAMES,
 )
+from modlunky2.assets.manifest import ExtractManifest, PackState
+from modlunky2.assets.pipeline import ByteBudget, WorkerPool, make_executor
+from modlunky2.assets.scan_index import ScanIndex, is_asset_filename
+from modlunky2.assets.png_optimizer import optimize_extracted_pngs
 from modlunky2.assets.soundbank import extract_soundbank
 from modlunky2.assets.converters import dds_to_png, png_to_dds, rgba_to_png
-from modlunky2.assets.exc import FileConflict, MissingAsset, MultipleMatchingAssets
-from modlunky2.assets.string_hashing import StringHashes
-from modlunky2.assets.hashing import md5sum_path
+from modlunky2.assets.exc import (
+    FileConflict,
+    InconsistentBundle,
+    MissingAsset,
+    MultipleMatchingAssets,
+)
+from modlunky2.assets.string_hashing import hash_strings_dir
+from modlunky2.assets.timings import PipelineTimings
+from modlunky2.assets.hashing import FingerprintCache, md5sum_path
 
 
 logger = logging.getLogger(__name__)
 
 
+def positioned_write(handle, data, offset):
+    """Write `data` at `offset` in the file without relying on its position."""
+    try:
+        fileno = handle.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        fileno = None
+
+    if fileno is not None and hasattr(os, "pwrite"):
+        handle.flush()
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fileno, view, offset)
+            view = view[written:]
+            offset += written
+        return
+
+    handle.seek(offset)
+    handle.write(data)
+
+
 @dataclass
 class ExeAssetBlock:
     """Represent a block of information about an asset in the exe."""
@@ -68,6 +122,10 @@ class ExeAssetBlock:
         # The size of the full data portion (asset + encrypted bytes)
         return self.asset_len + 1
 
+    @property
+    def asset_end(self):
+        return self.asset_offset + self.asset_len
+
     @property
     def total_size(self):
         return (
@@ -111,6 +169,43 @@ class ExeAssetBlock:
             asset_len=asset_len,
         )
 
+    @classmethod
+    def from_buffer(cls, buffer, offset):
+        """From a buffer of the whole exe, construct an AssetInfo object.
+
+        The block is parsed in place starting at `offset`, the next block
+        begins at `offset + total_size`.
+
+        Returns None if there is no more assets as the current offset.
+        """
+        data_len, filepath_len = unpack_from(b"<II", buffer, offset)
+
+        if (data_len, filepath_len) == (0, 0):
+            return None
+
+        if data_len <= 0:
+            raise RuntimeError(f"Expected data length > 0, found {data_len}")
+
+        filepath_hash_offset = offset + 8
+        asset_offset = filepath_hash_offset + filepath_len + 1
+        asset_len = data_len - 1
+
+        if asset_offset + asset_len > len(buffer):
+            raise RuntimeError(
+                f"Asset at 0x{offset:08x} extends past the end of the exe"
+            )
+
+        return ExeAssetBlock(
+            offset=offset,
+            filepath_len=filepath_len,
+            filepath_hash=bytes(
+                buffer[filepath_hash_offset : filepath_hash_offset + filepath_len]
+            ),
+            is_encrypted=buffer[asset_offset - 1] == 1,
+            asset_offset=asset_offset,
+            asset_len=asset_len,
+        )
+
     def read_data(self, exe_handle):
         exe_handle.seek(self.asset_offset)
         return exe_handle.read(self.asset_len)
@@ -139,10 +234,73 @@ class ExeAsset:
         return hash_[:min_len] == self.asset_block.filepath_hash[:min_len]
 
     def load_data(self, handle):
-        """Cache data on the asset. Must be called before extraction."""
+        """Cache data on the asset. Must be called before extraction.
+
+        `handle` is either a file handle or a memoryview over the whole exe.
+        With a memoryview the data is a slice of it and nothing is copied.
+        """
+        if isinstance(handle, memoryview):
+            start = self.asset_block.asset_offset
+            self.data = handle[start : start + self.asset_block.asset_len]
+            return
+
         handle.seek(self.asset_block.asset_offset)
         self.data = handle.read(self.asset_block.asset_len)
 
+    def decoded_size(self, handle, key):
+        """The most bytes of this asset held in memory at once while extracting.
+
+        That's the decompressed size recorded in the zstd frame header when
+        it's larger than the block. Only the header is read and decrypted.
+        """
+        asset_len = self.asset_block.asset_len
+        if not self.asset_block.is_encrypted:
+            return asset_len
+
+        start = self.asset_block.asset_offset
+        header_len = min(FRAME_HEADER_MAX_SIZE, asset_len)
+        if isinstance(handle, memoryview):
+            header = bytes(handle[start : start + header_len])
+        else:
+            handle.seek(start)
+            header = handle.read(header_len)
+        header = chacha_rest_range(
+            header, chacha_v2_key(self.filepath.encode(), asset_len, key), 0, asset_len
+        )
+        return max(asset_len, content_size(header) or 0)
+
+    def _can_reuse(self, cached, field, md5sum, paths):
+        """Whether a previous extraction recorded in `cached` is still valid.
+
+        The extracted file must still hold what was written. Like
+        `FingerprintCache`, it's only hashed again if it was touched since.
+        """
+        if not cached or cached.get("asset_len") != self.asset_block.asset_len:
+            return False
+        if cached.get(field) != md5sum:
+            return False
+        try:
+            fingerprint = FingerprintCache.fingerprint(paths[0])
+            if fingerprint[0] != cached.get("output_size"):
+                return False
+            if fingerprint != cached.get("output_fingerprint") and (
+                md5sum_path(paths[0]).decode() != cached.get("output_md5")
+            ):
+                return False
+        except OSError:
+            return False
+        return all(path.exists() for path in paths[1:])
+
+    @staticmethod
+    def _reused_entry(cached, entry, filepath):
+        # The file may have been touched without changing, record it as it is
+        # now so it isn't hashed again next time.
+        return {
+            **cached,
+            **entry,
+            "output_fingerprint": FingerprintCache.fingerprint(filepath),
+        }
+
     def extract(
         self,
         extract_dir: Path,
@@ -150,7 +308,20 @@ class ExeAsset:
         key: Key,
         compression_level=DEFAULT_COMPRESSION_LEVEL,
         recompress=False,
+        cached=None,
+        png_compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+        timings=None,
     ):
+        """Decrypt, decompress and convert the asset, writing it to `extract_dir`.
+
+        Returns a tuple of the manifest entry describing the written file, or
+        None on failure, and whether `cached`, the entry from a previous
+        extraction, was still valid so the existing file was kept. The time
+        spent in each step is recorded in `timings`.
+        """
+        if timings is None:
+            timings = PipelineTimings("extract")
+
         if not self.filepath:
             raise RuntimeError("Asset doesn't have filepath.")
 
@@ -158,50 +329,174 @@ class ExeAsset:
             raise RuntimeError("load_data hasn't been called.")
 
         filepath = extract_dir / self.filepath
+        if self.filepath in DDS_PNGS:
+            filepath = filepath.with_suffix(".png")
 
         compressed_filepath = compressed_dir / f"{self.filepath}.zst"
         md5sum_filepath = compressed_dir / f"{self.filepath}.md5sum"
 
+        reuse_paths = [filepath]
+        if recompress and self.asset_block.is_encrypted:
+            reuse_paths += [compressed_filepath, md5sum_filepath]
+
+        # With a mapped exe, hashing the block is what reads it from disk.
+        with timings.stage("read", self.filepath, len(self.data)):
+            entry = {
+                "asset_len": self.asset_block.asset_len,
+                "block_md5": hashlib.md5(self.data).hexdigest(),
+            }
+        if self._can_reuse(cached, "block_md5", entry["block_md5"], reuse_paths):
+            logger.info("Reusing extracted asset %s", filepath)
+            return self._reused_entry(cached, entry, filepath), True
+
         if self.asset_block.is_encrypted:
             try:
-                # Decrypt
-                self.data = chacha(self.filepath.encode(), self.data, key)
-
-                # Decompress
-                cctx = zstd.ZstdDecompressor()
-                self.data = cctx.decompress(self.data)
+                with timings.stage("decrypt", self.filepath, len(self.data)) as timer:
+                    self.data = chacha(self.filepath.encode(), self.data, key)
+                    entry["payload_md5"] = hashlib.md5(self.data).hexdigest()
+                    timer.bytes_out = len(self.data)
+
+                if self._can_reuse(
+                    cached, "payload_md5", entry["payload_md5"], reuse_paths
+                ):
+                    logger.info("Reusing extracted asset %s", filepath)
+                    return self._reused_entry(cached, entry, filepath), True
+
+                with timings.stage(
+                    "decompress", self.filepath, len(self.data)
+                ) as timer:
+                    self.data = decompress(self.data)
+                    timer.bytes_out = len(self.data)
 
                 if recompress:
                     # Recompress at higher compression level to give
                     # better chance of assets fitting in binary
                     logger.info("Storing compressed asset %s...", compressed_filepath)
-                    with compressed_filepath.open("wb") as compressed_file:
-                        cctx = zstd.ZstdCompressor(level=compression_level)
-                        compressed_data = cctx.compress(self.data)
-                        compressed_file.write(compressed_data)
+                    with timings.stage(
+                        "recompress", self.filepath, len(self.data)
+                    ) as timer:
+                        compressed_data = compress(self.data, compression_level)
+                        with compressed_filepath.open("wb") as compressed_file:
+                            compressed_file.write(compressed_data)
+                        timer.bytes_out = len(compressed_data)
 
             except Exception:  # pylint: disable=broad-except
                 logger.exception("Failed compression")
-                return
-
-        if self.filepath in KNOWN_TEXTURES_V1:
-            self.data = rgba_to_png(self.data)
-        elif self.filepath in DDS_PNGS:
-            self.data = dds_to_png(self.data)
-
+                return None, False
+        else:
+            entry["payload_md5"] = entry["block_md5"]
+
+        if self.filepath in KNOWN_TEXTURES_V1 or self.filepath in DDS_PNGS:
+            with timings.stage("convert", self.filepath, len(self.data)) as timer:
+                if self.filepath in KNOWN_TEXTURES_V1:
+                    self.data = rgba_to_png(self.data, png_compress_level)
+                else:
+                    self.data = dds_to_png(self.data, png_compress_level)
+                timer.bytes_out = len(self.data)
+
+        # Get a hash of the the uncompressed file to be used
+        # to detect if the source file changed, or the extracted one was edited
+        md5sum = hashlib.md5(self.data).hexdigest()
         if recompress:
-            # Get a hash of the the uncompressed file to be used
-            # to detect if the source file changed
-            md5sum = hashlib.md5(self.data).hexdigest()
             with md5sum_filepath.open("w") as md5sum_file:
                 md5sum_file.write(md5sum)
 
         logger.info("Storing asset %s...", filepath)
-        if self.filepath in DDS_PNGS:
-            filepath = filepath.with_suffix(".png")
-
-        with filepath.open("wb") as asset_file:
-            asset_file.write(self.data)
+        with timings.stage("write", self.filepath, len(self.data)) as timer:
+            with filepath.open("wb") as asset_file:
+                asset_file.write(self.data)
+            timer.bytes_out = len(self.data)
+
+        entry["output_size"] = len(self.data)
+        entry["output_md5"] = md5sum
+        entry["output_fingerprint"] = FingerprintCache.fingerprint(filepath)
+        return entry, False
+
+
+# The exe mapped in to each extraction worker process. Workers receive asset
+# blocks and slice their data from here instead of having it pickled to them.
+_WORKER_EXE_VIEW = None
+
+
+def _init_extract_worker(exe_path):
+    global _WORKER_EXE_VIEW  # pylint: disable=global-statement
+    with open(exe_path, "rb") as exe_handle:
+        exe_map = mmap.mmap(exe_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    _WORKER_EXE_VIEW = memoryview(exe_map)
+
+
+def _extract_in_worker(asset_block, filepath, *args):
+    """Extract an asset in a worker process.
+
+    Returns the result of `ExeAsset.extract`, the formatted traceback on
+    failure, so it can be logged by the parent where the log handlers live,
+    and the asset's timings for the parent to merge.
+    """
+    asset = ExeAsset(asset_block, filepath)
+    timings = PipelineTimings("extract")
+    try:
+        asset.load_data(_WORKER_EXE_VIEW)
+        entry, reused = asset.extract(*args, timings=timings)
+    except Exception:  # pylint: disable=broad-except
+        error = "".join(traceback.format_exception(*sys.exc_info()))
+        return None, False, error, timings.to_dict()
+    finally:
+        asset.data = None
+    return entry, reused, None, timings.to_dict()
+
+
+def _compress_in_worker(disk_asset, compression_level, max_threads):
+    timings = PipelineTimings("pack")
+    try:
+        disk_asset.compress(compression_level, timings, max_threads)
+    except Exception:  # pylint: disable=broad-except
+        error = "".join(traceback.format_exception(*sys.exc_info())).strip()
+        return error, timings.to_dict()
+    return None, timings.to_dict()
+
+
+# The shared memory blocks each merge worker process reads sheets from, and
+# its sprite loaders indexed by type. They're kept in one tuple, which
+# releases its items last first, so the loaders' sheets are released before
+# the blocks are closed.
+_WORKER_MERGE_STATE = None
+
+
+def _init_merge_worker(loader_specs, sheet_descriptors):
+    """Make the loaders described by `loader_specs`, pairs of a loader type and
+    its base path, reading from the sheets shared by the parent."""
+    global _WORKER_MERGE_STATE  # pylint: disable=global-statement
+    shared_blocks, sheets = attach_shared_sheets(sheet_descriptors)
+    sprite_loaders = []
+    for sprite_loader_type, base_path in loader_specs:
+        if issubclass(sprite_loader_type, BaseJsonSpriteLoader):
+            sprite_loader = sprite_loader_type(load_entity_chunks(), base_path)
+        else:
+            sprite_loader = sprite_loader_type(base_path)
+        sheet = sheets.get(str(sprite_loader.sprite_sheet_path))
+        if sheet is not None:
+            sprite_loader.use_sheet(sheet)
+        sprite_loaders.append(sprite_loader)
+    _WORKER_MERGE_STATE = (shared_blocks, index_sprite_loaders(sprite_loaders))
+
+
+def _merge_in_worker(merger_spec):
+    """Merge and save a sheet in a worker process, see
+    `BaseSpriteMerger.merger_spec`.
+
+    Returns the formatted traceback on failure and the merge's timings.
+    """
+    timings = PipelineTimings("extract")
+    try:
+        sprite_merger = merger_from_spec(merger_spec)
+        with timings.stage("merge", sprite_merger.stem):
+            sprite_merger.do_merge(_WORKER_MERGE_STATE[1])
+        with timings.stage("save_sheets", sprite_merger.stem):
+            sprite_merger.save()
+    except Exception:  # pylint: disable=broad-except
+        error = "".join(traceback.format_exception(*sys.exc_info())).strip()
+        return error, timings.to_dict()
+    return None, timings.to_dict()
 
 
 class AssetStore:
@@ -209,11 +504,28 @@ class AssetStore:
 
     BUNDLE_OFFSET = 0x400
 
+    # Number of leading bytes of a filepath hash used to key the hash index.
+    # Stored hashes may be padded (e.g. for bank alignment) so only a prefix
+    # common to the stored and computed hash can be used as a key.
+    HASH_INDEX_PREFIX_LEN = 8
+
     def __init__(self, exe_handle):
         self.assets = []
         self.exe_handle = exe_handle
         self.total_size = 0
         self._key = Key()
+        self._hash_index = None
+        self._short_hash_assets = None
+        self._exe_map = None
+        self._exe_view = None
+        # The manifest from the last incremental extraction, which records the
+        # files that were reused and refreshed.
+        self.extract_manifest = None
+        # Likewise the merge cache, recording the merged sheets that were
+        # reused and merged.
+        self.merge_cache = None
+        # Timings of the last extraction or repackage.
+        self.timings = None
 
     @property
     def key(self):
@@ -222,11 +534,36 @@ class AssetStore:
     def update_key(self, size):
         self._key.update(size)
 
+    @property
+    def data_source(self):
+        """What assets should load their data from, see `ExeAsset.load_data`."""
+        if self._exe_view is not None:
+            return self._exe_view
+        return self.exe_handle
+
     @classmethod
-    def load_from_file(cls, exe_handle):
+    def load_from_file(cls, exe_handle, use_mmap=True):
         asset_store = cls(exe_handle)
-        asset_store.exe_handle.seek(cls.BUNDLE_OFFSET)
 
+        if use_mmap:
+            asset_store.open_mapping()
+
+        if asset_store._exe_view is not None:
+            asset_store._load_blocks_from_buffer(asset_store._exe_view)
+        else:
+            asset_store._load_blocks_from_handle(exe_handle)
+
+        asset_store.build_hash_index()
+        asset_store.populate_asset_filepaths()
+        return asset_store
+
+    def _add_block(self, asset_block):
+        self.update_key(asset_block.data_len)
+        self.total_size += asset_block.total_size
+        self.assets.append(ExeAsset(asset_block, None))
+
+    def _load_blocks_from_handle(self, exe_handle):
+        exe_handle.seek(self.BUNDLE_OFFSET)
         while True:
             asset_block = ExeAssetBlock.from_exe_handle(exe_handle)
 
@@ -234,22 +571,105 @@ class AssetStore:
                 # We've reached the end of the asset blocks.
                 break
 
-            asset_store.update_key(asset_block.data_len)
-            asset_store.total_size += asset_block.total_size
-            asset_store.assets.append(ExeAsset(asset_block, None))
+            self._add_block(asset_block)
 
-        asset_store.populate_asset_filepaths()
-        return asset_store
+    def _load_blocks_from_buffer(self, buffer):
+        offset = self.BUNDLE_OFFSET
+        while True:
+            asset_block = ExeAssetBlock.from_buffer(buffer, offset)
+
+            if asset_block is None:
+                # We've reached the end of the asset blocks.
+                break
+
+            self._add_block(asset_block)
+            offset += asset_block.total_size
+
+    def open_mapping(self):
+        """Memory map the exe so blocks can be parsed and read without copies.
+
+        Falls back to reading through the handle if it can't be mapped, e.g.
+        in-memory handles or empty files.
+        """
+        try:
+            self._exe_map = mmap.mmap(
+                self.exe_handle.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except (OSError, ValueError, io.UnsupportedOperation) as err:
+            logger.debug("Unable to mmap exe, reading from handle: %s", err)
+            return
+        self._exe_view = memoryview(self._exe_map)
+
+    def close_mapping(self):
+        """Release the memory map of the exe.
+
+        Asset data that still points in to the mapping is dropped, so this
+        should only be called once that data is no longer needed.
+        """
+        if self._exe_map is None:
+            return
+
+        for asset in self.assets:
+            if isinstance(asset.data, memoryview):
+                asset.data = None
+        self._exe_view.release()
+        self._exe_view = None
+        self._exe_map.close()
+        self._exe_map = None
+
+    def build_hash_index(self):
+        """Index assets by a prefix of their filepath hash.
+
+        Must be rebuilt whenever an asset's `filepath_hash` changes.
+        """
+        prefix_len = self.HASH_INDEX_PREFIX_LEN
+        self._hash_index = defaultdict(list)
+        self._short_hash_assets = []
+        for idx, asset in enumerate(self.assets):
+            filepath_hash = asset.asset_block.filepath_hash[
+                : asset.asset_block.filepath_len
+            ]
+            if len(filepath_hash) < prefix_len:
+                self._short_hash_assets.append((idx, asset))
+                continue
+            self._hash_index[filepath_hash[:prefix_len]].append((idx, asset))
 
     def find_asset(self, filepath):
         if filepath is None:
             return None
-        filepath_hash = self.hash_filepath(filepath)
-        for asset in self.assets:
+        return self.find_asset_by_hash(self.hash_filepath(filepath))
+
+    def find_asset_by_hash(self, filepath_hash):
+        prefix_len = self.HASH_INDEX_PREFIX_LEN
+        if self._hash_index is None or len(filepath_hash) < prefix_len:
+            for asset in self.assets:
+                if asset.match_hash(filepath_hash):
+                    return asset
+            return None
+
+        # Candidates keep their bundle order so the first matching asset wins,
+        # the same as a linear scan would.
+        candidates = self._hash_index.get(filepath_hash[:prefix_len], [])
+        if self._short_hash_assets:
+            candidates = sorted(candidates + self._short_hash_assets)
+        for _, asset in candidates:
             if asset.match_hash(filepath_hash):
                 return asset
         return None
 
+    def find_assets_many(self, filepaths):
+        """Find the assets for many filepaths, hashing them in a single batch.
+
+        Returns a list with the matching asset, or None, for each filepath.
+        """
+        filepaths = list(filepaths)
+        known = [filepath for filepath in filepaths if filepath is not None]
+        hashes = iter(self.hash_filepaths(known))
+        return [
+            None if filepath is None else self.find_asset_by_hash(next(hashes))
+            for filepath in filepaths
+        ]
+
     def hash_filepath(self, filepath):
         if filepath is None:
             return None
@@ -259,9 +679,20 @@ class AssetStore:
 
         return hash_filepath(filepath, self.key)
 
+    def hash_filepaths(self, filepaths):
+        """Hash a batch of filepaths in a single pass."""
+        return hash_filepaths(
+            [
+                filepath if isinstance(filepath, bytes) else filepath.encode()
+                for filepath in filepaths
+            ],
+            self.key,
+        )
+
     def populate_asset_filepaths(self):
-        for filepath in KNOWN_FILEPATHS:
-            asset = self.find_asset(filepath)
+        for filepath, asset in zip(
+            KNOWN_FILEPATHS, self.find_assets_many(KNOWN_FILEPATHS)
+        ):
             if asset is None:
                 continue
             asset.filepath = filepath
@@ -270,148 +701,490 @@ class AssetStore:
     def _extract_single(asset, *args, **kwargs):
         try:
             logger.info("Extracting %s... ", asset.filepath)
-            asset.extract(*args, **kwargs)
+            return asset.extract(*args, **kwargs)
         except Exception:  # pylint: disable=broad-except
             logger.exception("Failed Extraction")
+        return None, False
 
-    @staticmethod
-    def _merge_single_entity(sprite_merger, sprite_loaders):
-        try:
-            sprite_merger.do_merge(sprite_loaders)
-            sprite_merger.save()
-        except Exception:  # pylint: disable=broad-except
-            logger.critical(
-                "Failed to merge sprite for %s: %s",
-                sprite_merger.stem,
-                "".join(traceback.format_exception(*sys.exc_info())).strip(),
-            )
-
-    def extract(
+    def _extract_assets(
         self,
         extract_dir,
         compressed_dir,
-        compression_level=DEFAULT_COMPRESSION_LEVEL,
-        max_workers=max(os.cpu_count() - 2, 1),
-        recompress=False,
-        generate_string_hashes=True,
-        create_entity_sheets=True,
-        extract_sound_extensions=None,
-        reuse_extracted=False,
+        compression_level,
+        max_workers,
+        recompress,
+        max_in_flight_bytes,
+        worker_pool,
+        manifest,
+        png_compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+        timings=None,
     ):
-        unextracted = []
+        """Stream assets through extraction with a bounded amount of data in flight.
 
-        if not reuse_extracted:
+        Each asset's data is loaded just before it's submitted and dropped as
+        soon as it's been written, so peak memory depends on
+        `max_in_flight_bytes` rather than the size of the bundle. Assets are
+        charged their decompressed size when that's larger than the block.
+
+        With a process pool each worker maps the exe itself and is only sent
+        the asset block, so asset data is never pickled.
+
+        If a `manifest` is passed, assets whose previously extracted file is
+        still valid are kept and the manifest is updated with every result.
+        """
+        if timings is None:
+            timings = PipelineTimings("extract")
+        unextracted = []
+        budget = ByteBudget(max_in_flight_bytes)
+
+        initializer, initargs = None, ()
+        if worker_pool == WorkerPool.PROCESS:
+            exe_path = getattr(self.exe_handle, "name", None)
+            if isinstance(exe_path, (str, Path)) and Path(exe_path).is_file():
+                initializer, initargs = _init_extract_worker, (str(exe_path),)
+            else:
+                logger.warning("Exe isn't on disk, extracting with threads instead")
+                worker_pool = WorkerPool.THREAD
+
+        def get_cached(asset):
+            if manifest is None:
+                return None
+            return manifest.get(asset.filepath)
+
+        def record(asset, entry, reused):
+            if manifest is not None:
+                manifest.record(asset.filepath, entry, reused)
+
+        def extract_and_release(asset, size):
+            try:
+                entry, reused = self._extract_single(
+                    asset,
+                    extract_dir,
+                    compressed_dir,
+                    self.key,
+                    compression_level,
+                    recompress,
+                    get_cached(asset),
+                    png_compress_level,
+                    timings,
+                )
+                record(asset, entry, reused)
+            finally:
+                asset.data = None
+                budget.release(size)
+
+        def on_worker_done(future, asset, size):
+            budget.release(size)
+            if future.exception():
+                entry, reused, error = None, False, future.exception()
+            else:
+                entry, reused, error, worker_timings = future.result()
+                timings.merge(worker_timings)
+            if error:
+                logger.error("Failed Extraction of %s: %s", asset.filepath, error)
+            record(asset, entry, reused)
+
+        with make_executor(worker_pool, max_workers, initializer, initargs) as pool:
+            futures = []
             for asset in self.assets:
                 if asset.filepath is None:
                     # No known filepaths matched this asset.
                     unextracted.append(asset)
                     continue
 
-                asset.load_data(self.exe_handle)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as pool:
-                futures = [
-                    pool.submit(
-                        self._extract_single,
-                        asset,
+                size = asset.decoded_size(self.data_source, self.key)
+                budget.acquire(size)
+                if worker_pool == WorkerPool.PROCESS:
+                    logger.info("Extracting %s... ", asset.filepath)
+                    future = pool.submit(
+                        _extract_in_worker,
+                        asset.asset_block,
+                        asset.filepath,
                         extract_dir,
                         compressed_dir,
                         self.key,
                         compression_level,
                         recompress,
+                        get_cached(asset),
+                        png_compress_level,
                     )
-                    for asset in self.assets
-                    if asset.filepath
-                ]
-                wait(futures, timeout=300)
+                    future.add_done_callback(
+                        lambda future, asset=asset, size=size: on_worker_done(
+                            future, asset, size
+                        )
+                    )
+                else:
+                    with timings.stage("read", asset.filepath):
+                        asset.load_data(self.data_source)
+                    future = pool.submit(extract_and_release, asset, size)
+                futures.append(future)
+            wait(futures, timeout=300)
 
-        if generate_string_hashes:
-            self.hash_strings(extract_dir)
+        logger.debug("Peak extraction bytes in flight: %s", budget.peak)
+        return unextracted
 
-        if create_entity_sheets:
-            logger.info("Creating entity sprite sheets...")
+    @staticmethod
+    def _is_merge_current(sprite_merger, sprite_loaders, timings, merge_cache):
+        """Returns the merge key of the sheet and whether it's already current,
+        in which case it's recorded as reused."""
+        if merge_cache is None:
+            return None, False
+        with timings.stage("merge_key", sprite_merger.stem):
+            merge_key = merge_cache.merge_key(sprite_merger, sprite_loaders)
+        if merge_cache.is_current(sprite_merger, merge_key):
+            logger.debug("Reusing merged sheet %s", sprite_merger.stem)
+            merge_cache.record(sprite_merger, merge_key, reused=True)
+            return merge_key, True
+        return merge_key, False
 
-            with open(
-                BASE_DIR / "static/game_data/entities.json", encoding="utf-8"
-            ) as entities_file:
-                entities_json = json.loads(entities_file.read())
-            with open(
-                BASE_DIR / "static/game_data/textures.json", encoding="utf-8"
-            ) as textures_file:
-                textures_json = json.loads(textures_file.read())
-
-            sprite_loaders = get_all_sprite_loaders(
-                entities_json, textures_json, extract_dir
+    @classmethod
+    def _merge_single_entity(
+        cls, sprite_merger, sprite_loaders, timings, merge_cache=None
+    ):
+        try:
+            merge_key, current = cls._is_merge_current(
+                sprite_merger, sprite_loaders, timings, merge_cache
             )
-            sprite_mergers = get_all_sprite_mergers(
-                entities_json, textures_json, extract_dir
+            if current:
+                return
+
+            with timings.stage("merge", sprite_merger.stem):
+                sprite_merger.do_merge(sprite_loaders)
+            with timings.stage("save_sheets", sprite_merger.stem):
+                sprite_merger.save()
+            if merge_cache is not None:
+                merge_cache.record(sprite_merger, merge_key, reused=False)
+        except Exception:  # pylint: disable=broad-except
+            logger.critical(
+                "Failed to merge sprite for %s: %s",
+                sprite_merger.stem,
+                "".join(traceback.format_exception(*sys.exc_info())).strip(),
             )
 
+    @classmethod
+    def _merge_entity_sheets(
+        cls,
+        sprite_mergers,
+        sprite_loaders,
+        max_workers,
+        worker_pool,
+        timings,
+        merge_cache=None,
+    ):
+        """Merge and save the sheets of `sprite_mergers`.
+
+        With a process pool, the source sheets are decoded once into shared
+        memory by `SharedSheets` and every merger is made again in a worker,
+        from its `merger_spec`, that crops from them. Workers are spawned,
+        since forking isn't safe while the parent has other threads running.
+        """
+        sprite_loader_index = index_sprite_loaders(sprite_loaders)
+        if worker_pool == WorkerPool.THREAD:
             with ThreadPoolExecutor(max_workers=max_workers) as pool:
                 futures = [
                     pool.submit(
-                        self._merge_single_entity,
+                        cls._merge_single_entity,
                         sprite_merger,
-                        sprite_loaders,
+                        sprite_loader_index,
+                        timings,
+                        merge_cache,
                     )
                     for sprite_merger in sprite_mergers
                 ]
                 wait(futures, timeout=300)
+            return
 
-            logger.info("Done creating entity sprite sheets...")
+        pending = []
+        for sprite_merger in sprite_mergers:
+            try:
+                merge_key, current = cls._is_merge_current(
+                    sprite_merger, sprite_loader_index, timings, merge_cache
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.critical(
+                    "Failed to merge sprite for %s: %s",
+                    sprite_merger.stem,
+                    "".join(traceback.format_exception(*sys.exc_info())).strip(),
+                )
+                continue
+            if not current:
+                pending.append((sprite_merger, merge_key))
+        if not pending:
+            return
 
-        if extract_sound_extensions:
-            extract_soundbank(
-                extract_dir / "soundbank.bank",
-                extract_dir / "soundbank",
-                extract_sound_extensions,
+        # Workers only need the loaders of the sheets they merge. Their order
+        # is kept so they index the same way as in the parent.
+        needed = set()
+        for sprite_merger, _ in pending:
+            needed.update(
+                map(id, sprite_merger.sprite_loaders_needed(sprite_loader_index))
             )
+        needed_loaders = [loader for loader in sprite_loaders if id(loader) in needed]
+        loader_specs = [(type(loader), loader.base_path) for loader in needed_loaders]
 
-        return unextracted
+        with timings.stage("share_sheets") as timer:
+            shared_sheets = SharedSheets.create(
+                (loader.sprite_sheet_path for loader in needed_loaders), max_workers
+            )
+            timer.bytes_out = shared_sheets.nbytes
+
+        with shared_sheets, make_executor(
+            WorkerPool.PROCESS,
+            max_workers,
+            _init_merge_worker,
+            (loader_specs, shared_sheets.descriptors()),
+            multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = {
+                pool.submit(_merge_in_worker, sprite_merger.merger_spec()): (
+                    sprite_merger,
+                    merge_key,
+                )
+                for sprite_merger, merge_key in pending
+            }
+            for future in as_completed(futures):
+                sprite_merger, merge_key = futures[future]
+                if future.exception():
+                    error = future.exception()
+                else:
+                    error, worker_timings = future.result()
+                    timings.merge(worker_timings)
+                if error:
+                    logger.critical(
+                        "Failed to merge sprite for %s: %s", sprite_merger.stem, error
+                    )
+                elif merge_cache is not None:
+                    merge_cache.record(sprite_merger, merge_key, reused=False)
 
-    def hash_strings(self, extract_dir):
-        # Use the english strings as the source for generating hash values.
-        english_strings = self.find_asset("strings00.str")
-        if english_strings is None or english_strings.data is None:
-            logging.warning("Didn't find data for english strings in strings00.str")
-            return
+    def extract(
+        self,
+        extract_dir,
+        compressed_dir,
+        compression_level=DEFAULT_COMPRESSION_LEVEL,
+        max_workers=max(os.cpu_count() - 2, 1),
+        recompress=False,
+        generate_string_hashes=True,
+        create_entity_sheets=True,
+        extract_sound_extensions=None,
+        reuse_extracted=False,
+        max_in_flight_bytes=DEFAULT_MAX_IN_FLIGHT_BYTES,
+        worker_pool=WorkerPool.THREAD,
+        incremental=False,
+        png_compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+        optimize_pngs=False,
+        timings=None,
+    ):
+        """Extract all known assets to `extract_dir` and run post processing.
 
-        string_hashes = StringHashes.from_data(english_strings.data)
+        With `incremental`, a manifest in `compressed_dir` records what every
+        extracted file came from, so a later extraction only rewrites the
+        files whose asset changed. Likewise merged entity sheets are only
+        remade when a sheet they're made from changed. `reuse_extracted`
+        skips extraction entirely.
 
-        # Create the hashed string files separately since they all depend on strings00.str
-        for asset in self.assets:
-            if asset.filepath and asset.filepath.endswith(".str"):
-                asset_file_path = Path(asset.filepath)
-                hashed_strings_file = (
-                    extract_dir
-                    / asset_file_path.parent
-                    / f"{asset_file_path.stem}_hashed{asset_file_path.suffix}"
+        A low `png_compress_level` makes writing textures much faster. With
+        `optimize_pngs` they're recompressed at the highest level once
+        everything else is done, see `optimize_extracted_pngs`.
+
+        With a process `worker_pool`, entity sheets are merged in processes
+        too, see `_merge_entity_sheets`.
+
+        The time spent in each stage is recorded in `timings`, or new timings
+        kept in `self.timings`.
+        """
+        if timings is None:
+            timings = PipelineTimings("extract")
+        self.timings = timings
+
+        unextracted = []
+        manifest = ExtractManifest.load(compressed_dir) if incremental else None
+        self.extract_manifest = manifest
+
+        if not reuse_extracted:
+            unextracted = self._extract_assets(
+                extract_dir,
+                compressed_dir,
+                compression_level,
+                max_workers,
+                recompress,
+                max_in_flight_bytes,
+                worker_pool,
+                manifest,
+                png_compress_level,
+                timings,
+            )
+            if manifest is not None:
+                manifest.save()
+                manifest.log_summary()
+
+        if generate_string_hashes:
+            with timings.stage("hash_strings"):
+                self.hash_strings(extract_dir, max_workers)
+
+        if create_entity_sheets:
+            logger.info("Creating entity sprite sheets...")
+
+            with timings.stage("load_sheets"):
+                entity_chunks = load_entity_chunks()
+                sprite_loaders = get_all_sprite_loaders(entity_chunks, extract_dir)
+                sprite_mergers = get_all_sprite_mergers(entity_chunks, extract_dir)
+
+            merge_cache = None
+            if incremental:
+                merge_cache = SpriteMergeCache.load(
+                    compressed_dir, FingerprintCache.load(compressed_dir)
                 )
-                string_hashes.write_string_hashes(asset.data, hashed_strings_file)
+            self.merge_cache = merge_cache
+
+            self._merge_entity_sheets(
+                sprite_mergers,
+                sprite_loaders,
+                max_workers,
+                worker_pool,
+                timings,
+                merge_cache,
+            )
 
-    def pack_assets(self):
-        self.exe_handle.seek(self.BUNDLE_OFFSET)
+            if merge_cache is not None:
+                merge_cache.save()
+                merge_cache.log_summary()
+            logger.info("Done creating entity sprite sheets...")
 
-        for asset in self.assets:
-            if asset.filepath is None:
-                continue
+        if extract_sound_extensions:
+            with timings.stage("soundbank"):
+                extract_soundbank(
+                    extract_dir / "soundbank.bank",
+                    extract_dir / "soundbank",
+                    extract_sound_extensions,
+                    max_workers=(
+                        max_workers if worker_pool == WorkerPool.PROCESS else None
+                    ),
+                    skip_existing=incremental,
+                )
+
+        if optimize_pngs:
+            with timings.stage("optimize_pngs"):
+                optimize_extracted_pngs(extract_dir, compressed_dir, max_workers)
+
+        timings.finish()
+        timings.log_summary()
+        return unextracted
+
+    def hash_strings(self, extract_dir, max_workers=None):
+        # Asset data is released once it's extracted, so the strings are read
+        # back from the extract dir.
+        hash_strings_dir(
+            extract_dir,
+            [
+                extract_dir / asset.filepath
+                for asset in self.assets
+                if asset.filepath and asset.filepath.endswith(".str")
+            ],
+            max_workers=max_workers,
+        )
 
-            assert asset.asset_block.asset_len == asset.disk_asset.get_asset_len()
+    def _packed_asset_data(self, asset, timings):
+        assert asset.asset_block.asset_len == asset.disk_asset.get_asset_len()
+        with timings.stage("read", asset.filepath) as timer:
             data = asset.disk_asset.get_asset_data()
+            timer.bytes_out = len(data)
 
-            if asset.asset_block.is_encrypted:
-                logger.info("Encrypting file %s", asset.disk_asset.asset_path)
+        if asset.asset_block.is_encrypted:
+            logger.info("Encrypting file %s", asset.disk_asset.asset_path)
+            with timings.stage("encrypt", asset.filepath, len(data)) as timer:
                 data = chacha(asset.filepath.encode(), data, self.key)
+                timer.bytes_out = len(data)
+        return data
 
-            logger.info("Packing file %s", asset.disk_asset.asset_path)
-            self.exe_handle.write(
-                pack("<II", asset.asset_block.data_len, asset.asset_block.filepath_len)
+    def pack_assets(self, start_index=0, timings=None):
+        """Write asset blocks to the exe, starting from the asset at `start_index`.
+
+        Blocks before `start_index` are assumed to already be in place.
+        """
+        if timings is None:
+            timings = PipelineTimings("pack")
+
+        if start_index >= len(self.assets):
+            offset = self.BUNDLE_OFFSET + sum(
+                asset.asset_block.total_size
+                for asset in self.assets
+                if asset.filepath is not None
             )
-            self.exe_handle.write(asset.asset_block.filepath_hash)
-            self.exe_handle.write(pack("<b", asset.asset_block.is_encrypted))
-            self.exe_handle.write(data)
+            positioned_write(self.exe_handle, pack("<II", 0, 0), offset)
+            return
 
-        self.exe_handle.write(pack("<II", 0, 0))
+        offset = None
+        for asset in self.assets[start_index:]:
+            if asset.filepath is None:
+                continue
+
+            data = self._packed_asset_data(asset, timings)
+
+            logger.info("Packing file %s", asset.disk_asset.asset_path)
+            block = b"".join(
+                [
+                    pack(
+                        "<II",
+                        asset.asset_block.data_len,
+                        asset.asset_block.filepath_len,
+                    ),
+                    asset.asset_block.filepath_hash,
+                    pack("<b", asset.asset_block.is_encrypted),
+                ]
+            )
+            with timings.stage("write", asset.filepath, len(data)) as timer:
+                positioned_write(self.exe_handle, block, asset.asset_block.offset)
+                positioned_write(self.exe_handle, data, asset.asset_block.asset_offset)
+                timer.bytes_out = len(block) + len(data)
+            offset = asset.asset_block.offset + asset.asset_block.total_size
+
+        if offset is None:
+            offset = self.BUNDLE_OFFSET
+        positioned_write(self.exe_handle, pack("<II", 0, 0), offset)
+
+    def _first_changed_index(self, old_blocks, previous, packed):
+        """Index of the first asset whose block differs from what's in the exe.
+
+        `previous` and `packed` are the `PackState` entries of the last pack and
+        this one. Must be called after the new layout is computed and before
+        the exe is written. Every asset is considered changed if the key
+        differs, since every block's hash and encryption depend on it.
+        """
+        old_key = Key()
+        for asset_block in old_blocks:
+            old_key.update(asset_block.data_len)
+        if old_key.key != self.key:
+            logger.info("Asset sizes changed the bundle key, repacking everything")
+            return 0
+
+        for idx, (asset, old_block) in enumerate(zip(self.assets, old_blocks)):
+            if asset.filepath is None or asset.asset_block != old_block:
+                return idx
+            if previous.get(asset.filepath) != packed[asset.filepath]:
+                return idx
+
+        return len(self.assets)
+
+    def verify_bundle(self):
+        """Re-read the bundle from the exe and check its key chain.
+
+        Raises InconsistentBundle if the key derived from the written blocks
+        doesn't match the key the assets were encrypted with.
+        """
+        self.exe_handle.flush()
+        written = AssetStore(self.exe_handle)
+        written._load_blocks_from_handle(  # pylint: disable=protected-access
+            self.exe_handle
+        )
+        expected = [
+            asset.asset_block for asset in self.assets if asset.filepath is not None
+        ]
+        if written.key != self.key or len(written.assets) != len(expected):
+            raise InconsistentBundle(
+                f"Written bundle has key 0x{written.key:016x} over "
+                f"{len(written.assets)} assets, expected 0x{self.key:016x} over "
+                f"{len(expected)} assets"
+            )
 
     def recalculate_key(self):
         """Recalculate the key from the current assets."""
@@ -429,6 +1202,7 @@ class AssetStore:
             asset.asset_block.filepath_hash = self.hash_filepath(asset.filepath).ljust(
                 asset.asset_block.filepath_len, b"\x00"
             )
+        self.build_hash_index()
 
     def repackage(
         self,
@@ -436,47 +1210,139 @@ class AssetStore:
         fallback_dir,
         compressed_dir,
         compression_level=DEFAULT_COMPRESSION_LEVEL,
+        worker_pool=WorkerPool.THREAD,
+        use_fingerprints=True,
+        incremental=False,
+        use_scan_index=True,
+        pack_state=None,
     ):
-        disk_bundle = DiskBundle.from_dirs(
-            self.assets,
-            search_dirs,
-            fallback_dir,
-            compressed_dir,
-        )
-        disk_bundle.compress_if_needed(compression_level=compression_level)
-
-        offset = self.BUNDLE_OFFSET
-        for asset in self.assets:
-            if asset.filepath is None:
-                continue
-            disk_asset = disk_bundle.get(str(Path(asset.filepath).name))
-            if disk_asset is None:
-                raise MissingAsset(f"FAIL {asset.filepath}")
+        """Pack assets from the search dirs, or fallback dir, in to the exe.
 
-            asset.disk_asset = disk_asset
+        What was packed is recorded in `pack_state`, or the `PackState` in
+        `compressed_dir`. With `incremental` the exe is expected to hold the
+        bundle recorded there, and only blocks from the first one that
+        differs onward are rewritten.
 
-            asset.asset_block.offset = offset
-            asset.asset_block.asset_len = disk_asset.get_asset_len()
-            asset.asset_block.asset_offset = (
-                asset.asset_block.offset + 8 + asset.asset_block.filepath_len + 1
+        The time spent in each stage is recorded in `self.timings`.
+        """
+        try:
+            timings = PipelineTimings("pack")
+            self.timings = timings
+            old_blocks = [replace(asset.asset_block) for asset in self.assets]
+            if pack_state is None:
+                pack_state = PackState.load(compressed_dir)
+            previous = pack_state.assets if incremental else {}
+            if incremental and not previous:
+                logger.info("No record of the last pack, repacking everything")
+                incremental = False
+            # Soundbank padding goes on top of the filepath_len from the source exe,
+            # which an exe that was packed before doesn't have anymore.
+            for asset in self.assets:
+                entry = previous.get(asset.filepath)
+                if entry is not None:
+                    asset.asset_block.filepath_len = entry["filepath_len"]
+            base_filepath_lens = {
+                asset.filepath: asset.asset_block.filepath_len
+                for asset in self.assets
+                if asset.filepath is not None
+            }
+
+            fingerprint_cache = None
+            if use_fingerprints:
+                fingerprint_cache = FingerprintCache.load(compressed_dir)
+
+            scan_index = None
+            if use_scan_index:
+                scan_index = ScanIndex.load(compressed_dir)
+
+            with timings.stage("scan"):
+                disk_bundle = DiskBundle.from_dirs(
+                    self.assets,
+                    search_dirs,
+                    fallback_dir,
+                    compressed_dir,
+                    fingerprint_cache=fingerprint_cache,
+                    scan_index=scan_index,
+                )
+            if scan_index is not None:
+                logger.info(
+                    "Directories unchanged since last searched: %s, listed: %s",
+                    scan_index.hits,
+                    scan_index.misses,
+                )
+                scan_index.save()
+            disk_bundle.compress_if_needed(
+                compression_level=compression_level,
+                worker_pool=worker_pool,
+                timings=timings,
             )
 
-            # The name hash of soundbank files is padded such that the asset_offset
-            # is divisible by 32.
-            #
-            # Padding is between 1 and 32 bytes
-            if disk_asset.asset_path.suffix == ".bank":
-                padding = (
-                    BANK_ALIGNMENT - asset.asset_block.asset_offset % BANK_ALIGNMENT
+            offset = self.BUNDLE_OFFSET
+            for asset in self.assets:
+                if asset.filepath is None:
+                    continue
+                disk_asset = disk_bundle.get(str(Path(asset.filepath).name))
+                if disk_asset is None:
+                    raise MissingAsset(f"FAIL {asset.filepath}")
+
+                asset.disk_asset = disk_asset
+
+                asset.asset_block.offset = offset
+                asset.asset_block.asset_len = disk_asset.get_asset_len()
+                asset.asset_block.asset_offset = (
+                    asset.asset_block.offset + 8 + asset.asset_block.filepath_len + 1
+                )
+
+                # The name hash of soundbank files is padded such that the asset_offset
+                # is divisible by 32.
+                #
+                # Padding is between 1 and 32 bytes
+                if disk_asset.asset_path.suffix == ".bank":
+                    padding = (
+                        BANK_ALIGNMENT - asset.asset_block.asset_offset % BANK_ALIGNMENT
+                    )
+                    asset.asset_block.filepath_len += padding
+                    asset.asset_block.asset_offset += padding
+
+                offset += asset.asset_block.total_size
+
+            self.recalculate_key()
+            self.update_filepath_hashes()
+
+            with timings.stage("hash"):
+                packed = {
+                    asset.filepath: {
+                        "filepath_len": base_filepath_lens[asset.filepath],
+                        "data_md5": asset.disk_asset.packed_md5sum().decode(),
+                    }
+                    for asset in self.assets
+                    if asset.filepath is not None
+                }
+            if fingerprint_cache is not None:
+                fingerprint_cache.save()
+
+            start_index = 0
+            if incremental:
+                start_index = self._first_changed_index(old_blocks, previous, packed)
+                logger.info(
+                    "%s of %s assets unchanged, rewriting the rest",
+                    start_index,
+                    len(self.assets),
                 )
-                asset.asset_block.filepath_len += padding
-                asset.asset_block.asset_offset += padding
 
-            offset += asset.asset_block.total_size
+            # The exe is about to be rewritten through the handle, which may need to
+            # grow the file. That isn't allowed on all platforms while it's mapped.
+            self.close_mapping()
 
-        self.recalculate_key()
-        self.update_filepath_hashes()
-        self.pack_assets()
+            self.pack_assets(start_index, timings)
+            self.verify_bundle()
+            pack_state.assets = packed
+            pack_state.save()
+            timings.finish()
+            timings.log_summary()
+        finally:
+            # Also on failure, so the exe can be replaced straight away.
+            self.close_mapping()
 
 
 class ResolutionPolicy(Enum):
@@ -487,36 +1353,48 @@ class ResolutionPolicy(Enum):
 
 @dataclass
 class DiskBundle:
-    def __init__(self, disk_assets):
+    def __init__(self, disk_assets, fingerprint_cache=None):
         self.disk_assets = disk_assets
+        self.fingerprint_cache = fingerprint_cache
 
     def get(self, filepath, default=None):
         return self.disk_assets.get(filepath, default)
 
     @staticmethod
-    def get_files_from_search_dir(search_dir: Path):
-        out_files = {}
-
-        if not search_dir.exists():
-            return out_files
-
+    def _walk_search_dir(search_dir: Path):
         for root, dirs, files in os.walk(search_dir, topdown=True):
             # Remove compressed directories
-            dirs[:] = [d for d in dirs if d not in [".compressed"]]
+            dirs[:] = [d for d in dirs if d not in ScanIndex.SKIP_DIRS]
 
             for file_ in files:
-                # For DDS_PNGS we need to convert to actual name to test
-                # for validity of files
-                real_name = PNG_NAMES_TO_DDS_NAMES.get(file_, file_)
-                if real_name not in FILENAMES_TO_FILEPATHS:
-                    continue
+                if is_asset_filename(file_):
+                    yield Path(root) / file_
 
-                if file_ in out_files:
-                    raise MultipleMatchingAssets(
-                        f"Found {file_} multiple times in {search_dir}"
-                    )
+    @classmethod
+    def get_files_from_search_dir(
+        cls, search_dir: Path, scan_index: Optional[ScanIndex] = None
+    ):
+        """Find the files in `search_dir` that could be assets, by filename.
+
+        With a `scan_index`, directories that haven't changed since they were
+        last searched aren't read again.
+        """
+        out_files = {}
 
-                out_files[file_] = Path(root) / file_
+        if not search_dir.exists():
+            return out_files
+
+        if scan_index is None:
+            paths = cls._walk_search_dir(search_dir)
+        else:
+            paths = scan_index.files(search_dir)
+
+        for path in paths:
+            if path.name in out_files:
+                raise MultipleMatchingAssets(
+                    f"Found {path.name} multiple times in {search_dir}"
+                )
+            out_files[path.name] = path
 
         return out_files
 
@@ -528,16 +1406,37 @@ class DiskBundle:
         fallback_dir,
         compressed_dir,
         resolution_policy=ResolutionPolicy.RAISE_ERROR,
+        fingerprint_cache=None,
+        scan_index=None,
     ):
         modfiles_by_filename = defaultdict(list)
         disk_assets = {}
 
         for search_dir in search_dirs:
             for file_, file_path in cls.get_files_from_search_dir(
-                Path(search_dir)
+                Path(search_dir), scan_index
             ).items():
                 modfiles_by_filename[file_].append(file_path)
 
+        fallback_paths = None
+        if scan_index is not None:
+            fallback_paths = {str(path) for path in scan_index.files(fallback_dir)}
+
+        def make_disk_asset(asset_path, asset):
+            rel_asset_path = None
+            if scan_index is not None:
+                rel_asset_path = scan_index.relative_path(asset_path)
+            if rel_asset_path is not None:
+                # The same normalized path DiskAsset would resolve to.
+                asset_path = scan_index.root / rel_asset_path
+            return DiskAsset(
+                asset_path,
+                compressed_dir,
+                asset,
+                fingerprint_cache,
+                rel_asset_path=rel_asset_path,
+            )
+
         for asset in exe_assets:
             if asset.filepath is None:
                 continue
@@ -550,11 +1449,15 @@ class DiskBundle:
             # fallback directory.
             if not modpack_files:
                 asset_path = fallback_dir / filepath
-                if not asset_path.exists():
+                if fallback_paths is not None:
+                    exists = str(asset_path) in fallback_paths
+                else:
+                    exists = asset_path.exists()
+                if not exists:
                     raise MissingAsset(f"Didn't find an asset for {filepath}")
 
-                disk_assets[str(Path(asset.filepath).name)] = DiskAsset(
-                    asset_path, compressed_dir, asset
+                disk_assets[str(Path(asset.filepath).name)] = make_disk_asset(
+                    asset_path, asset
                 )
                 continue
 
@@ -573,24 +1476,75 @@ class DiskBundle:
                 idx = -1
 
             asset_path = modpack_files[idx]
-            disk_assets[str(Path(asset.filepath).name)] = DiskAsset(
-                asset_path, compressed_dir, asset
+            disk_assets[str(Path(asset.filepath).name)] = make_disk_asset(
+                asset_path, asset
             )
 
-        return cls(disk_assets)
+        return cls(disk_assets, fingerprint_cache)
 
     def compress_if_needed(
         self,
         compression_level=DEFAULT_COMPRESSION_LEVEL,
         max_workers=max(os.cpu_count() - 2, 1),
+        worker_pool=WorkerPool.THREAD,
+        timings=None,
     ):
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
-            futures = [
-                pool.submit(disk_asset.compress, compression_level)
-                for disk_asset in self.disk_assets.values()
-                if disk_asset.needs_compression()
-            ]
-            wait(futures, timeout=300)
+        if timings is None:
+            timings = PipelineTimings("pack")
+        to_compress = [
+            disk_asset
+            for disk_asset in self.disk_assets.values()
+            if disk_asset.needs_compression()
+        ]
+        # Start the largest assets first so they don't hold up the end of the
+        # repack, they're also the ones compressed with multiple threads.
+        to_compress.sort(
+            key=lambda disk_asset: disk_asset.asset_path.stat().st_size, reverse=True
+        )
+        if self.fingerprint_cache is not None:
+            logger.info(
+                "Source files unchanged since last hashed: %s, rehashed: %s",
+                self.fingerprint_cache.hits,
+                self.fingerprint_cache.misses,
+            )
+            self.fingerprint_cache.save()
+
+        # Large assets are compressed with several zstd threads, which are
+        # shared between the assets compressed at once.
+        max_threads = threads_per_worker(max_workers)
+        with make_executor(worker_pool, max_workers) as pool:
+            if worker_pool == WorkerPool.THREAD:
+                futures = [
+                    pool.submit(
+                        disk_asset.compress, compression_level, timings, max_threads
+                    )
+                    for disk_asset in to_compress
+                ]
+                wait(futures, timeout=300)
+                return
+
+            futures = {}
+            for disk_asset in to_compress:
+                logger.info("Compressing %s...", disk_asset.asset_path)
+                # The cache was just updated for these files, don't ship it to
+                # every worker.
+                future = pool.submit(
+                    _compress_in_worker,
+                    replace(disk_asset, fingerprint_cache=None),
+                    compression_level,
+                    max_threads,
+                )
+                futures[future] = disk_asset
+            for future in as_completed(futures):
+                if future.exception():
+                    error = future.exception()
+                else:
+                    error, worker_timings = future.result()
+                    timings.merge(worker_timings)
+                if error:
+                    logger.error(
+                        "Failed compressing %s: %s", futures[future].asset_path, error
+                    )
 
 
 @dataclass
@@ -603,7 +1557,18 @@ class DiskAsset:
 
     exe_asset: ExeAsset
 
+    # Cache used to avoid re-hashing unchanged source files
+    fingerprint_cache: Optional[FingerprintCache] = None
+
+    # The resolved path relative to the parent of compressed_dir, if already
+    # known e.g. from a ScanIndex, in which case asset_path must already be
+    # normalized. Otherwise it's resolved from asset_path.
+    rel_asset_path: Optional[Path] = None
+
     def __post_init__(self):
+        if self.rel_asset_path is not None:
+            return
+
         # assets cannot live higher than the compressed dir
         # to avoid complicating the caching structure. This
         # code ensures the asset_path is a sibling or a child
@@ -620,6 +1585,8 @@ class DiskAsset:
             ) from err
 
     def md5sum_of_asset(self):
+        if self.fingerprint_cache is not None:
+            return self.fingerprint_cache.md5sum(self.asset_path)
         return md5sum_path(self.asset_path)
 
     @property
@@ -660,43 +1627,63 @@ class DiskAsset:
 
         return False
 
-    def compress(self, compression_level=DEFAULT_COMPRESSION_LEVEL):
+    def compress(
+        self,
+        compression_level=DEFAULT_COMPRESSION_LEVEL,
+        timings=None,
+        max_threads=ALL_CORES,
+    ):
         if not self.exe_asset.asset_block.is_encrypted:
             return
 
+        if timings is None:
+            timings = PipelineTimings("pack")
+        filepath = self.exe_asset.filepath
+
         self.compressed_path.parent.mkdir(parents=True, exist_ok=True)
         self.md5sum_path.parent.mkdir(parents=True, exist_ok=True)
 
         if self.asset_path.suffix == ".png":
             logger.info('Converting image "%s" to DDS', self.asset_path)
-            with Image.open(self.asset_path) as img:
-                data = png_to_dds(img)
+            with timings.stage("convert", filepath) as timer:
+                with Image.open(self.asset_path) as img:
+                    data = png_to_dds(img)
+                timer.bytes_out = len(data)
         else:
-            with open(self.asset_path, "rb") as asset_file:
-                data = asset_file.read()
-
-        md5sum = self.md5sum_of_asset()
-        with self.md5sum_path.open("wb") as md5sum_file:
-            md5sum_file.write(md5sum)
+            with timings.stage("read", filepath) as timer:
+                with open(self.asset_path, "rb") as asset_file:
+                    data = asset_file.read()
+                timer.bytes_out = len(data)
+
+        with timings.stage("hash", filepath):
+            md5sum = self.md5sum_of_asset()
+            with self.md5sum_path.open("wb") as md5sum_file:
+                md5sum_file.write(md5sum)
 
         logger.info("Compressing %s...", self.asset_path)
-        cctx = zstd.ZstdCompressor(level=compression_level)
-        data = cctx.compress(data)
-        with open(self.compressed_path, "wb") as compressed_file:
-            compressed_file.write(data)
+        with timings.stage("compress", filepath, len(data)) as timer:
+            data = compress(data, compression_level, max_threads=max_threads)
+            timer.bytes_out = len(data)
+        with timings.stage("write", filepath, len(data)) as timer:
+            with open(self.compressed_path, "wb") as compressed_file:
+                compressed_file.write(data)
+            timer.bytes_out = len(data)
 
-    def get_asset_len(self):
+    @property
+    def packed_path(self):
+        """The file that's packed in to the exe, compressed if it's encrypted."""
         if self.exe_asset.asset_block.is_encrypted:
-            path = self.compressed_path
-        else:
-            path = self.asset_path
-        return path.stat().st_size
+            return self.compressed_path
+        return self.asset_path
 
-    def get_asset_data(self):
-        if self.exe_asset.asset_block.is_encrypted:
-            path = self.compressed_path
-        else:
-            path = self.asset_path
+    def packed_md5sum(self):
+        if self.fingerprint_cache is not None:
+            return self.fingerprint_cache.md5sum(self.packed_path)
+        return md5sum_path(self.packed_path)
+
+    def get_asset_len(self):
+        return self.packed_path.stat().st_size
 
-        with path.open("rb") as file_:
+    def get_asset_data(self):
+        with self.packed_path.open("rb") as file_:
             return file_.read()
@@ -0,0 +1,493 @@
+"""
+Micro-benchmarks for the asset pipeline.
+
+Run with `python -m modlunky2.assets.benchmark <name>`.
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import zstandard as zstd
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.chacha import chacha_rest, hash_filepath, hash_filepaths
+from modlunky2.assets.compression import compress
+from modlunky2.assets.constants import DEFAULT_COMPRESSION_LEVEL, KNOWN_FILEPATHS
+from modlunky2.assets.converters import png_to_dds
+from modlunky2.assets.pipeline import WorkerPool
+from modlunky2.assets.reference import chacha_rest_bytewise, png_to_dds_pixelwise
+from modlunky2.assets.riff import RIFFIndex
+from modlunky2.assets.soundbank import Extension, extract_soundbank
+from modlunky2.assets.synthetic import (
+    build_synthetic_exe,
+    build_synthetic_soundbank,
+    random_bytes,
+    random_rgba_image,
+    synthetic_level,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def time_call(func, *args, repeat=3, **kwargs):
+    """Returns the best wall time of `repeat` calls to `func`."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def throughput(size, elapsed):
+    """Megabytes per second for processing `size` bytes in `elapsed` seconds."""
+    return size / (1024 * 1024) / max(elapsed, 1e-9)
+
+
+def bench_chacha(args):
+    size = int(args.size_mb * 1024 * 1024)
+    # Odd sizes exercise the trailing partial block as well.
+    data = os.urandom(size + 0x2B)
+    key = os.urandom(0x40)
+
+    if chacha_rest(data, key) != chacha_rest_bytewise(data, key):
+        raise RuntimeError("Keystream output differs from reference implementation")
+
+    fast = time_call(chacha_rest, data, key, repeat=args.repeat)
+    slow = time_call(chacha_rest_bytewise, data, key, repeat=1)
+
+    logger.info("chacha_rest (bytewise): %8.2f MB/s", throughput(len(data), slow))
+    logger.info("chacha_rest (wordwise): %8.2f MB/s", throughput(len(data), fast))
+    logger.info("Speedup: %.1fx", slow / max(fast, 1e-9))
+
+
+def bench_hashing(args):
+    filepaths = [filepath.encode() for filepath in KNOWN_FILEPATHS]
+    key = 0x9E6C63D0676A9A99
+
+    def hash_each():
+        return [hash_filepath(filepath, key) for filepath in filepaths]
+
+    if hash_each() != hash_filepaths(filepaths, key):
+        raise RuntimeError("Batched hashes differ from single hashes")
+
+    single = time_call(hash_each, repeat=args.repeat)
+    batched = time_call(hash_filepaths, filepaths, key, repeat=args.repeat)
+
+    logger.info("Hashing %s filepaths", len(filepaths))
+    logger.info("hash_filepath (each):  %8.2f ms", single * 1000)
+    logger.info("hash_filepaths (batch): %8.2f ms", batched * 1000)
+    logger.info("Speedup: %.1fx", single / max(batched, 1e-9))
+
+
+def extract_synthetic_exe(exe_path, work_dir, max_workers, worker_pool):
+    extract_dir = work_dir / "Extracted"
+    compressed_dir = work_dir / ".compressed" / "Extracted"
+    for dir_ in set(Path(filepath).parent for filepath in KNOWN_FILEPATHS):
+        (extract_dir / dir_).mkdir(parents=True, exist_ok=True)
+
+    with exe_path.open("rb") as exe:
+        asset_store = AssetStore.load_from_file(exe)
+        asset_store.extract(
+            extract_dir,
+            compressed_dir,
+            max_workers=max_workers,
+            generate_string_hashes=False,
+            create_entity_sheets=False,
+            worker_pool=worker_pool,
+        )
+        asset_store.close_mapping()
+
+
+def bench_pool(args):
+    # Levels aren't converted after decompression, so the time is dominated
+    # by decryption.
+    filepaths = [path for path in KNOWN_FILEPATHS if path.endswith(".lvl")]
+    filepaths = filepaths[: args.assets]
+    asset_size = int(args.asset_mb * 1024 * 1024)
+    files = {filepath: os.urandom(asset_size) for filepath in filepaths}
+    total_size = asset_size * len(files)
+
+    worker_counts = sorted(
+        set([1, 2, 4, 8, os.cpu_count() or 1]) & set(range(1, args.max_workers + 1))
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        exe_path = tmp_dir / "Spel2.exe"
+        exe_path.write_bytes(build_synthetic_exe(files))
+
+        logger.info("Extracting %s assets of %s MB", len(files), args.asset_mb)
+        for worker_pool in WorkerPool:
+            baseline = None
+            for max_workers in worker_counts:
+                elapsed = time_call(
+                    extract_synthetic_exe,
+                    exe_path,
+                    tmp_dir / f"{worker_pool.value}-{max_workers}",
+                    max_workers,
+                    worker_pool,
+                    repeat=args.repeat,
+                )
+                baseline = baseline or elapsed
+                logger.info(
+                    "%7s x%-2s: %8.2f MB/s (%.1fx)",
+                    worker_pool.value,
+                    max_workers,
+                    throughput(total_size, elapsed),
+                    baseline / max(elapsed, 1e-9),
+                )
+
+
+def bench_dds(args):
+    img = random_rgba_image(args.size, args.size)
+    pixels_size = args.size * args.size * 4
+
+    fast = time_call(png_to_dds, img, repeat=args.repeat)
+    logger.info("png_to_dds (band ops):  %8.2f MB/s", throughput(pixels_size, fast))
+    if args.skip_reference:
+        return
+
+    if png_to_dds(img) != png_to_dds_pixelwise(img):
+        raise RuntimeError("DDS output differs from reference implementation")
+    slow = time_call(png_to_dds_pixelwise, img, repeat=1)
+    logger.info("png_to_dds (pixelwise): %8.2f MB/s", throughput(pixels_size, slow))
+    logger.info("Speedup: %.1fx", slow / max(fast, 1e-9))
+
+
+def parse_riff_chunks(soundbank_file):
+    """Parse the bank with the deprecated chunk module, as the old reader did."""
+    # pylint: disable=deprecated-module,import-outside-toplevel
+    from chunk import Chunk
+
+    def read_children(end):
+        children = []
+        while soundbank_file.tell() < end:
+            child = Chunk(soundbank_file, align=True, bigendian=False)
+            grandchildren = None
+            if child.getname() == b"LIST":
+                child.read(4)
+                grandchildren = read_children(child.offset + child.getsize())
+            child.seek(0)
+            child.skip()
+            children.append((child, grandchildren))
+        return children
+
+    soundbank_file.seek(0)
+    riff = Chunk(soundbank_file, align=True, bigendian=False)
+    riff.read(4)
+    return read_children(riff.offset + riff.getsize())
+
+
+def bench_riff(args):
+    sample_size = args.sample_kb * 1024
+    num_samples = int(args.size_mb * 1024 * 1024) // sample_size
+    sample = os.urandom(sample_size)
+    fsbs = [
+        [sample] * min(args.samples_per_fsb, num_samples - start)
+        for start in range(0, num_samples, args.samples_per_fsb)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        soundbank_path = tmp_dir / "soundbank.bank"
+        soundbank_path.write_bytes(build_synthetic_soundbank(fsbs))
+        bank_size = soundbank_path.stat().st_size
+        logger.info(
+            "Soundbank of %.0f MB with %s FSBs, %s samples",
+            bank_size / (1024 * 1024),
+            len(fsbs),
+            num_samples,
+        )
+
+        with soundbank_path.open("rb") as soundbank_file, mmap.mmap(
+            soundbank_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as soundbank_map:
+
+            def index_riff():
+                RIFFIndex(soundbank_map).release()
+
+            elapsed = time_call(index_riff, repeat=args.repeat)
+            logger.info("RIFFIndex:          %8.2f ms", elapsed * 1000)
+
+            try:
+                elapsed = time_call(
+                    parse_riff_chunks, soundbank_file, repeat=args.repeat
+                )
+                logger.info("chunk.Chunk:        %8.2f ms", elapsed * 1000)
+            except ImportError:
+                logger.info("chunk.Chunk:        not available")
+
+        start = time.perf_counter()
+        extract_soundbank(
+            soundbank_path,
+            tmp_dir / "soundbank",
+            [Extension.WAV],
+            max_workers=args.max_workers,
+        )
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "extract_soundbank: %8.2f MB/s, %8.1f samples/sec",
+            throughput(bank_size, elapsed),
+            num_samples / max(elapsed, 1e-9),
+        )
+
+
+# Small text assets the game reads with plain zstd, used for the dictionary
+# experiment.
+DICTIONARY_SUFFIXES = (".lvl", ".str")
+
+
+def synthetic_compression_inputs(args):
+    rng = random.Random(0)
+    inputs = {}
+    for filepath in KNOWN_FILEPATHS:
+        if filepath.endswith(DICTIONARY_SUFFIXES):
+            inputs[filepath] = synthetic_level(rng, rooms=rng.randrange(4, 32))
+    # Large assets are repeated blocks with noise, like texture sheets with
+    # lots of similar sprites.
+    block = random_bytes(rng, 64 * 1024)
+    large_size = int(args.large_mb * 1024 * 1024)
+    for idx in range(args.large):
+        data = bytearray(block * (large_size // len(block)))
+        for pos in range(0, len(data), 4096):
+            data[pos] = rng.randrange(256)
+        inputs[f"Data/Textures/large{idx}.DDS"] = bytes(data)
+    return inputs
+
+
+def compression_inputs_from_dir(extracted_dir: Path):
+    return {
+        path.relative_to(extracted_dir).as_posix(): path.read_bytes()
+        for path in sorted(extracted_dir.rglob("*"))
+        if path.is_file() and path.suffix != ".png"
+    }
+
+
+def compress_all(inputs, compress_func, max_workers):
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Largest first, as the repack does.
+        ordered = sorted(inputs.values(), key=len, reverse=True)
+        return sum(len(data) for data in pool.map(compress_func, ordered))
+
+
+def bench_compression(args):
+    if args.extracted_dir:
+        inputs = compression_inputs_from_dir(Path(args.extracted_dir))
+    else:
+        inputs = synthetic_compression_inputs(args)
+    total_size = sum(len(data) for data in inputs.values())
+    logger.info(
+        "Compressing %s assets, %.1f MB at level %s with %s workers",
+        len(inputs),
+        total_size / (1024 * 1024),
+        args.level,
+        args.max_workers,
+    )
+
+    modes = {
+        # What DiskAsset.compress used to do
+        "fresh context": lambda data: zstd.ZstdCompressor(level=args.level).compress(
+            data
+        ),
+        "reused context": lambda data: compress(data, args.level, threads=0),
+        "reused + multithreaded": lambda data: compress(data, args.level),
+    }
+    baseline = None
+    for name, compress_func in modes.items():
+        start = time.perf_counter()
+        compressed_size = compress_all(inputs, compress_func, args.max_workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        logger.info(
+            "%-24s %8.2f s (%.1fx) %12s bytes",
+            name,
+            elapsed,
+            baseline / max(elapsed, 1e-9),
+            compressed_size,
+        )
+
+    # The game decompresses assets without a dictionary, so this only shows
+    # what one would save, it can't be used for packing.
+    samples = [
+        data
+        for filepath, data in inputs.items()
+        if filepath.endswith(DICTIONARY_SUFFIXES)
+    ]
+    if len(samples) < 8:
+        logger.info("Not enough .lvl/.str assets to train a dictionary")
+        return
+
+    start = time.perf_counter()
+    dictionary = zstd.train_dictionary(args.dict_kb * 1024, samples)
+    trained = time.perf_counter() - start
+    plain = sum(len(compress(data, args.level, threads=0)) for data in samples)
+    with_dict = zstd.ZstdCompressor(level=args.level, dict_data=dictionary)
+    start = time.perf_counter()
+    dict_size = sum(len(with_dict.compress(data)) for data in samples)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Dictionary over %s .lvl/.str assets: %s -> %s bytes (+%s dictionary),"
+        " trained in %.2f s, compressed in %.2f s",
+        len(samples),
+        plain,
+        dict_size,
+        len(dictionary.as_bytes()),
+        trained,
+        elapsed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asset pipeline.")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed runs, the best is reported. Default: %(default)s",
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    chacha_parser = subparsers.add_parser(
+        "chacha", help="Keystream application throughput."
+    )
+    chacha_parser.add_argument(
+        "--size-mb",
+        type=float,
+        default=16,
+        help="Size of the buffer to encrypt. Default: %(default)s",
+    )
+    chacha_parser.set_defaults(func=bench_chacha)
+
+    hashing_parser = subparsers.add_parser(
+        "hashing", help="Filepath hashing of all known filepaths."
+    )
+    hashing_parser.set_defaults(func=bench_hashing)
+
+    pool_parser = subparsers.add_parser(
+        "pool", help="Extraction scaling with thread and process pools."
+    )
+    pool_parser.add_argument(
+        "--assets",
+        type=int,
+        default=32,
+        help="Number of assets to extract. Default: %(default)s",
+    )
+    pool_parser.add_argument(
+        "--asset-mb",
+        type=float,
+        default=1,
+        help="Size of each asset. Default: %(default)s",
+    )
+    pool_parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Largest worker count to try. Default: %(default)s",
+    )
+    pool_parser.set_defaults(func=bench_pool)
+
+    dds_parser = subparsers.add_parser("dds", help="PNG to DDS conversion.")
+    dds_parser.add_argument(
+        "--size",
+        type=int,
+        default=4096,
+        help="Width and height of the texture. Default: %(default)s",
+    )
+    dds_parser.add_argument(
+        "--skip-reference",
+        default=False,
+        action="store_true",
+        help="Don't time the slow per-pixel implementation.",
+    )
+    dds_parser.set_defaults(func=bench_dds)
+
+    riff_parser = subparsers.add_parser(
+        "riff", help="Soundbank indexing and extraction."
+    )
+    riff_parser.add_argument(
+        "--size-mb",
+        type=float,
+        default=300,
+        help="Total size of the samples in the bank. Default: %(default)s",
+    )
+    riff_parser.add_argument(
+        "--sample-kb",
+        type=int,
+        default=64,
+        help="Size of each sample. Default: %(default)s",
+    )
+    riff_parser.add_argument(
+        "--samples-per-fsb",
+        type=int,
+        default=256,
+        help="Number of samples in each FSB chunk. Default: %(default)s",
+    )
+    riff_parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Processes rebuilding samples. Default: %(default)s",
+    )
+    riff_parser.set_defaults(func=bench_riff)
+
+    compression_parser = subparsers.add_parser(
+        "compression", help="zstd compression of assets when repacking."
+    )
+    compression_parser.add_argument(
+        "--extracted-dir",
+        default=None,
+        help="Compress the files in this dir instead of synthetic assets.",
+    )
+    compression_parser.add_argument(
+        "--level",
+        type=int,
+        default=DEFAULT_COMPRESSION_LEVEL,
+        help="zstd level. Default: %(default)s",
+    )
+    compression_parser.add_argument(
+        "--large",
+        type=int,
+        default=2,
+        help="Number of large synthetic assets. Default: %(default)s",
+    )
+    compression_parser.add_argument(
+        "--large-mb",
+        type=float,
+        default=32,
+        help="Size of each large synthetic asset. Default: %(default)s",
+    )
+    compression_parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=max((os.cpu_count() or 1) - 2, 1),
+        help="Assets compressed at once. Default: %(default)s",
+    )
+    compression_parser.add_argument(
+        "--dict-kb",
+        type=int,
+        default=112,
+        help="Size of the trained dictionary. Default: %(default)s",
+    )
+    compression_parser.set_defaults(func=bench_compression)
+
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+    # Per asset progress would drown out the results.
+    logging.getLogger("modlunky2.assets.assets").setLevel(logging.WARNING)
+    logging.getLogger("modlunky2.assets.soundbank").setLevel(logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -56,8 +56,19 @@ def quad_rounds(s):
     return w_to_s(w)
 
 
+# Number of bytes XOR'd per step when applying a keystream. Must be a multiple
+# of the 0x40 byte key so every chunk starts on a key boundary.
+KEYSTREAM_CHUNK_SIZE = 0x40 * 0x4000
+
+
 def sxor(x, y):
-    return bytes(a ^ b for a, b in zip(x, y))
+    """XOR two byte strings, truncating to the shorter of the two."""
+    size = min(len(x), len(y))
+    if size == 0:
+        return b""
+    return (
+        int.from_bytes(x[:size], "little") ^ int.from_bytes(y[:size], "little")
+    ).to_bytes(size, "little")
 
 
 def s_to_w(s):
@@ -145,6 +156,143 @@ def keyed_hashing(filepath, key):
     return h
 
 
+# Batched hashing packs the same state word of many filepaths in to one int,
+# each in its own 64 bit lane. The lanes are twice the word size so additions
+# and left shifts never carry in to a neighbouring lane, letting a single
+# Python int operation advance every filepath's state at once.
+LANE_BITS = 64
+
+
+def _lane_mask(count, bits=32):
+    return int.from_bytes(
+        ((1 << bits) - 1).to_bytes(LANE_BITS // 8, "little") * count, "little"
+    )
+
+
+def _pack_lanes(states):
+    """Convert a list of 0x40 byte states to 16 lane-packed words."""
+    return [
+        int.from_bytes(
+            b"".join(state[i : i + 4] + b"\x00\x00\x00\x00" for state in states),
+            "little",
+        )
+        for i in range(0, 0x40, 4)
+    ]
+
+
+def _unpack_lanes(w, count):
+    """Convert 16 lane-packed words back to a list of 0x40 byte states."""
+    words = [word.to_bytes(count * LANE_BITS // 8, "little") for word in w]
+    return [
+        b"".join(word[lane * 8 : lane * 8 + 4] for word in words)
+        for lane in range(count)
+    ]
+
+
+def _rotate_left_lanes(a, b, mask):
+    return ((a << b) | (a >> (32 - b))) & mask
+
+
+def _quarter_round_lanes(w, a, b, c, d, mask):
+    w[a] = (w[a] + w[b]) & mask
+    w[d] = _rotate_left_lanes(w[d] ^ w[a], 16, mask)
+    w[c] = (w[c] + w[d]) & mask
+    w[b] = _rotate_left_lanes(w[b] ^ w[c], 12, mask)
+    w[a] = (w[a] + w[b]) & mask
+    w[d] = _rotate_left_lanes(w[d] ^ w[a], 8, mask)
+    w[c] = (w[c] + w[d]) & mask
+    w[b] = _rotate_left_lanes(w[b] ^ w[c], 7, mask)
+
+
+def _round_pairs_lanes(w, mask, pairs):
+    w = list(w)
+    for _ in range(pairs):
+        _quarter_round_lanes(w, 0, 4, 8, 12, mask)
+        _quarter_round_lanes(w, 1, 5, 9, 13, mask)
+        _quarter_round_lanes(w, 2, 6, 10, 14, mask)
+        _quarter_round_lanes(w, 3, 7, 11, 15, mask)
+        _quarter_round_lanes(w, 0, 5, 10, 15, mask)
+        _quarter_round_lanes(w, 1, 6, 11, 12, mask)
+        _quarter_round_lanes(w, 2, 7, 8, 13, mask)
+        _quarter_round_lanes(w, 3, 4, 9, 14, mask)
+    return w
+
+
+def _add_qwords_lanes(w0, w1, mask):
+    out = []
+    for i in range(0, 16, 2):
+        low = w0[i] + w1[i]
+        carry = (low >> 32) & mask
+        out.append(low & mask)
+        out.append((w0[i + 1] + w1[i + 1] + carry) & mask)
+    return out
+
+
+def _mix_in_lanes(w, filepaths, mask):
+    """Batched `mix_in`. All filepaths must span the same number of partials."""
+    for i in range(0, len(filepaths[0]), 0x40):
+        partials = [
+            filepath[i : i + 0x40][::-1].ljust(0x40, b"\x00") for filepath in filepaths
+        ]
+        w = [word ^ partial for word, partial in zip(w, _pack_lanes(partials))]
+        w = _round_pairs_lanes(w, mask, 4)
+    return w
+
+
+def _hash_filepaths_group(filepaths, key, version):
+    count = len(filepaths)
+    mask = _lane_mask(count)
+
+    if version == "v1":
+        h0 = _mix_in_lanes([0] * 16, filepaths, mask)
+        h1 = _round_pairs_lanes(h0, mask, 4)
+        keys = _round_pairs_lanes(_add_qwords_lanes(h0, h1, mask), mask, 4)
+    else:
+        h = _pack_lanes(
+            [
+                pack(b"<QQQQQQQQ", key, len(filepath), 0, 0, 0, 0, 0, 0)
+                for filepath in filepaths
+            ]
+        )
+        h = _round_pairs_lanes(h, mask, 2)
+        h = _mix_in_lanes(h, filepaths, mask)
+        tmp = _add_qwords_lanes(h, _round_pairs_lanes(h, mask, 4), mask)
+        # XOR the filepath length in to the low dword of the first qword. The
+        # lengths are always below 2**32 so the high dword is untouched.
+        tmp[0] ^= int.from_bytes(
+            b"".join(pack(b"<Q", len(filepath)) for filepath in filepaths), "little"
+        )
+        keys = _round_pairs_lanes(tmp, mask, 4)
+
+    return [
+        keyed_hashing(filepath, lane_key)
+        for filepath, lane_key in zip(filepaths, _unpack_lanes(keys, count))
+    ]
+
+
+def hash_filepaths(filepaths, key=None, version="v2"):
+    """Hash many filepaths at once. Equivalent to calling `hash_filepath` on each.
+
+    Filepaths are grouped by how many 0x40 byte partials they span and every
+    group is run through the rounds together.
+    """
+    if version not in ("v1", "v2"):
+        raise ValueError("Invalid version provided.")
+
+    groups = {}
+    for idx, filepath in enumerate(filepaths):
+        groups.setdefault((len(filepath) + 0x3F) // 0x40, []).append(idx)
+
+    out = [None] * len(filepaths)
+    for indexes in groups.values():
+        hashes = _hash_filepaths_group(
+            [filepaths[idx] for idx in indexes], key, version
+        )
+        for idx, hash_ in zip(indexes, hashes):
+            out[idx] = hash_
+    return out
+
+
 class Key:
     def __init__(self, key=0, mask=2**64 - 1):
         self.key = key
@@ -177,15 +325,31 @@ def chacha_rest(data, key):
     # NOTE: This appears to be an implementation mistake on the Spelunky 2 dev's part
     # They generate a quad_round advanced version of (nonce'd key), but then they
     # xor with the untweaked key instead of the tweaked key...
-    out = b""
-    if len(data) >= 0x40:
-        blocks = len(data) // 0x40
-        out += sxor(data, key[::-1] * blocks)
-        data = data[blocks * 0x40 :]
-    if len(data) > 0:
-        out += sxor(data, key[: len(data)][::-1])
-
-    return out
+    #
+    # Full blocks are XOR'd against the reversed key, tiled across a large chunk
+    # so the work happens a word at a time instead of a byte at a time. The
+    # trailing partial block uses the reversed prefix of the key instead.
+    data_len = len(data)
+    full_len = data_len - data_len % 0x40
+    out = bytearray(data_len)
+
+    if full_len:
+        chunk_size = min(KEYSTREAM_CHUNK_SIZE, full_len)
+        keystream = int.from_bytes(key[::-1] * (chunk_size // 0x40), "little")
+        for start in range(0, full_len, chunk_size):
+            end = min(start + chunk_size, full_len)
+            size = end - start
+            chunk_keystream = keystream
+            if size != chunk_size:
+                chunk_keystream &= (1 << (size * 8)) - 1
+            out[start:end] = (
+                int.from_bytes(data[start:end], "little") ^ chunk_keystream
+            ).to_bytes(size, "little")
+
+    if full_len < data_len:
+        out[full_len:] = sxor(data[full_len:], key[: data_len - full_len][::-1])
+
+    return bytes(out)
 
 
 def chacha_v1(filepath, data):
@@ -200,7 +364,34 @@ def chacha_v1(filepath, data):
     return chacha_rest(data, key)
 
 
-def chacha_v2(filepath, data, key):
+def chacha_rest_range(data, key, start, data_len):
+    """Like `chacha_rest`, for `data` found at `start` of a buffer that is
+    `data_len` bytes long in total.
+
+    The keystream only depends on the position, so a large asset can be
+    decrypted a piece at a time.
+    """
+    end = start + len(data)
+    if end > data_len:
+        raise ValueError(f"Range ends at {end}, past the data length {data_len}")
+
+    full_len = data_len - data_len % 0x40
+    out = b""
+    if start < full_len:
+        size = min(end, full_len) - start
+        phase = start % 0x40
+        blocks = (phase + size + 0x3F) // 0x40
+        keystream = (key[::-1] * blocks)[phase : phase + size]
+        out += sxor(data[:size], keystream)
+    if end > full_len:
+        tail_start = max(start, full_len) - full_len
+        tail_key = key[: data_len - full_len][::-1]
+        out += sxor(data[len(out) :], tail_key[tail_start:])
+    return out
+
+
+def chacha_v2_key(filepath, data_len, key):
+    """The keystream block used to encrypt `data_len` bytes of `filepath`."""
     # Untweaked key begins as half-advanced `key`
     h = two_rounds(pack(b"<QQQQQQQQ", key, len(filepath), 0, 0, 0, 0, 0, 0))
 
@@ -209,9 +400,11 @@ def chacha_v2(filepath, data, key):
     # Add the tweaked key and its advancement, then advance by four round pairs.
     tmp = add_qwords(h, quad_rounds(h))
     tmp = s_to_q(tmp)
-    key = quad_rounds(q_to_s([tmp[0] ^ key + len(data)] + tmp[1:]))
+    return quad_rounds(q_to_s([tmp[0] ^ key + data_len] + tmp[1:]))
 
-    return chacha_rest(data, key)
+
+def chacha_v2(filepath, data, key):
+    return chacha_rest(data, chacha_v2_key(filepath, len(data), key))
 
 
 def chacha(filepath, data, key=None, version="v2"):
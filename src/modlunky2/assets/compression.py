@@ -0,0 +1,72 @@
+import os
+import threading
+
+import zstandard as zstd
+
+from modlunky2.assets.constants import DEFAULT_COMPRESSION_LEVEL
+
+# Assets at least this large are compressed with zstd's own worker threads.
+# Below it the cost of splitting the input outweighs the gain.
+MULTITHREAD_MIN_SIZE = 4 * 1024 * 1024
+# Let zstd use one thread per core.
+ALL_CORES = -1
+# The most bytes a zstd frame header can take, including the magic number.
+FRAME_HEADER_MAX_SIZE = 18
+
+# zstd contexts aren't thread safe, so each thread (and so each process of a
+# process pool) keeps its own and reuses them across assets.
+_CONTEXTS = threading.local()
+
+
+def get_compressor(level=DEFAULT_COMPRESSION_LEVEL, threads=0):
+    compressors = getattr(_CONTEXTS, "compressors", None)
+    if compressors is None:
+        compressors = _CONTEXTS.compressors = {}
+    key = (level, threads)
+    if key not in compressors:
+        compressors[key] = zstd.ZstdCompressor(level=level, threads=threads)
+    return compressors[key]
+
+
+def get_decompressor():
+    decompressor = getattr(_CONTEXTS, "decompressor", None)
+    if decompressor is None:
+        decompressor = _CONTEXTS.decompressor = zstd.ZstdDecompressor()
+    return decompressor
+
+
+def threads_per_worker(max_workers):
+    """zstd threads for each of `max_workers` assets compressed at once, so
+    that together they use about one thread per core."""
+    threads = (os.cpu_count() or 1) // max(max_workers, 1)
+    return threads if threads > 1 else 0
+
+
+def compress(
+    data, level=DEFAULT_COMPRESSION_LEVEL, threads=None, max_threads=ALL_CORES
+):
+    """Compress `data` with a reused context.
+
+    Unless `threads` is given, large inputs are compressed with `max_threads`
+    zstd threads. The output is a standard zstd frame with the content size
+    either way.
+    """
+    if threads is None:
+        threads = max_threads if len(data) >= MULTITHREAD_MIN_SIZE else 0
+    return get_compressor(level, threads).compress(data)
+
+
+def decompress(data):
+    return get_decompressor().decompress(data)
+
+
+def content_size(header):
+    """The decompressed size recorded in a zstd frame `header`, or None if
+    it isn't a frame or doesn't record one."""
+    try:
+        size = zstd.frame_content_size(header)
+    except zstd.ZstdError:
+        return None
+    if size < 0:
+        return None
+    return size
@@ -418,4 +418,11 @@ FILEPATH_DIRS = [
 ]
 
 DEFAULT_COMPRESSION_LEVEL = 20
+# Upper bound on decompressed asset bytes held in memory during extraction.
+DEFAULT_MAX_IN_FLIGHT_BYTES = 256 * 1024 * 1024
+# zlib levels for extracted PNGs. 6 is PIL's default, the fast level trades
+# file size for extraction speed and the files can be optimized afterwards.
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+FAST_PNG_COMPRESS_LEVEL = 1
+OPTIMIZED_PNG_COMPRESS_LEVEL = 9
 BANK_ALIGNMENT = 32
@@ -3,22 +3,24 @@ from struct import pack, unpack
 
 from PIL import Image
 
+from modlunky2.assets.constants import DEFAULT_PNG_COMPRESS_LEVEL
 
-def rgba_to_png(data):
+
+def rgba_to_png(data, compress_level=DEFAULT_PNG_COMPRESS_LEVEL):
     width, height = unpack(b"<II", data[:8])
     img = Image.frombytes("RGBA", (width, height), data[8:], "raw")
     new_data = io.BytesIO()
-    img.save(new_data, format="PNG")
+    img.save(new_data, format="PNG", compress_level=compress_level)
     return new_data.getvalue()
 
 
-def dds_to_png(data):
+def dds_to_png(data, compress_level=DEFAULT_PNG_COMPRESS_LEVEL):
     """Takes a .DDS `Image` and returns .png data."""
     img = Image.open(io.BytesIO(data))
     # Needed in older versions of Pillow before 8.3.x
     # img.tile[0] = img.tile[0][:-1] + ((img.tile[0][-1][0][::-1], 0, 1),)
     new_data = io.BytesIO()
-    img.save(new_data, format="PNG")
+    img.save(new_data, format="PNG", compress_level=compress_level)
     return new_data.getvalue()
 
 
@@ -63,13 +65,15 @@ def png_to_dds(img):
     data += pack("<4I", caps, caps2, caps3, caps4)
     data += pack("<I", 0)  # reserved
 
-    data += bytes(
-        (
-            byte if rgba[3] != 0 else 0
-        )  # Hack to force all transparent pixels to be (0, 0, 0, 0)
-        # instead of (255, 255, 255, 0)
-        for rgba in img.getdata()
-        for byte in rgba
-    )
+    data += clear_transparent_pixels(img).tobytes()
 
     return data
+
+
+def clear_transparent_pixels(img):
+    """Takes an RGBA `Image` and returns a copy with every fully transparent
+    pixel set to (0, 0, 0, 0) instead of e.g. (255, 255, 255, 0)."""
+
+    opaque_mask = img.getchannel("A").point(lambda alpha: 255 if alpha else 0)
+    transparent = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    return Image.composite(img, transparent, opaque_mask)
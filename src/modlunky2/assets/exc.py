@@ -16,3 +16,7 @@ class MissingAsset(Error):
 
 class NonSiblingAsset(Error):
     """Returned when an asset is not a sibling of the compression dir."""
+
+
+class InconsistentBundle(Error):
+    """Raised when a packed bundle's key chain doesn't match what was written."""
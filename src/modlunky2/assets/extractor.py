@@ -3,8 +3,11 @@ import logging
 from pathlib import Path
 
 from .assets import AssetStore
+from .pipeline import WorkerPool
 from .constants import (
     DEFAULT_COMPRESSION_LEVEL,
+    DEFAULT_MAX_IN_FLIGHT_BYTES,
+    DEFAULT_PNG_COMPRESS_LEVEL,
     EXTRACTED_DIR,
     FILEPATH_DIRS,
     PACKS_DIR,
@@ -56,6 +59,55 @@ def main():
         action="store_true",
         help=("Create extended entity assets merged from multiple sheets."),
     )
+    parser.add_argument(
+        "--max-in-flight-mb",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT_BYTES // (1024 * 1024),
+        help=(
+            "Maximum megabytes of asset data held in memory while extracting."
+            " Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--worker-pool",
+        choices=[worker_pool.value for worker_pool in WorkerPool],
+        default=WorkerPool.THREAD.value,
+        help=(
+            "Run extraction in threads or processes."
+            " Processes are faster on multi-core machines. Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        default=False,
+        action="store_true",
+        help="Only re-extract assets that changed since the last extraction.",
+    )
+    parser.add_argument(
+        "--png-compress-level",
+        type=int,
+        choices=range(0, 10),
+        default=DEFAULT_PNG_COMPRESS_LEVEL,
+        metavar="{0-9}",
+        help=(
+            "zlib level for extracted textures, lower is faster to write."
+            " Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--optimize-pngs",
+        dest="optimize_pngs",
+        default=False,
+        action="store_true",
+        help="Recompress extracted textures at the highest level afterwards.",
+    )
+    parser.add_argument(
+        "--timings-json",
+        type=Path,
+        default=None,
+        help="Write the time spent in each stage of extraction to this file.",
+    )
     parser.add_argument(
         "--no-mkdirs",
         dest="mkdirs",
@@ -83,18 +135,29 @@ def main():
             )
 
     asset_store = AssetStore.load_from_file(args.exe)
-    unextracted = asset_store.extract(
-        mods_dir / extracted_dir,
-        mods_dir / ".compressed" / extracted_dir,
-        args.compression_level,
-        recompress=args.recompress,
-        create_entity_sheets=args.create_entity_sheets,
-        generate_string_hashes=False,
-    )
+    try:
+        unextracted = asset_store.extract(
+            mods_dir / extracted_dir,
+            mods_dir / ".compressed" / extracted_dir,
+            args.compression_level,
+            recompress=args.recompress,
+            create_entity_sheets=args.create_entity_sheets,
+            generate_string_hashes=False,
+            max_in_flight_bytes=args.max_in_flight_mb * 1024 * 1024,
+            worker_pool=WorkerPool(args.worker_pool),
+            incremental=args.incremental,
+            png_compress_level=args.png_compress_level,
+            optimize_pngs=args.optimize_pngs,
+        )
+    finally:
+        asset_store.close_mapping()
 
     for asset in unextracted:
         logging.warning("Un-extracted Asset %s", asset.asset_block)
 
+    if args.timings_json:
+        asset_store.timings.save(args.timings_json)
+
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,11 @@
+import argparse
 import hashlib
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
 
 
 def md5sum_path(path, chunk_size=8192):
@@ -11,3 +18,119 @@ def md5sum_path(path, chunk_size=8192):
             md5sum.update(chunk)
             chunk = file_.read(chunk_size)
         return md5sum.hexdigest().encode()
+
+
+class FingerprintCache:
+    """Caches md5 digests of files keyed by their stat fingerprint.
+
+    A file is only re-hashed when its size, mtime_ns or inode differ from when
+    it was last hashed. The cache is stored as JSON in `FILENAME` under the
+    directory it's loaded from.
+    """
+
+    FILENAME = "fingerprints.json"
+    VERSION = 1
+
+    def __init__(self, path: Path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, cache_dir: Path):
+        path = cache_dir / cls.FILENAME
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with path.open("r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable fingerprint cache %s: %s", path, err)
+            return cls(path)
+
+        if data.get("version") != cls.VERSION:
+            return cls(path)
+        return cls(path, data.get("entries", {}))
+
+    @staticmethod
+    def fingerprint(path: Path):
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def md5sum(self, path: Path):
+        """Same as `md5sum_path`, but skips hashing if the file is unchanged."""
+        key = str(path)
+        fingerprint = self.fingerprint(path)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                self.hits += 1
+                return entry["md5sum"].encode()
+
+        md5sum = md5sum_path(path)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = {"fingerprint": fingerprint, "md5sum": md5sum.decode()}
+            self._dirty = True
+        return md5sum
+
+    def record(self, path: Path, md5sum: bytes):
+        """Store the `md5sum` of a file that was just written, so it isn't
+        hashed again."""
+        fingerprint = self.fingerprint(path)
+        with self._lock:
+            self.entries[str(path)] = {
+                "fingerprint": fingerprint,
+                "md5sum": md5sum.decode(),
+            }
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": self.VERSION, "entries": self.entries}
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as cache_file:
+            json.dump(data, cache_file)
+
+    def invalidate(self):
+        """Forget every fingerprint, forcing all files to be re-hashed."""
+        with self._lock:
+            self.entries = {}
+            self._dirty = False
+        if self.path.exists():
+            self.path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage the cache of source file hashes used when packing."
+    )
+    parser.add_argument(
+        "command", choices=["invalidate", "stats"], help="What to do with the cache."
+    )
+    parser.add_argument(
+        "compressed_dir",
+        type=Path,
+        help="Path to the .compressed directory, e.g. Mods/.compressed",
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+
+    cache = FingerprintCache.load(args.compressed_dir)
+    if args.command == "invalidate":
+        logger.info("Invalidating %s fingerprints", len(cache.entries))
+        cache.invalidate()
+    else:
+        logger.info("%s fingerprints in %s", len(cache.entries), cache.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+from modlunky2.assets.hashing import FingerprintCache
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractManifest:
+    """Records what each extracted file was produced from.
+
+    Entries are keyed by the asset's filepath and hold the asset_len, md5 of the
+    encrypted block (`block_md5`) and md5 of the decrypted, still compressed,
+    payload (`payload_md5`), plus the size, md5 and stat fingerprint of the
+    file that was written (`output_size`, `output_md5`, `output_fingerprint`).
+
+    The bundle key rolls over the length of every asset, so a patch that
+    resizes any asset changes the encrypted bytes of all of them. The payload
+    hash lets those assets still be reused after decryption, skipping the
+    decompression, conversion and write.
+    """
+
+    FILENAME = "extract-manifest.json"
+    VERSION = 2
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, Dict]] = None):
+        self.path = path
+        self.entries = entries or {}
+        self.reused: List[str] = []
+        self.refreshed: List[str] = []
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, compressed_dir: Path):
+        path = compressed_dir / cls.FILENAME
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with path.open("r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable extract manifest %s: %s", path, err)
+            return cls(path)
+
+        if data.get("version") != cls.VERSION:
+            return cls(path)
+        return cls(path, data.get("entries", {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": self.VERSION, "entries": self.entries}
+        with self.path.open("w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+
+    def get(self, filepath: str) -> Optional[Dict]:
+        with self._lock:
+            return self.entries.get(filepath)
+
+    def record(self, filepath: str, entry: Optional[Dict], reused: bool):
+        with self._lock:
+            if entry is None:
+                self.entries.pop(filepath, None)
+                return
+            self.entries[filepath] = entry
+            if reused:
+                self.reused.append(filepath)
+            else:
+                self.refreshed.append(filepath)
+
+    def log_summary(self):
+        # On a first extraction everything is refreshed, which isn't worth
+        # listing file by file.
+        log_level = logging.INFO if self.reused else logging.DEBUG
+        for filepath in sorted(self.refreshed):
+            logger.log(log_level, "Refreshed %s", filepath)
+        logger.info(
+            "Reused %s extracted files, refreshed %s",
+            len(self.reused),
+            len(self.refreshed),
+        )
+
+
+class PackState:
+    """Records what the last repack wrote in to the exe.
+
+    The Pack tab keeps the md5 of the source exe it was packed from and the
+    stat fingerprint of the exe once written, to tell whether the exe still
+    holds that pack. For each asset it keeps the filepath_len the block had
+    in the source exe, which the soundbank padding is added on top of, and
+    the md5 of the packed data (`data_md5`). An incremental repack compares
+    these instead of reading back and re-encrypting the blocks in the exe.
+    """
+
+    FILENAME = "pack-state.json"
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Path,
+        source_md5: Optional[str] = None,
+        dest_fingerprint: Optional[List[int]] = None,
+        assets: Optional[Dict[str, Dict]] = None,
+    ):
+        self.path = path
+        self.source_md5 = source_md5
+        self.dest_fingerprint = dest_fingerprint
+        self.assets = assets or {}
+
+    @classmethod
+    def load(cls, compressed_dir: Path):
+        path = compressed_dir / cls.FILENAME
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with path.open("r", encoding="utf-8") as state_file:
+                data = json.load(state_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable pack state %s: %s", path, err)
+            return cls(path)
+
+        if data.get("version") != cls.VERSION:
+            return cls(path)
+        return cls(
+            path,
+            data.get("source_md5"),
+            data.get("dest_fingerprint"),
+            data.get("assets", {}),
+        )
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "source_md5": self.source_md5,
+            "dest_fingerprint": self.dest_fingerprint,
+            "assets": self.assets,
+        }
+        with self.path.open("w", encoding="utf-8") as state_file:
+            json.dump(data, state_file, indent=1, sort_keys=True)
+
+    def matches(self, source_md5: str, dest_exe: Path) -> bool:
+        """Whether `dest_exe` is exactly what was last packed from the same
+        source exe."""
+        if not self.assets or self.source_md5 != source_md5:
+            return False
+        try:
+            return self.dest_fingerprint == FingerprintCache.fingerprint(dest_exe)
+        except OSError:
+            return False
+
+    def record_dest(self, source_md5: str, dest_exe: Path):
+        self.source_md5 = source_md5
+        self.dest_fingerprint = FingerprintCache.fingerprint(dest_exe)
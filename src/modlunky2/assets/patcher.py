@@ -10,11 +10,22 @@ cmp rax,rcx  jz -/   xor ecx,ecx  call cs:exit        int 3   \-> mov rcx,[rbp+1
                      [               nop               ]
 
 We overwrite the exit() call with NOPs
+
+All of the signatures are found in a single pass over a memory map of the exe
+and the offsets are cached by the exe's size and mtime, so checking whether an
+exe is patched is cheap after the first check.
 """
 
 import logging
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Sequence, Tuple
 
 CHECKSUM_PATCH_START = b"\x48\x3B\xC1\x74\x09\x33\xC9\xFF"
+CHECKSUM_PATCH_AOB = "48 3B C1 74 09 33 C9 FF ?? ?? ?? ?? ?? ??"
 CHECKSUM_PATCH_END = 0xCC
 CHECKSUM_PATCH_REPLACE = b"\x48\x3B\xC1\x74\x09" + b"\x90" * 9
 
@@ -25,10 +36,170 @@ RELEASE_AOB_REPLACE = b"\x00\x4D\x6F\x64\x6C\x75\x6E\x6B\x79\x32\x00\x00"
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class Signature:
+    """An array of bytes to search for, where None matches any byte."""
+
+    name: str
+    aob: Tuple[Optional[int], ...]
+
+    @classmethod
+    def from_aob(cls, name, text):
+        """Parses a signature like `FF ?? 0A`."""
+        return cls(
+            name,
+            tuple(None if byte == "??" else int(byte, 16) for byte in text.split()),
+        )
+
+    @classmethod
+    def from_bytes(cls, name, needle):
+        return cls(name, tuple(needle))
+
+    def __len__(self):
+        return len(self.aob)
+
+    @property
+    def anchor(self) -> Tuple[int, bytes]:
+        """The longest run of fixed bytes and its offset in the signature.
+
+        Candidates are found by searching for the anchor, which runs at memchr
+        speed, and only then checked against the wildcards.
+        """
+        best_offset, best_run = 0, b""
+        offset = 0
+        while offset < len(self.aob):
+            end = offset
+            while end < len(self.aob) and self.aob[end] is not None:
+                end += 1
+            if end - offset > len(best_run):
+                best_offset, best_run = offset, bytes(self.aob[offset:end])
+            offset = end + 1
+        if not best_run:
+            raise ValueError(f"Signature {self.name} has no fixed bytes")
+        return best_offset, best_run
+
+    def matches(self, buffer, offset) -> bool:
+        if offset < 0 or offset + len(self.aob) > len(buffer):
+            return False
+        return all(
+            byte is None or buffer[offset + idx] == byte
+            for idx, byte in enumerate(self.aob)
+        )
+
+
+class SignatureScanner:
+    """Finds the first offset of each signature in one pass over a buffer."""
+
+    WINDOW_SIZE = 1024 * 1024
+
+    def __init__(self, signatures: Sequence[Signature]):
+        self.signatures = list(signatures)
+        self._anchors = {
+            signature.name: signature.anchor for signature in self.signatures
+        }
+        self._cache: Dict[Path, Tuple[int, int, Dict[str, int]]] = {}
+        self._cache_lock = Lock()
+
+    def scan(self, buffer) -> Dict[str, int]:
+        """Returns the offset of each signature by name, or -1 if not found."""
+        offsets = {signature.name: -1 for signature in self.signatures}
+        pending = list(self.signatures)
+        size = len(buffer)
+
+        # Each window is searched for every pending signature while it's hot,
+        # rather than walking the whole buffer once per signature.
+        for window_start in range(0, size, self.WINDOW_SIZE):
+            window_end = window_start + self.WINDOW_SIZE
+            for signature in list(pending):
+                offset = self._find_in_window(
+                    buffer, signature, window_start, window_end
+                )
+                if offset != -1:
+                    offsets[signature.name] = offset
+                    pending.remove(signature)
+            if not pending:
+                break
+
+        return offsets
+
+    def _find_in_window(self, buffer, signature, window_start, window_end):
+        anchor_offset, anchor = self._anchors[signature.name]
+        # Only anchors starting inside the window belong to it, the rest of
+        # the anchor may run past the end.
+        search_end = min(window_end + len(anchor) - 1, len(buffer))
+        pos = buffer.find(anchor, window_start, search_end)
+        while pos != -1:
+            if signature.matches(buffer, pos - anchor_offset):
+                return pos - anchor_offset
+            pos = buffer.find(anchor, pos + 1, search_end)
+        return -1
+
+    def scan_file(self, path: Path) -> Dict[str, int]:
+        """Scans the file at `path`, reusing the last result if the file's
+        size and mtime haven't changed since."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._cache_lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return dict(cached[2])
+
+        if stat.st_size == 0:
+            offsets = self.scan(b"")
+        else:
+            with path.open("rb") as exe, mmap.mmap(
+                exe.fileno(), 0, access=mmap.ACCESS_READ
+            ) as exe_map:
+                offsets = self.scan(exe_map)
+
+        with self._cache_lock:
+            self._cache[path] = (stat.st_size, stat.st_mtime_ns, offsets)
+        return dict(offsets)
+
+    def invalidate(self, path: Path):
+        """Drops the cached offsets for `path`.
+
+        Patching doesn't change the exe's size and can land within the mtime
+        resolution of the previous scan, so writers call this explicitly.
+        """
+        with self._cache_lock:
+            self._cache.pop(Path(path).resolve(), None)
+
+
+CHECKSUM_SIGNATURE = Signature.from_aob("checksum", CHECKSUM_PATCH_AOB)
+RELEASE_SIGNATURE = Signature.from_bytes("release", RELEASE_AOB_PRODUCTION)
+EXE_SCANNER = SignatureScanner([CHECKSUM_SIGNATURE, RELEASE_SIGNATURE])
+
+
 class Patcher:
     def __init__(self, exe_handle):
         self.exe_handle = exe_handle
 
+    @property
+    def exe_path(self) -> Optional[Path]:
+        name = getattr(self.exe_handle, "name", None)
+        if not isinstance(name, (str, os.PathLike)):
+            return None
+        return Path(name)
+
+    def find_signatures(self) -> Dict[str, int]:
+        """Returns the offset of every known signature, or -1 if not found."""
+        exe_path = self.exe_path
+        if exe_path is None:
+            self.exe_handle.seek(0)
+            return EXE_SCANNER.scan(self.exe_handle.read())
+
+        # Make pending writes visible to the memory map.
+        self.exe_handle.flush()
+        return EXE_SCANNER.scan_file(exe_path)
+
+    def _write_at(self, index, data):
+        self.exe_handle.seek(index)
+        self.exe_handle.write(data)
+        self.exe_handle.flush()
+        if self.exe_path is not None:
+            EXE_SCANNER.invalidate(self.exe_path)
+
     def find(self, needle, offset=0, bsize=4096):
         if bsize < len(needle):
             raise ValueError(
@@ -54,20 +225,17 @@ class Patcher:
 
     def is_checksum_patched(self) -> bool:
         """Returns true of the binary has already been patched."""
-        self.exe_handle.seek(0)
-        return self.find(CHECKSUM_PATCH_START) == -1
+        return self.find_signatures()[CHECKSUM_SIGNATURE.name] == -1
 
     def patch_checksum(self):
-        self.exe_handle.seek(0)
-
         logger.info("Patching asset checksum check")
-        index = self.find(CHECKSUM_PATCH_START)
+        index = self.find_signatures()[CHECKSUM_SIGNATURE.name]
         if index == -1:
             logger.warning("Didn't find instructions to patch. Is game unmodified?")
             return False
 
         self.exe_handle.seek(index)
-        ops = self.exe_handle.read(14)
+        ops = self.exe_handle.read(len(CHECKSUM_SIGNATURE))
 
         if ops[-1] != CHECKSUM_PATCH_END:
             logger.warning(
@@ -82,19 +250,16 @@ class Patcher:
         logger.info(  # pylint: disable=logging-fstring-interpolation
             f"Found check at 0x{index:08x}, replacing with NOPs"
         )
-        self.exe_handle.seek(index)
-        self.exe_handle.write(CHECKSUM_PATCH_REPLACE)
+        self._write_at(index, CHECKSUM_PATCH_REPLACE)
         return True
 
     def patch_release(self):
-        self.exe_handle.seek(0)
-        index = self.find(RELEASE_AOB_PRODUCTION)
+        index = self.find_signatures()[RELEASE_SIGNATURE.name]
         if index == -1:
             logger.warning(
                 "Didn't find production string in release. Is this a vanilla binary being patched?"
             )
             return False
 
-        self.exe_handle.seek(index)
-        self.exe_handle.write(RELEASE_AOB_REPLACE)
+        self._write_at(index, RELEASE_AOB_REPLACE)
         return True
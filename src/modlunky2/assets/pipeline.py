@@ -0,0 +1,56 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from threading import Condition
+
+
+class ByteBudget:
+    """Limits how many bytes are in flight between a producer and its workers.
+
+    `acquire` blocks until the requested bytes fit in the budget. A request
+    larger than the whole budget is let through once nothing else is in
+    flight, so a single large asset can't deadlock the pipeline.
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes <= 0:
+            raise ValueError(f"Expected max_bytes > 0, found {max_bytes}")
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.peak = 0
+        self._cond = Condition()
+
+    def acquire(self, size):
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.in_flight == 0 or self.in_flight + size <= self.max_bytes
+            )
+            self.in_flight += size
+            self.peak = max(self.peak, self.in_flight)
+
+    def release(self, size):
+        with self._cond:
+            self.in_flight -= size
+            self._cond.notify_all()
+
+
+class WorkerPool(Enum):
+    """Which kind of executor runs CPU heavy asset work."""
+
+    # Threads share memory but the pure Python decryption and conversion
+    # code holds the GIL, so they mostly help with I/O.
+    THREAD = "thread"
+    # Processes run in parallel but everything passed to them is pickled.
+    PROCESS = "process"
+
+
+def make_executor(
+    worker_pool, max_workers, initializer=None, initargs=(), mp_context=None
+):
+    if worker_pool == WorkerPool.PROCESS:
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=initializer,
+            initargs=initargs,
+            mp_context=mp_context,
+        )
+    return ThreadPoolExecutor(max_workers=max_workers)
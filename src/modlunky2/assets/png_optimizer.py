@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import traceback
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from modlunky2.assets.constants import (
+    DDS_PNGS,
+    KNOWN_TEXTURES_V1,
+    OPTIMIZED_PNG_COMPRESS_LEVEL,
+)
+from modlunky2.assets.hashing import FingerprintCache
+from modlunky2.assets.manifest import ExtractManifest
+from modlunky2.assets.pipeline import WorkerPool, make_executor
+from modlunky2.sprites.merge_cache import SpriteMergeCache
+
+logger = logging.getLogger(__name__)
+
+
+class OptimizeManifest:
+    """Records the size and mtime of every PNG after it was optimized, so an
+    unchanged file is never optimized twice."""
+
+    FILENAME = "png-optimize-manifest.json"
+    VERSION = 1
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, List[int]]] = None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, compressed_dir: Path):
+        path = compressed_dir / cls.FILENAME
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with path.open("r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable optimize manifest %s: %s", path, err)
+            return cls(path)
+
+        if data.get("version") != cls.VERSION:
+            return cls(path)
+        return cls(path, data.get("entries", {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": self.VERSION, "entries": self.entries}
+        with self.path.open("w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+
+    @staticmethod
+    def fingerprint(path: Path):
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_optimized(self, filepath: str, path: Path) -> bool:
+        try:
+            return self.entries.get(filepath) == self.fingerprint(path)
+        except OSError:
+            return False
+
+    def record(self, filepath: str, path: Path):
+        self.entries[filepath] = self.fingerprint(path)
+
+
+def extracted_pngs(extract_dir: Path) -> List[Tuple[str, Path]]:
+    """Returns the asset filepath and path of each PNG written by extraction."""
+    pngs = {}
+    # Older versions stored some of the same textures as RGBA, so both lists
+    # can name the same PNG. The DDS filepath is what current exes use.
+    for filepath in sorted(DDS_PNGS) + sorted(KNOWN_TEXTURES_V1):
+        path = extract_dir / filepath
+        if filepath in DDS_PNGS:
+            path = path.with_suffix(".png")
+        if path not in pngs and path.exists():
+            pngs[path] = filepath
+    return [(filepath, path) for path, filepath in pngs.items()]
+
+
+def optimize_png(path: Path, compress_level=OPTIMIZED_PNG_COMPRESS_LEVEL):
+    """Re-encode the PNG at `path` if that makes it smaller.
+
+    Returns the md5sums of the file before and after, which are the same if
+    it was left alone.
+    """
+    data = path.read_bytes()
+    old_md5sum = hashlib.md5(data).hexdigest()
+
+    with Image.open(io.BytesIO(data)) as img:
+        new_data = io.BytesIO()
+        img.save(new_data, format="PNG", compress_level=compress_level)
+    new_data = new_data.getvalue()
+    if len(new_data) >= len(data):
+        return old_md5sum, old_md5sum
+
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(new_data)
+    os.replace(tmp_path, path)
+    return old_md5sum, hashlib.md5(new_data).hexdigest()
+
+
+def _optimize_in_worker(path, compress_level):
+    try:
+        return optimize_png(path, compress_level), None
+    except Exception:  # pylint: disable=broad-except
+        return None, "".join(traceback.format_exception(*sys.exc_info())).strip()
+
+
+def _update_md5sum(compressed_dir: Path, filepath: str, old_md5sum, new_md5sum):
+    # The pixels haven't changed, so recompressed assets from extraction are
+    # still valid and only their record of the PNG needs updating.
+    md5sum_path = compressed_dir / f"{filepath}.md5sum"
+    if not md5sum_path.exists():
+        return
+    if md5sum_path.read_text(encoding="utf-8").strip() != old_md5sum:
+        return
+    md5sum_path.write_text(new_md5sum, encoding="utf-8")
+
+
+def optimize_extracted_pngs(
+    extract_dir: Path,
+    compressed_dir: Path,
+    max_workers: Optional[int] = None,
+    worker_pool: WorkerPool = WorkerPool.PROCESS,
+    compress_level=OPTIMIZED_PNG_COMPRESS_LEVEL,
+):
+    """Recompress extracted PNGs that haven't been optimized yet.
+
+    Finished files are recorded in a manifest in `compressed_dir`, which is
+    saved even if the run is interrupted. The extract manifest, .md5sum
+    files and sprite merge cache are updated to match, so optimized files are
+    still seen as unmodified by incremental extraction, merging and packing.
+    """
+    manifest = OptimizeManifest.load(compressed_dir)
+    extract_manifest = ExtractManifest.load(compressed_dir)
+    merge_cache = SpriteMergeCache.load(
+        compressed_dir, FingerprintCache.load(compressed_dir)
+    )
+    pending = [
+        (filepath, path)
+        for filepath, path in extracted_pngs(extract_dir)
+        if not manifest.is_optimized(filepath, path)
+    ]
+    if not pending:
+        logger.info("All extracted PNGs are already optimized")
+        return 0
+
+    logger.info("Optimizing %s extracted PNGs...", len(pending))
+    optimized = 0
+    try:
+        with make_executor(worker_pool, max_workers) as pool:
+            futures = {
+                pool.submit(_optimize_in_worker, path, compress_level): (
+                    filepath,
+                    path,
+                )
+                for filepath, path in pending
+            }
+            for future in as_completed(futures):
+                filepath, path = futures[future]
+                md5sums, error = future.result()
+                if error:
+                    logger.error("Failed to optimize %s: %s", path, error)
+                    continue
+
+                old_md5sum, new_md5sum = md5sums
+                if old_md5sum != new_md5sum:
+                    optimized += 1
+                    _update_md5sum(compressed_dir, filepath, old_md5sum, new_md5sum)
+                    entry = extract_manifest.get(filepath)
+                    if entry is not None:
+                        entry["output_size"] = path.stat().st_size
+                        entry["output_md5"] = new_md5sum
+                        entry["output_fingerprint"] = FingerprintCache.fingerprint(path)
+                    merge_cache.record_rewrite(path, old_md5sum, new_md5sum)
+                manifest.record(filepath, path)
+    finally:
+        manifest.save()
+        if extract_manifest.entries:
+            extract_manifest.save()
+        if merge_cache.rewritten:
+            merge_cache.save()
+    logger.info("Optimized %s of %s PNGs", optimized, len(pending))
+    return optimized
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompress extracted PNGs at the highest compression level."
+    )
+    parser.add_argument("extract_dir", type=Path, help="Path to the Extracted dir.")
+    parser.add_argument(
+        "--compressed-dir",
+        type=Path,
+        default=None,
+        help="Path to the .compressed dir. Default: <extract_dir>/../.compressed/<name>",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of processes. Default: CPU count",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+
+    compressed_dir = args.compressed_dir
+    if compressed_dir is None:
+        compressed_dir = args.extract_dir.parent / ".compressed" / args.extract_dir.name
+    optimize_extracted_pngs(args.extract_dir, compressed_dir, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+The original, straightforward implementations of code that has since been
+optimized. Tests check the fast versions against them and the benchmark CLI
+times them for comparison.
+"""
+
+from PIL import Image
+
+from modlunky2.assets.converters import png_to_dds
+
+# "DDS " magic followed by the 124 byte header.
+DDS_HEADER_SIZE = 128
+
+
+def sxor_bytewise(x, y):
+    """The original byte-at-a-time XOR."""
+    return bytes(a ^ b for a, b in zip(x, y))
+
+
+def chacha_rest_bytewise(data, key):
+    """The original byte-at-a-time keystream application."""
+    out = b""
+    if len(data) >= 0x40:
+        blocks = len(data) // 0x40
+        out += sxor_bytewise(data, key[::-1] * blocks)
+        data = data[blocks * 0x40 :]
+    if len(data) > 0:
+        out += sxor_bytewise(data, key[: len(data)][::-1])
+
+    return out
+
+
+def png_to_dds_pixelwise(img):
+    """The original per-pixel DDS conversion."""
+    img = img.convert("RGBA")
+    header = png_to_dds(Image.new("RGBA", img.size))[:DDS_HEADER_SIZE]
+    return header + bytes(
+        (byte if rgba[3] != 0 else 0) for rgba in img.getdata() for byte in rgba
+    )
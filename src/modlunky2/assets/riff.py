@@ -1,45 +1,91 @@
-# Per PEP 594, the chunk module is deprecated in Python 3.11.
-# It must be replaced by Python 3.12's EoL (ETA Oct 2028)
-from chunk import Chunk  # pylint: disable=deprecated-module
-
-
-class RIFFChunk(Chunk):
-    def __init__(self, f):
-        super().__init__(f, align=True, bigendian=False)
-        self.skip()
-        self.end = self.tell() + self.offset
-        self.seek(0)
-        self.children = None
-        self.type = None
-
-    def populate_children(self):
-        children = []
-        while self.file.tell() < self.end:
-            chunk = RIFFChunk(self.file)
-            if chunk.getname() == b"LIST":
-                chunk.type = chunk.read(4)
-                chunk.populate_children()
-            chunk.seek(0)
-            chunk.skip()
-            children.append(chunk)
-        self.children = children
-
-    def __repr__(self):
-        return "<%s %r with %s children>" % (
-            self.__class__.__name__,
-            self.getname(),
-            "no" if self.children is None else len(self.children),
-        )
-
-
-class RIFF(RIFFChunk):
-    def __init__(self, f):
-        super().__init__(f)
-
-        assert self.getname() == b"RIFF"
-        self.seek(0)
-        self.type = self.read(4)
-        self.populate_children()
-
-    def save(self):
-        pass
+from struct import unpack_from
+from typing import List, NamedTuple, Optional
+
+HEADER_SIZE = 8
+# Chunks with children, their payload starts with a 4 byte form type.
+CONTAINER_NAMES = (b"RIFF", b"LIST")
+
+
+class RIFFEntry(NamedTuple):
+    name: bytes
+    # Offset of the payload in the buffer, after the name and size.
+    offset: int
+    size: int
+    # Index of the parent entry, -1 for the root.
+    parent: int
+    # Form type of RIFF and LIST chunks.
+    type: Optional[bytes] = None
+
+
+class RIFFIndex:
+    """A flat table of the chunks in a RIFF buffer.
+
+    Entries are stored depth first, so the root is entry 0. Payloads are
+    slices of a memoryview over the buffer and aren't copied until read.
+    Call `release` before closing a memory map the index was built from.
+    """
+
+    def __init__(self, buffer):
+        self.view = memoryview(buffer)
+        self.entries: List[RIFFEntry] = []
+        self._parse()
+
+    def _parse(self):
+        name, size = unpack_from("<4sI", self.view, 0)
+        if name != b"RIFF":
+            raise ValueError(f"Expected RIFF header, found {name!r}")
+
+        # Containers still being filled as (entry index, end offset)
+        stack = []
+        pos = 0
+        while True:
+            while stack and pos >= stack[-1][1]:
+                stack.pop()
+            if pos and not stack:
+                break
+            if pos + HEADER_SIZE > len(self.view):
+                raise ValueError(f"Truncated chunk header at 0x{pos:x}")
+
+            name, size = unpack_from("<4sI", self.view, pos)
+            offset = pos + HEADER_SIZE
+            end = offset + size
+            if end > len(self.view):
+                raise ValueError(f"Chunk {name!r} at 0x{pos:x} runs past the end")
+
+            parent = stack[-1][0] if stack else -1
+            if name in CONTAINER_NAMES:
+                self.entries.append(
+                    RIFFEntry(
+                        name,
+                        offset,
+                        size,
+                        parent,
+                        bytes(self.view[offset : offset + 4]),
+                    )
+                )
+                stack.append((len(self.entries) - 1, end))
+                pos = offset + 4
+            else:
+                self.entries.append(RIFFEntry(name, offset, size, parent))
+                # Chunks are padded to an even size
+                pos = end + (size & 1)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index) -> RIFFEntry:
+        return self.entries[index]
+
+    @property
+    def type(self) -> bytes:
+        return self.entries[0].type
+
+    def children(self, index=0) -> List[int]:
+        return [idx for idx, entry in enumerate(self.entries) if entry.parent == index]
+
+    def payload(self, index) -> memoryview:
+        entry = self.entries[index]
+        return self.view[entry.offset : entry.offset + entry.size]
+
+    def release(self):
+        self.view.release()
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+
+from modlunky2.assets.constants import FILENAMES_TO_FILEPATHS, PNG_NAMES_TO_DDS_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+def is_asset_filename(name: str) -> bool:
+    # For DDS_PNGS we need to convert to actual name to test
+    # for validity of files
+    return PNG_NAMES_TO_DDS_NAMES.get(name, name) in FILENAMES_TO_FILEPATHS
+
+
+class ScanIndex:
+    """Caches the listing of directories searched for assets when packing.
+
+    Each directory's entry holds its mtime, the names of its subdirectories
+    and of the files in it that could be assets, and its path resolved
+    relative to `root`. Adding, removing or renaming something in a directory
+    changes its mtime, so an unchanged directory is listed from the index
+    instead of being read again. Every directory is still stat'ed, since a
+    change deep in a tree doesn't change the mtime of its ancestors.
+
+    The index is stored as JSON in `FILENAME` under the directory it's
+    loaded from.
+    """
+
+    FILENAME = "scan-index.json"
+    VERSION = 1
+    # Directories that are never searched for assets.
+    SKIP_DIRS = frozenset([".compressed"])
+    # On filesystems with coarse timestamps a directory can change again
+    # without its mtime changing. Listings taken this soon after a change
+    # aren't trusted.
+    RACY_NS = 2 * 1000 * 1000 * 1000
+
+    def __init__(self, path: Path, root: Path, entries=None):
+        self.path = path
+        self.root = root
+        self.entries = entries or {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = Lock()
+        self._rel_paths: Dict[str, Path] = {}
+
+    @classmethod
+    def load(cls, compressed_dir: Path):
+        """Load the index stored in `compressed_dir`. Paths are resolved
+        relative to its parent, like `DiskAsset.rel_asset_path`."""
+        path = compressed_dir / cls.FILENAME
+        root = compressed_dir.resolve().parent
+        if not path.exists():
+            return cls(path, root)
+
+        try:
+            with path.open("r", encoding="utf-8") as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable scan index %s: %s", path, err)
+            return cls(path, root)
+
+        if data.get("version") != cls.VERSION or data.get("root") != str(root):
+            return cls(path, root)
+        return cls(path, root, data.get("entries", {}))
+
+    def _is_fresh(self, entry, mtime_ns):
+        return (
+            entry is not None
+            and entry["mtime_ns"] == mtime_ns
+            and entry["scanned_ns"] - mtime_ns > self.RACY_NS
+        )
+
+    def _forget_tree(self, key):
+        prefix = os.path.join(key, "")
+        for other in [other for other in self.entries if other.startswith(prefix)]:
+            del self.entries[other]
+
+    def _resolve_rel(self, dir_path: Path) -> Optional[str]:
+        try:
+            return dir_path.resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def list_dir(self, dir_path: Path) -> Optional[Dict]:
+        """The entry for `dir_path`, listing it again if it changed. Returns
+        None if it doesn't exist."""
+        key = str(dir_path)
+        try:
+            mtime_ns = dir_path.stat().st_mtime_ns
+        except OSError:
+            with self._lock:
+                if self.entries.pop(key, None) is not None:
+                    self._forget_tree(key)
+                    self._dirty = True
+            return None
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if self._is_fresh(entry, mtime_ns):
+                self.hits += 1
+                return entry
+
+        scanned_ns = time.time_ns()
+        dirs, files, links = [], [], []
+        with os.scandir(dir_path) as dir_entries:
+            for dir_entry in dir_entries:
+                # Like os.walk, directory symlinks aren't followed.
+                if dir_entry.is_dir():
+                    if not dir_entry.is_symlink() and dir_entry.name not in (
+                        self.SKIP_DIRS
+                    ):
+                        dirs.append(dir_entry.name)
+                    continue
+                if not is_asset_filename(dir_entry.name):
+                    continue
+                files.append(dir_entry.name)
+                if dir_entry.is_symlink():
+                    links.append(dir_entry.name)
+
+        new_entry = {
+            "mtime_ns": mtime_ns,
+            "scanned_ns": scanned_ns,
+            "rel": self._resolve_rel(dir_path),
+            "dirs": sorted(dirs),
+            "files": sorted(files),
+            "links": sorted(links),
+        }
+        with self._lock:
+            self.misses += 1
+            if entry is not None:
+                for removed in set(entry["dirs"]) - set(dirs):
+                    removed_key = str(dir_path / removed)
+                    self.entries.pop(removed_key, None)
+                    self._forget_tree(removed_key)
+            self.entries[key] = new_entry
+            self._dirty = True
+        return new_entry
+
+    def walk(self, top: Path) -> Iterator[Tuple[Path, Dict]]:
+        """Yields each directory under `top` with its entry, top down."""
+        pending = [top]
+        while pending:
+            dir_path = pending.pop()
+            entry = self.list_dir(dir_path)
+            if entry is None:
+                continue
+            yield dir_path, entry
+            pending.extend(dir_path / name for name in reversed(entry["dirs"]))
+
+    def files(self, top: Path) -> Iterator[Path]:
+        """Paths of the files under `top` that could be assets."""
+        for dir_path, entry in self.walk(top):
+            rel = entry["rel"]
+            for name in entry["files"]:
+                path = dir_path / name
+                # Symlinked files resolve elsewhere, so they're left to
+                # DiskAsset to resolve.
+                if rel is not None and name not in entry["links"]:
+                    with self._lock:
+                        self._rel_paths[str(path)] = Path(rel) / name
+                yield path
+
+    def relative_path(self, path: Path) -> Optional[Path]:
+        """The resolved path of a file listed by `files`, relative to `root`,
+        or None if it's outside of `root` or a symlink."""
+        with self._lock:
+            return self._rel_paths.get(str(path))
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": self.VERSION,
+                "root": str(self.root),
+                "entries": self.entries,
+            }
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as index_file:
+            json.dump(data, index_file)
+
+    def invalidate(self):
+        """Forget every listing, forcing all directories to be read again."""
+        with self._lock:
+            self.entries = {}
+            self._rel_paths = {}
+            self._dirty = False
+        if self.path.exists():
+            self.path.unlink()
@@ -1,25 +1,146 @@
 import argparse
+import json
 import logging
+import mmap
+import time
+import zlib
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 import fsb5
 from fsb5.utils import LibraryNotFoundException
 
-from .riff import RIFF
+from .pipeline import WorkerPool, make_executor
+from .riff import RIFFIndex
 
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_FILENAME = ".soundbank-manifest.json"
+# Vorbis samples take a while to rebuild so these are handed out in small
+# batches to keep the workers evenly loaded.
+SAMPLES_PER_TASK = 8
+
 
 class Extension(Enum):
     WAV = "wav"
     OGG = "ogg"
 
 
+def find_fsbs(buffer) -> List[Tuple[int, int]]:
+    """Returns the offset and size of each FSB5 in the soundbank."""
+    riff = RIFFIndex(buffer)
+
+    fsbs = []
+    for child in riff.children()[2:]:
+        chunk = riff[child]
+        # The FSB is aligned to 0x20 within the chunk.
+        start = chunk.offset + 0x20 - chunk.offset % 0x20
+        fsbs.append((start, chunk.offset + chunk.size - start))
+    riff.release()
+    return fsbs
+
+
+def load_fsb(buffer, offset, size) -> fsb5.FSB5:
+    # FSB5 wraps the data in a BytesIO, which copies anything but bytes, so
+    # a memoryview wouldn't save a copy. Slicing the mapping copies just this
+    # FSB, the rest of the bank isn't read in.
+    return fsb5.FSB5(buffer[offset : offset + size])
+
+
+def load_manifest(dest_path: Path) -> Dict[str, Dict]:
+    manifest_path = dest_path / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        with manifest_path.open("r", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError) as err:
+        logger.warning("Ignoring unreadable manifest %s: %s", manifest_path, err)
+        return {}
+
+
+def save_manifest(dest_path: Path, manifest: Dict[str, Dict]):
+    with (dest_path / MANIFEST_FILENAME).open("w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+
+
+def sample_crc32(sample) -> int:
+    return zlib.crc32(sample.data)
+
+
+def is_extracted(out_path: Path, entry: Optional[Dict], crc32: int) -> bool:
+    """Whether `out_path` was written from a sample with this crc32 and hasn't
+    been changed since."""
+    if entry is None or entry.get("crc32") != crc32:
+        return False
+    try:
+        return out_path.stat().st_size == entry.get("size")
+    except FileNotFoundError:
+        return False
+
+
+def rebuild_samples(fsb, sample_indexes, ext_dest_path: Path):
+    """Rebuilds and writes the samples, returning their name, output size and
+    crc32 of the source data."""
+    ext = fsb.get_sample_extension()
+    rebuilt = []
+    for sample_index in sample_indexes:
+        sample = fsb.samples[sample_index]
+        logger.info(
+            "Extracting %s.%s (%sHz, %s channels, %s samples)",
+            sample.name,
+            ext,
+            sample.frequency,
+            sample.channels,
+            sample.samples,
+        )
+        data = fsb.rebuild_sample(sample)
+        with (ext_dest_path / f"{sample.name}.{ext}").open("wb") as out_file:
+            out_file.write(data)
+        rebuilt.append((sample.name, len(data), sample_crc32(sample)))
+    return rebuilt
+
+
+# Each worker process maps the soundbank once and parses the FSBs it's handed
+# from the mapping, instead of having sample data pickled over to it.
+_WORKER_SOUNDBANK = None
+
+
+def _init_soundbank_worker(soundbank_path):
+    global _WORKER_SOUNDBANK  # pylint: disable=global-statement
+    with open(soundbank_path, "rb") as soundbank_file:
+        _WORKER_SOUNDBANK = mmap.mmap(
+            soundbank_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+
+@lru_cache(maxsize=2)
+def _worker_fsb(offset, size):
+    return load_fsb(_WORKER_SOUNDBANK, offset, size)
+
+
+def _rebuild_in_worker(fsb_offset, fsb_size, sample_indexes, ext_dest_path):
+    return rebuild_samples(
+        _worker_fsb(fsb_offset, fsb_size), sample_indexes, ext_dest_path
+    )
+
+
 def extract_soundbank(
-    soundbank_path: Path, dest_path: Path, extract_extensions: Extension = None
+    soundbank_path: Path,
+    dest_path: Path,
+    extract_extensions: Extension = None,
+    max_workers: Optional[int] = None,
+    skip_existing: bool = False,
 ):
+    """Extracts the samples in the soundbank to `dest_path`/<extension>.
+
+    When `max_workers` is more than 1 the samples are rebuilt in a process
+    pool. With `skip_existing`, samples whose output file still has the size
+    written by a previous run from the same sample data aren't rebuilt.
+    """
     if extract_extensions:
         extract_extensions = set(ext.value for ext in extract_extensions)
 
@@ -30,49 +151,116 @@ def extract_soundbank(
         if not ext_dest_path.exists():
             ext_dest_path.mkdir(parents=True, exist_ok=True)
 
-    with soundbank_path.open("rb") as soundbank_file:
-        riff = RIFF(soundbank_file)
+    manifest = load_manifest(dest_path)
+    # Samples of the extensions not extracted now are left as they are, so
+    # their entries are kept.
+    new_manifest = {
+        key: entry
+        for key, entry in manifest.items()
+        if extract_extensions and key.split("/", 1)[0] not in extract_extensions
+    }
+    skipped = 0
+    extracted = 0
 
-        for i in range(len(riff.children) - 2):
-            chunk = riff.children[i + 2]
+    pool = None
+    if max_workers is not None and max_workers > 1:
+        pool = make_executor(
+            WorkerPool.PROCESS,
+            max_workers,
+            initializer=_init_soundbank_worker,
+            initargs=(soundbank_path,),
+        )
 
-            # read the file into a FSB5 object
-            chunk.seek(0)
-            chunk.seek(0x20 - chunk.offset % 0x20)
-            fsb = fsb5.FSB5(chunk.read())
+    start = time.perf_counter()
+    # Tasks are (ext, result or future of rebuild_samples)
+    tasks = []
+    try:
+        with soundbank_path.open("rb") as soundbank_file, mmap.mmap(
+            soundbank_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as soundbank_map:
+            for i, (fsb_offset, fsb_size) in enumerate(find_fsbs(soundbank_map)):
+                fsb = load_fsb(soundbank_map, fsb_offset, fsb_size)
 
-            # from python-fsb5 repo ==
-            # get the extension of samples based off the sound format specified in the header
-            ext = fsb.get_sample_extension()
-            if extract_extensions and ext not in extract_extensions:
-                continue
+                # from python-fsb5 repo ==
+                # get the extension of samples based off the sound format specified in the header
+                ext = fsb.get_sample_extension()
+                if extract_extensions and ext not in extract_extensions:
+                    continue
+
+                pending = []
+                for sample_index, sample in enumerate(fsb.samples):
+                    key = f"{ext}/{sample.name}.{ext}"
+                    entry = manifest.get(key) if skip_existing else None
+                    if is_extracted(dest_path / key, entry, sample_crc32(sample)):
+                        new_manifest[key] = entry
+                        skipped += 1
+                        continue
+                    pending.append(sample_index)
 
-            for sample in fsb.samples:
                 logger.info(
-                    "Extracting %s.%s (%sHz, %s channels, %s samples)",
-                    sample.name,
+                    "Found %s %s files in bank %s, %s to extract",
+                    len(fsb.samples),
                     ext,
-                    sample.frequency,
-                    sample.channels,
-                    sample.samples,
+                    i,
+                    len(pending),
                 )
-                try:
-                    with (dest_path / ext / f"{sample.name}.{ext}").open(
-                        "wb"
-                    ) as out_file:
-                        out_file.write(fsb.rebuild_sample(sample))
-                except LibraryNotFoundException as err:
-                    logger.error(
-                        "Failed to extract files for extension %s: %s", ext, err
-                    )
-                    return
+                for idx in range(0, len(pending), SAMPLES_PER_TASK):
+                    indexes = pending[idx : idx + SAMPLES_PER_TASK]
+                    if pool is None:
+                        result = rebuild_samples(fsb, indexes, dest_path / ext)
+                    else:
+                        result = pool.submit(
+                            _rebuild_in_worker,
+                            fsb_offset,
+                            fsb_size,
+                            indexes,
+                            dest_path / ext,
+                        )
+                    tasks.append((ext, result))
+
+        for ext, result in tasks:
+            if pool is not None:
+                result = result.result()
+            for name, size, crc32 in result:
+                new_manifest[f"{ext}/{name}.{ext}"] = {"size": size, "crc32": crc32}
+                extracted += 1
+    except LibraryNotFoundException as err:
+        logger.error("Failed to extract sound files: %s", err)
+        return
+    finally:
+        if pool is not None:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for _, future in tasks:
+                future.cancel()
+            pool.shutdown()
 
-            logger.info("Extracted %s %s files from bank %s", len(fsb.samples), ext, i)
+    save_manifest(dest_path, new_manifest)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Extracted %s sound files in %.1fs (%.1f samples/sec), skipped %s",
+        extracted,
+        elapsed,
+        extracted / max(elapsed, 1e-9),
+        skipped,
+    )
 
 
 def main():
     parser = argparse.ArgumentParser(description="Extract Spelunky 2 soundbank.")
     parser.add_argument("soundbank", help="Path to soundbank.bank")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Number of processes rebuilding samples. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        default=False,
+        action="store_true",
+        help="Don't rebuild samples that were already extracted from the same data.",
+    )
 
     args = parser.parse_args()
     logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
@@ -81,6 +269,8 @@ def main():
         Path(args.soundbank),
         Path("sound"),
         extract_extensions=[Extension.WAV, Extension.OGG],
+        max_workers=args.max_workers,
+        skip_existing=args.skip_existing,
     )
 
 
@@ -1,21 +1,34 @@
-import zlib
+import argparse
 import logging
+import re
+import zlib
 from pathlib import Path
+from typing import List, Optional
+
+from modlunky2.assets.pipeline import WorkerPool, make_executor
+
+logger = logging.getLogger(__name__)
+
+ENGLISH_STRINGS = "strings00.str"
+STRINGS_FILENAME_RE = re.compile(r"^strings\d+\.str$")
 
 
 class StringHashes:
-    def __init__(self, hashes):
+    def __init__(self, hashes, lines=None):
         # A list of crc32 hashes of the line striped of whitespace.
         # If None the line should be written as is, otherwise the
         # line should be written as `crc_hash: original line of text`.
         self.hashes = hashes
+        # The lines the hashes were made from, if known.
+        self.lines = lines
 
     @classmethod
     def from_data(cls, strings_data):
         hashes = []
         current_comment_section = None
 
-        for line in strings_data.decode().splitlines():
+        lines = strings_data.decode().splitlines()
+        for line in lines:
             if line.startswith("#"):
                 comment_section = line.strip(" #")
                 if comment_section:
@@ -30,24 +43,111 @@ class StringHashes:
 
             hashes.append(string_hash)
 
-        return cls(hashes=hashes)
+        return cls(hashes=hashes, lines=lines)
 
-    def write_string_hashes(self, strings_data, hashed_strings_dest: Path):
+    def hashed_strings(self, strings_data) -> Optional[bytes]:
+        """Returns the hashed version of `strings_data`, or None if it doesn't
+        line up with the strings these hashes were made from."""
         lines = strings_data.decode().splitlines()
         if len(lines) != len(self.hashes):
-            logging.debug("Data for %s has %s lines, expected %s.")
+            return None
+        return self.hash_lines(lines)
+
+    def hash_lines(self, lines) -> bytes:
+        output_lines = [
+            line if string_hash is None else f"{string_hash}: {line}"
+            for string_hash, line in zip(self.hashes, lines)
+        ]
+        output_lines.append("")
+        return "\n".join(output_lines).encode()
+
+    def write_string_hashes(self, strings_data, hashed_strings_dest: Path):
+        hashed_strings = self.hashed_strings(strings_data)
+        if hashed_strings is None:
+            logger.debug(
+                "Data for %s has a different number of lines than expected (%s).",
+                hashed_strings_dest,
+                len(self.hashes),
+            )
             return
 
-        with hashed_strings_dest.open("wb") as hashed_strings_file:
-            for line_num, line in enumerate(lines):
-                if line_num >= len(self.hashes):
-                    hashed_strings_file.write(f"{line}\n".encode())
-                    continue
+        hashed_strings_dest.write_bytes(hashed_strings)
+
+
+def hashed_strings_path(strings_path: Path) -> Path:
+    return strings_path.parent / f"{strings_path.stem}_hashed{strings_path.suffix}"
+
+
+def find_strings_files(extract_dir: Path) -> List[Path]:
+    return sorted(
+        path
+        for path in extract_dir.iterdir()
+        if STRINGS_FILENAME_RE.match(path.name) and path.is_file()
+    )
+
+
+def _write_string_hashes(string_hashes, strings_path):
+    if strings_path.name == ENGLISH_STRINGS and string_hashes.lines is not None:
+        # Already split when generating the hashes
+        hashed_strings = string_hashes.hash_lines(string_hashes.lines)
+        hashed_strings_path(strings_path).write_bytes(hashed_strings)
+        return
+    string_hashes.write_string_hashes(
+        strings_path.read_bytes(), hashed_strings_path(strings_path)
+    )
+
+
+def hash_strings_dir(
+    extract_dir: Path,
+    strings_paths: Optional[List[Path]] = None,
+    max_workers: Optional[int] = None,
+    worker_pool: WorkerPool = WorkerPool.THREAD,
+) -> bool:
+    """Writes a `_hashed` version of each strings file in `extract_dir`.
+
+    The hashes are generated from the english strings once and the language
+    files are then written in parallel. Returns False if the english strings
+    weren't found.
+    """
+    english_strings_path = extract_dir / ENGLISH_STRINGS
+    if not english_strings_path.exists():
+        logger.warning("Didn't find data for english strings in %s", ENGLISH_STRINGS)
+        return False
+
+    string_hashes = StringHashes.from_data(english_strings_path.read_bytes())
+    if strings_paths is None:
+        strings_paths = find_strings_files(extract_dir)
+
+    # Create the hashed string files separately since they all depend on strings00.str
+    with make_executor(worker_pool, max_workers) as pool:
+        for future in [
+            pool.submit(_write_string_hashes, string_hashes, strings_path)
+            for strings_path in strings_paths
+            if strings_path.exists()
+        ]:
+            future.result()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate hashed strings files in an extracted directory."
+    )
+    parser.add_argument(
+        "extract_dir", type=Path, help="Directory containing the strings*.str files."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of workers writing language files. Default: CPU count",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+
+    if not hash_strings_dir(args.extract_dir, max_workers=args.max_workers):
+        raise SystemExit(1)
 
-                string_hash = self.hashes[line_num]
-                if string_hash is None:
-                    output_line = line
-                else:
-                    output_line = f"{string_hash}: {line}"
 
-                hashed_strings_file.write(f"{output_line}\n".encode())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Synthetic game files for tests and benchmarks.
+
+Bundles are built with the same Key, chacha and filepath hashing as the game
+uses, so they can be loaded, extracted and repacked like a real Spel2.exe.
+"""
+
+import math
+import random
+from struct import pack
+from typing import Dict, Iterable, List, Optional
+
+import zstandard as zstd
+from PIL import Image
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.chacha import Key, chacha, hash_filepath
+from modlunky2.assets.constants import DDS_PNGS, KNOWN_FILEPATHS, KNOWN_TEXTURES_V1
+from modlunky2.assets.converters import png_to_dds
+from modlunky2.assets.patcher import (
+    CHECKSUM_PATCH_END,
+    CHECKSUM_PATCH_START,
+    RELEASE_AOB_PRODUCTION,
+)
+
+# The game stores the soundbanks as they are.
+UNENCRYPTED_FILEPATHS = ("soundbank.bank", "soundbank.strings.bank")
+LEVEL_TILE_CODES = "0123456789=-.:!^&#@*|abcdefghijklmnopqrstuvwxyz"
+# The checksum check the Patcher looks for, with a made up call target.
+CHECKSUM_CHECK = (
+    CHECKSUM_PATCH_START + b"\x15\x12\x34\x56\x78" + bytes([CHECKSUM_PATCH_END])
+)
+
+
+def build_synthetic_exe(
+    files: Dict[str, bytes],
+    compression_level=1,
+    unencrypted: Iterable[str] = UNENCRYPTED_FILEPATHS,
+    patch_signatures=False,
+):
+    """Build a minimal exe with a bundle containing `files`.
+
+    Files are compressed and encrypted unless they're in `unencrypted`. With
+    `patch_signatures`, the checksum check and release string the Patcher
+    looks for are placed after the bundle, so finding them means scanning
+    the whole exe.
+    """
+    unencrypted = set(unencrypted)
+    payloads = {
+        filepath: (
+            data
+            if filepath in unencrypted
+            else zstd.ZstdCompressor(level=compression_level).compress(data)
+        )
+        for filepath, data in files.items()
+    }
+
+    key = Key()
+    for payload in payloads.values():
+        key.update(len(payload) + 1)
+
+    exe = bytearray(AssetStore.BUNDLE_OFFSET)
+    for filepath, payload in payloads.items():
+        encrypted = filepath not in unencrypted
+        filepath = filepath.encode()
+        exe += pack("<II", len(payload) + 1, len(filepath))
+        exe += hash_filepath(filepath, key.key)
+        exe += b"\x01" if encrypted else b"\x00"
+        exe += chacha(filepath, payload, key.key) if encrypted else payload
+    exe += pack("<II", 0, 0)
+
+    if patch_signatures:
+        exe += b"\x00" * 0x100 + CHECKSUM_CHECK
+        exe += b"\x00" * 0x100 + RELEASE_AOB_PRODUCTION
+    return bytes(exe)
+
+
+def random_bytes(rng: random.Random, size: int) -> bytes:
+    """Like `rng.randbytes`, which was only added in Python 3.9."""
+    # getrandbits(0) raises before 3.9 as well.
+    if size == 0:
+        return b""
+    return rng.getrandbits(size * 8).to_bytes(size, "little")
+
+
+def random_rgba_image(width, height, seed=0):
+    """An image with random colours where roughly a quarter of pixels are
+    fully transparent but keep their colour."""
+    rng = random.Random(seed)
+    img = Image.frombytes(
+        "RGBA", (width, height), random_bytes(rng, width * height * 4)
+    )
+    alpha = Image.frombytes("L", (width, height), random_bytes(rng, width * height))
+    img.putalpha(alpha.point(lambda a: 0 if a < 64 else a))
+    return img
+
+
+def synthetic_level(rng, rooms=8):
+    """Text shaped roughly like a .lvl file: headers and rows of tile codes."""
+    lines = ["// ------------------------------", "\\?tilecodes"]
+    lines += [f"\\?{code} floor_{rng.randrange(40)} " for code in "abcdefgh"]
+    for room in range(rooms):
+        lines.append(f"\\.setroom{room}-{rng.randrange(4)}")
+        for _ in range(8):
+            lines.append("".join(rng.choice(LEVEL_TILE_CODES) for _ in range(10)))
+    return "\n".join(lines).encode()
+
+
+def synthetic_texture(rng, size):
+    """An opaque RGBA image of about `size` bytes of pixels, made of a few
+    repeated tiles like a sprite sheet."""
+    side = max(int(math.sqrt(size / 4)) // 16 * 16, 16)
+    tiles = [
+        Image.frombytes("RGBA", (16, 16), random_bytes(rng, 16 * 16 * 4))
+        for _ in range(4)
+    ]
+    img = Image.new("RGBA", (side, side))
+    for y in range(0, side, 16):
+        for x in range(0, side, 16):
+            img.paste(rng.choice(tiles), (x, y))
+    img.putalpha(255)
+    return img
+
+
+def synthetic_asset(filepath: str, size: int, rng: random.Random) -> bytes:
+    """Data in the format extraction expects for `filepath`, about `size`
+    bytes long."""
+    if filepath in DDS_PNGS:
+        return png_to_dds(synthetic_texture(rng, size))
+    if filepath in KNOWN_TEXTURES_V1:
+        img = synthetic_texture(rng, size)
+        return pack("<II", img.width, img.height) + img.tobytes()
+    if filepath.endswith((".lvl", ".str")):
+        data = b""
+        while len(data) < size:
+            data += synthetic_level(rng) + b"\n"
+        return data[:size]
+
+    # Repeated blocks with some noise, so it compresses somewhat.
+    block = random_bytes(rng, min(size, 4096))
+    data = bytearray((block * (size // len(block) + 1))[:size])
+    for pos in range(0, size, 64):
+        data[pos] = rng.randrange(256)
+    return bytes(data)
+
+
+def synthetic_files(
+    num_assets: Optional[int] = None,
+    asset_size=4096,
+    sizes: Optional[Dict[str, int]] = None,
+    seed=0,
+    filepaths: Iterable[str] = KNOWN_FILEPATHS,
+) -> Dict[str, bytes]:
+    """Generate assets for the first `num_assets` of `filepaths`.
+
+    Each is about `asset_size` bytes, `sizes` overrides this by file suffix,
+    e.g. `{".DDS": 1024 * 1024}`.
+    """
+    rng = random.Random(seed)
+    sizes = sizes or {}
+    filepaths = list(filepaths)
+    if num_assets is not None:
+        filepaths = filepaths[:num_assets]
+
+    files = {}
+    for filepath in filepaths:
+        suffix = filepath[filepath.rfind(".") :]
+        files[filepath] = synthetic_asset(filepath, sizes.get(suffix, asset_size), rng)
+    return files
+
+
+def build_fsb(samples: List[bytes]):
+    """Build a PCM16 44100Hz mono FSB5 holding `samples`, which need to be
+    multiples of 16 bytes long."""
+    sample_headers = b""
+    data = b""
+    for sample in samples:
+        # Frequency index, data offset in units of 16 bytes and sample count.
+        sample_headers += pack(
+            "<Q", (8 << 1) | ((len(data) // 16) << 6) | ((len(sample) // 2) << 34)
+        )
+        data += sample
+    header = pack(
+        "<4sIIIIII8s16s8s",
+        b"FSB5",
+        1,
+        len(samples),
+        len(sample_headers),
+        0,
+        len(data),
+        2,  # PCM16
+        b"",
+        b"",
+        b"",
+    )
+    return header + sample_headers + data
+
+
+def build_riff_chunk(name, data):
+    return name + pack("<I", len(data)) + data + b"\x00" * (len(data) % 2)
+
+
+def build_synthetic_soundbank(fsbs: List[List[bytes]]):
+    """Build a soundbank with one SND chunk per list of samples in `fsbs`.
+
+    Like the game's bank, the first two chunks of the RIFF aren't sound data
+    and each FSB is aligned to 0x20 within its chunk.
+    """
+    bank = bytearray(b"RIFF\x00\x00\x00\x00FEV ")
+    bank += build_riff_chunk(b"FMT ", b"\x00" * 4)
+    bank += build_riff_chunk(b"LIST", b"PROJ" + build_riff_chunk(b"BNKI", b"\x00" * 6))
+    for samples in fsbs:
+        offset = len(bank) + 8
+        padding = 0x20 - offset % 0x20
+        bank += build_riff_chunk(b"SND ", b"\x00" * padding + build_fsb(samples))
+    bank[4:8] = pack("<I", len(bank) - 8)
+    return bytes(bank)
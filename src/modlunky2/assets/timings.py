@@ -0,0 +1,141 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    count: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+class StageTimer:
+    """Yielded by `PipelineTimings.stage`, set the byte counts on it when
+    they're only known once the stage has run."""
+
+    def __init__(self, bytes_in=0):
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+
+
+class PipelineTimings:
+    """Cumulative time and bytes spent in each stage of extraction or packing.
+
+    Stages are recorded from every worker, so with more than one worker the
+    stage times add up to more than `wall_seconds`. Durations are also kept
+    per asset and stage to find the slowest files.
+    """
+
+    VERSION = 1
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, StageStats] = {}
+        self.assets: Dict[str, Dict[str, float]] = {}
+        self.wall_seconds: Optional[float] = None
+        self._started = time.perf_counter()
+        self._lock = Lock()
+
+    def record(self, stage, seconds, asset=None, bytes_in=0, bytes_out=0):
+        with self._lock:
+            stats = self.stages.setdefault(stage, StageStats())
+            stats.seconds += seconds
+            stats.count += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            if asset is not None:
+                asset_stages = self.assets.setdefault(asset, {})
+                asset_stages[stage] = asset_stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage, asset=None, bytes_in=0):
+        timer = StageTimer(bytes_in)
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.record(
+                stage,
+                time.perf_counter() - start,
+                asset,
+                timer.bytes_in,
+                timer.bytes_out,
+            )
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "version": self.VERSION,
+                "name": self.name,
+                "wall_seconds": self.wall_seconds,
+                "stages": {
+                    stage: asdict(stats) for stage, stats in self.stages.items()
+                },
+                "assets": {
+                    asset: dict(stages) for asset, stages in self.assets.items()
+                },
+            }
+
+    def merge(self, data: Dict):
+        """Add the stages from `to_dict` of timings recorded elsewhere, e.g. in
+        a worker process."""
+        with self._lock:
+            for stage, other in data["stages"].items():
+                stats = self.stages.setdefault(stage, StageStats())
+                stats.seconds += other["seconds"]
+                stats.count += other["count"]
+                stats.bytes_in += other["bytes_in"]
+                stats.bytes_out += other["bytes_out"]
+            for asset, stages in data["assets"].items():
+                asset_stages = self.assets.setdefault(asset, {})
+                for stage, seconds in stages.items():
+                    asset_stages[stage] = asset_stages.get(stage, 0.0) + seconds
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as timings_file:
+            json.dump(self.to_dict(), timings_file, indent=1, sort_keys=True)
+
+    def summary_rows(self) -> List[Tuple[str, float, int, int, int]]:
+        """Rows of stage, seconds, count, bytes in and bytes out, slowest
+        stage first."""
+        with self._lock:
+            rows = [
+                (stage, stats.seconds, stats.count, stats.bytes_in, stats.bytes_out)
+                for stage, stats in self.stages.items()
+            ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def slowest_assets(self, count=10) -> List[Tuple[str, float]]:
+        with self._lock:
+            totals = [
+                (asset, sum(stages.values())) for asset, stages in self.assets.items()
+            ]
+        return sorted(totals, key=lambda total: total[1], reverse=True)[:count]
+
+    def log_summary(self):
+        if self.wall_seconds is not None:
+            logger.info("%s took %.2fs", self.name.capitalize(), self.wall_seconds)
+        for stage, seconds, count, bytes_in, bytes_out in self.summary_rows():
+            logger.info(
+                "  %-14s %8.2fs %6s items %10.1f MB in %10.1f MB out",
+                stage,
+                seconds,
+                count,
+                bytes_in / (1024 * 1024),
+                bytes_out / (1024 * 1024),
+            )
+        for asset, seconds in self.slowest_assets(5):
+            logger.debug("  Slow asset %s: %.2fs", asset, seconds)
@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Optional, Type
+from typing import Dict, List, Optional, Type
 
 from PIL import Image
 
 from modlunky2.sprites.base_classes.base_deco_sheet import AbstractDecoSheet
 from modlunky2.sprites.base_classes.base_floor_sheet import AbstractFloorSheet
+from modlunky2.sprites.base_classes.base_sprite_loader import BaseSpriteLoader
 
 DEFAULT_BASE_PATH = Path(
     r"C:\Program Files (x86)\Steam\steamapps\common\Spelunky 2\Mods\Extracted"
@@ -50,6 +51,10 @@ class AbstractBiome(ABC):
     def bg(self) -> Image.Image:
         return self._bg
 
+    @property
+    def sprite_loaders(self) -> List[BaseSpriteLoader]:
+        return [self._floor_sheet, self._floorstyled_sheet, self._deco_sheet]
+
     def __init__(self, base_path: Path = DEFAULT_BASE_PATH):
         self.base_path = base_path
         self._floor_sheet = self._floor_sheet_class(base_path)
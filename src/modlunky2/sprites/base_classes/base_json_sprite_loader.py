@@ -1,8 +1,8 @@
 from abc import abstractmethod
-from typing import List
+from typing import List, Optional
 
 from modlunky2.sprites.base_classes.base_sprite_loader import BaseSpriteLoader
-from modlunky2.sprites.util import chunks_from_json
+from modlunky2.sprites.entity_chunks import EntityChunkManifest
 
 
 class BaseJsonSpriteLoader(BaseSpriteLoader):
@@ -13,13 +13,11 @@ class BaseJsonSpriteLoader(BaseSpriteLoader):
         Define names of entities that should additionally be added to the _chunk_map
         """
 
-    def __init__(self, entities_json, textures_json, *args, **kwargs):
+    def __init__(self, entity_chunks: Optional[EntityChunkManifest], *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        if entities_json and textures_json:
+        if entity_chunks is not None:
             for entity_name in self._entity_names:
                 self._chunk_map.update(
-                    chunks_from_json(
-                        entities_json, textures_json, entity_name, self._chunk_size
-                    )
+                    entity_chunks.chunks(entity_name, self._chunk_size)
                 )
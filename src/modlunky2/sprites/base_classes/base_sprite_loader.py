@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from functools import wraps
+from collections import OrderedDict
 from pathlib import Path
 from typing import Callable, Dict, Optional, Union
 from threading import Lock
@@ -12,30 +12,28 @@ _DEFAULT_BASE_PATH = Path(
     r"C:\Program Files (x86)\Steam\steamapps\common\Spelunky 2\Mods\Extracted"
 )
 
+# Crops of a name that isn't in the chunk map are cached as this.
 _CACHED_NONE_SENTINEL = object()
-_CACHE_LOCK = Lock()
-
-
-def _cache_img_not_class(func):
-    """using this because functools.lrucache will keep the class object from getting
-    GCed if you are using it on a method"""
-
-    # noinspection PyProtectedMember
-    @wraps(func)
-    def cache_img(slf, name: str):
-        with _CACHE_LOCK:
-            img = slf._cache_dict.get(name)  # pylint: disable=protected-access
-            if not img:
-                img = func(slf, name) or _CACHED_NONE_SENTINEL
-                slf._cache_dict[name] = img  # pylint: disable=protected-access
-            if img is _CACHED_NONE_SENTINEL:
-                return None
-            return img
 
-    return cache_img
+# Default bound on the pixel bytes of the crops each loader keeps.
+DEFAULT_CROP_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def image_bytes(image: Image.Image) -> int:
+    """Rough size of an image's decoded pixels."""
+    return image.width * image.height * len(image.getbands())
 
 
 class BaseSpriteLoader(ABC):
+    """Reads named chunks out of a sprite sheet.
+
+    The sheet isn't opened until the first `get`, so loaders are cheap to
+    make up front. Crops are kept in a per-loader LRU cache holding at most
+    `crop_cache_bytes` of pixels.
+    """
+
+    crop_cache_bytes = DEFAULT_CROP_CACHE_BYTES
+
     @property
     @abstractmethod
     def _sprite_sheet_path(self) -> Path:
@@ -62,10 +60,48 @@ class BaseSpriteLoader(ABC):
 
     def __init__(self, base_path: Path = _DEFAULT_BASE_PATH):
         self.base_path = base_path
-        self._sprite_sheet = Image.open(self.base_path / self._sprite_sheet_path)
-        # This is to support the caching decorator and let it use storage on this class
-        # otherwise we get doofy global dicts for caching
-        self._cache_dict = {}
+        self._sheet: Optional[Image.Image] = None
+        # Whether the sheet was opened by this loader, rather than passed to
+        # `use_sheet`, and so is closed by it.
+        self._owns_sheet = False
+        # Guards the sheet, the crop cache and the stats. Each loader has its
+        # own so that loaders can be read from different threads at once.
+        self._lock = Lock()
+        # Not functools.lru_cache, which would keep the loader from being GCed
+        self._crop_cache: "OrderedDict[str, object]" = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def sprite_sheet_path(self) -> Path:
+        return self.base_path / self._sprite_sheet_path
+
+    @property
+    def sheet_loaded(self) -> bool:
+        return self._sheet is not None
+
+    @property
+    def _sprite_sheet(self) -> Image.Image:
+        """The decoded sheet, read the first time it's needed."""
+        if self._sheet is None:
+            sheet = Image.open(self.sprite_sheet_path)
+            sheet.load()
+            self._sheet = sheet
+            self._owns_sheet = True
+        return self._sheet
+
+    def use_sheet(self, sheet: Image.Image):
+        """Crop from `sheet`, already decoded elsewhere, instead of reading the
+        sheet from disk.
+
+        The caller still owns `sheet`, the loader never closes it.
+        """
+        with self._lock:
+            self._close_sheet()
+            self._sheet = sheet
+            self._crop_cache.clear()
+            self._cached_bytes = 0
 
     def _get_block(
         self,
@@ -78,12 +114,57 @@ class BaseSpriteLoader(ABC):
         bbox = tuple(map(lambda x: x * self._chunk_size, (left, upper, right, lower)))
         return self._sprite_sheet.crop(bbox)
 
-    @_cache_img_not_class
+    def _cache_crop(self, name: str, img: Optional[Image.Image]):
+        size = 0 if img is None else image_bytes(img)
+        if size > self.crop_cache_bytes:
+            return
+        self._crop_cache[name] = _CACHED_NONE_SENTINEL if img is None else img
+        self._cached_bytes += size
+        while self._cached_bytes > self.crop_cache_bytes:
+            _, evicted = self._crop_cache.popitem(last=False)
+            if evicted is not _CACHED_NONE_SENTINEL:
+                self._cached_bytes -= image_bytes(evicted)
+
     def get(self, name: str) -> Optional[Image.Image]:
-        coords = self._chunk_map.get(name)
-        if coords:
-            return self._get_block(*coords)
-        return None
+        with self._lock:
+            img = self._crop_cache.get(name)
+            if img is not None:
+                self.hits += 1
+                self._crop_cache.move_to_end(name)
+                return None if img is _CACHED_NONE_SENTINEL else img
+
+            self.misses += 1
+            img = None
+            coords = self._chunk_map.get(name)
+            if coords:
+                img = self._get_block(*coords)
+            self._cache_crop(name, img)
+            return img
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counts and memory use of the sheet and crop cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_crops": len(self._crop_cache),
+                "cached_bytes": self._cached_bytes,
+                "sheet_bytes": 0 if self._sheet is None else image_bytes(self._sheet),
+            }
+
+    def _close_sheet(self):
+        if self._sheet is not None and self._owns_sheet:
+            self._sheet.close()
+        self._sheet = None
+        self._owns_sheet = False
+
+    def clear_cache(self):
+        """Drop cached crops and the decoded sheet, they're read again on the
+        next `get`. A sheet passed to `use_sheet` is dropped but not closed."""
+        with self._lock:
+            self._crop_cache.clear()
+            self._cached_bytes = 0
+            self._close_sheet()
 
     def key_map(self) -> Dict[str, Callable]:
         return {k: self.get for k in self._chunk_map}
@@ -1,6 +1,8 @@
+import hashlib
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Type, Tuple
+from typing import Callable, Dict, List, Type, Tuple, Union
 from logging import getLogger
 from PIL import Image, ImageDraw, ImageFont
 
@@ -16,6 +18,64 @@ _DEFAULT_BASE_PATH = Path(
 
 logger = getLogger("modlunky2")
 
+SpriteLoaderIndex = Dict[Type[BaseSpriteLoader], BaseSpriteLoader]
+# Room left around text hints for glyphs that reach outside their bbox.
+_TEXT_HINT_MARGIN = 8
+
+
+def index_sprite_loaders(sprite_loaders: List[BaseSpriteLoader]) -> SpriteLoaderIndex:
+    """Maps each loader's type, and every type it derives from, to the first
+    loader in `sprite_loaders` that is an instance of it."""
+    index = {}
+    for sprite_loader in sprite_loaders:
+        for sprite_loader_type in type(sprite_loader).__mro__:
+            index.setdefault(sprite_loader_type, sprite_loader)
+    return index
+
+
+@lru_cache(maxsize=None)
+def _hint_font():
+    try:
+        return ImageFont.truetype("C:/Windows/Fonts/arial.ttf", size=25)
+    except OSError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def _text_hint_image(text_hint: str) -> Image.Image:
+    """The lines of `text_hint` right aligned, to be placed in the bottom
+    right corner of a sheet."""
+    font = _hint_font()
+    lines = text_hint.splitlines()
+    lines.reverse()
+    line_boxes = [font.getbbox(line) for line in lines]
+    width = max(right - left for left, _, right, _ in line_boxes)
+    height = sum(bottom - top for _, top, _, bottom in line_boxes)
+
+    image = Image.new(
+        mode="RGBA",
+        size=(width + _TEXT_HINT_MARGIN, height + _TEXT_HINT_MARGIN),
+        color=(0, 0, 0, 0),
+    )
+    image_draw = ImageDraw.Draw(image)
+    current_height = 0
+    for line, (line_left, line_top, line_right, line_bottom) in zip(lines, line_boxes):
+        current_height += line_bottom - line_top
+        image_draw.text(
+            (image.width - (line_right - line_left), image.height - current_height),
+            line,
+            font=font,
+        )
+    return image
+
+
+def _put_text_hint(image: Image.Image, text_hint: str):
+    text_image = _text_hint_image(text_hint)
+    image.paste(
+        text_image,
+        (image.width - text_image.width, image.height - text_image.height),
+    )
+
 
 class BaseSpriteMerger(ABC):
     @property
@@ -91,32 +151,15 @@ class BaseSpriteMerger(ABC):
             self._grid_image = self._sprite_sheet
         self._grid_image_draw = ImageDraw.Draw(self._grid_image)
 
-        def draw_text_hint(text_hint: str):
-            try:
-                default_font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", size=25)
-            except OSError:
-                default_font = ImageFont.load_default()
-            lines = text_hint.splitlines()
-            lines.reverse()
-            current_height = 0
-            for line in lines:
-                line_left, line_top, line_right, line_bottom = default_font.getbbox(
-                    line
-                )
-                line_width = line_right - line_left
-                current_height += line_bottom - line_top
-                self._grid_image_draw.text(
-                    (image_size[0] - line_width, image_size[1] - current_height),
-                    line,
-                    font=default_font,
-                )
-
         if self._separate_grid_file:
-            draw_text_hint(
-                "You may overlap the guides.\nDo not go outsides the guides though!"
+            _put_text_hint(
+                self._grid_image,
+                "You may overlap the guides.\nDo not go outsides the guides though!",
             )
         else:
-            draw_text_hint("Stay within the guides!\nDo not overlap the guides!")
+            _put_text_hint(
+                self._grid_image, "Stay within the guides!\nDo not overlap the guides!"
+            )
 
     def _get_real_chunk_size(self, chunk_size: int) -> int:
         if self._separate_grid_file:
@@ -182,16 +225,93 @@ class BaseSpriteMerger(ABC):
         bbox = (left, upper, right, lower)
         self._sprite_sheet.paste(image, bbox)
 
-    def do_merge(self, sprite_loaders: List[BaseSpriteLoader]) -> Image:
+    def sprite_loaders_needed(
+        self, sprite_loaders: Union[List[BaseSpriteLoader], SpriteLoaderIndex]
+    ) -> List[BaseSpriteLoader]:
+        """The loaders in `sprite_loaders` that this merges sheets from."""
+        if not isinstance(sprite_loaders, dict):
+            sprite_loaders = index_sprite_loaders(sprite_loaders)
+        needed = []
+        for sprite_loader_type in self._origin_map:
+            sprite_loader = sprite_loaders.get(sprite_loader_type)
+            if sprite_loader is not None:
+                needed.append(sprite_loader)
+        return needed
+
+    def merger_spec(self) -> Tuple:
+        """What's needed to make this merger again, e.g. in another process,
+        see `merger_from_spec`. Mergers can't be sent by class since some are
+        made by factories and can't be pickled."""
+        return (
+            type(self).__name__,
+            self._target_sprite_sheet_path,
+            self._grid_hint_size,
+            self._origin_map,
+            self.base_path,
+            self._separate_grid_file,
+        )
+
+    @property
+    def output_paths(self) -> List[Path]:
+        if self._separate_grid_file:
+            return [self._full_path, self._grid_file_path]
+        return [self._full_path]
+
+    @property
+    def _grid_file_path(self) -> Path:
+        return self._full_path.with_name(
+            f"{self._full_path.stem}_grid{self._full_path.suffix}"
+        )
+
+    def merge_key(
+        self,
+        sprite_loaders: Union[List[BaseSpriteLoader], SpriteLoaderIndex],
+        md5sum: Callable[[Path], bytes],
+    ) -> str:
+        """A digest of everything the merged sheet is made from.
+
+        That's the contents of each source sheet, hashed with `md5sum`, the
+        chunks taken from it and where they're placed.
+        """
+        if not isinstance(sprite_loaders, dict):
+            sprite_loaders = index_sprite_loaders(sprite_loaders)
+        key = hashlib.sha256()
+        key.update(
+            repr(
+                (
+                    str(self._target_sprite_sheet_path),
+                    self._grid_hint_size,
+                    self._separate_grid_file,
+                    self._grid_colors,
+                )
+            ).encode()
+        )
+        for sprite_loader_type, chunk_maps in self._origin_map.items():
+            key.update(repr((sprite_loader_type.__name__, chunk_maps)).encode())
+            sprite_loader = sprite_loaders.get(sprite_loader_type)
+            if sprite_loader is None:
+                key.update(b"missing")
+                continue
+            # pylint: disable=protected-access
+            key.update(
+                repr((sprite_loader._chunk_size, sprite_loader._chunk_map)).encode()
+            )
+            key.update(md5sum(sprite_loader.sprite_sheet_path))
+        return key.hexdigest()
+
+    def do_merge(
+        self, sprite_loaders: Union[List[BaseSpriteLoader], SpriteLoaderIndex]
+    ) -> Image:
+        """Merge the sheet from `sprite_loaders`. When merging several sheets
+        from the same loaders, pass them indexed by `index_sprite_loaders`."""
         logger.info("Merging sprites for sheet %s", self.stem)
+        if not isinstance(sprite_loaders, dict):
+            sprite_loaders = index_sprite_loaders(sprite_loaders)
 
         height_offset = 0
         for sprite_loader_type, chunk_maps in self._origin_map.items():
-            matching_sprite_loaders = [
-                x for x in sprite_loaders if isinstance(x, sprite_loader_type)
-            ]
-            if matching_sprite_loaders:
-                sprite_loader = matching_sprite_loaders[0]
+            sprite_loader = sprite_loaders.get(sprite_loader_type)
+            if sprite_loader is not None:
                 chunk_size = (
                     sprite_loader_type._chunk_size  # pylint: disable=protected-access
                 )
@@ -230,7 +350,30 @@ class BaseSpriteMerger(ABC):
             self._full_path.parent.mkdir(parents=True, exist_ok=True)
         self._sprite_sheet.save(self._full_path)
         if self._separate_grid_file:
-            grid_file_path = (
-                f"{self._full_path.with_suffix('')}_grid{self._full_path.suffix}"
-            )
-            self._grid_image.save(grid_file_path)
+            self._grid_image.save(self._grid_file_path)
+
+
+def merger_from_spec(merger_spec: Tuple) -> BaseSpriteMerger:
+    """Make a merger like the one `merger_spec` came from.
+
+    Its origin map already holds the chunks of any json entities, so it's made
+    as a plain `BaseSpriteMerger`.
+    """
+    (
+        name,
+        target_sprite_sheet_path,
+        grid_hint_size,
+        origin_map,
+        base_path,
+        separate_grid_file,
+    ) = merger_spec
+    sprite_merger_type = type(
+        name,
+        (BaseSpriteMerger,),
+        {
+            "_target_sprite_sheet_path": target_sprite_sheet_path,
+            "_grid_hint_size": grid_hint_size,
+            "_origin_map": origin_map,
+        },
+    )
+    return sprite_merger_type(base_path, separate_grid_file)
@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from modlunky2.assets.hashing import md5sum_path
+from modlunky2.constants import BASE_DIR
+from modlunky2.sprites.base_classes.types import chunk_map_type
+from modlunky2.sprites.util import (
+    AnimationFrames,
+    TextureLayout,
+    chunks_from_frames,
+    entity_animation_frames,
+    target_chunks_from_chunks,
+    texture_layout,
+)
+
+logger = logging.getLogger(__name__)
+
+GAME_DATA_DIR = BASE_DIR / "static/game_data"
+ENTITIES_FILENAME = "entities.json"
+TEXTURES_FILENAME = "textures.json"
+
+
+class EntityChunkManifest:
+    """The animation frames of every entity in entities.json and the layout of
+    the textures they're drawn from.
+
+    That's all `chunks_from_json` reads from the two files, so chunk maps can
+    be made from this without parsing them. The manifest is compiled ahead of
+    time into `FILENAME` next to the json, see `main`, and records a digest of
+    the json it was compiled from. `load` compiles it again if the json
+    changed since.
+    """
+
+    FILENAME = "entity_chunks.json"
+    # Bump when the compiled form changes.
+    VERSION = 1
+
+    def __init__(
+        self,
+        source_digest: Optional[str],
+        textures: Dict[str, TextureLayout],
+        entities: Dict[str, Tuple[str, AnimationFrames]],
+    ):
+        self.source_digest = source_digest
+        self.textures = textures
+        self.entities = entities
+
+    @staticmethod
+    def digest_sources(game_data_dir: Path) -> str:
+        digest = hashlib.md5()
+        for filename in (ENTITIES_FILENAME, TEXTURES_FILENAME):
+            digest.update(md5sum_path(game_data_dir / filename))
+        return digest.hexdigest()
+
+    @classmethod
+    def compile(
+        cls, entities_json: dict, textures_json: dict, source_digest=None
+    ) -> "EntityChunkManifest":
+        textures = {
+            texture_id: texture_layout(texture_data)
+            for texture_id, texture_data in textures_json.items()
+        }
+        entities = {}
+        for entity_name, entity_data in entities_json.items():
+            texture_id = str(entity_data["texture"])
+            frames = []
+            if texture_id in textures:
+                frames = entity_animation_frames(entity_data, textures[texture_id][0])
+            entities[entity_name] = (texture_id, frames)
+        return cls(source_digest, textures, entities)
+
+    @classmethod
+    def compile_dir(cls, game_data_dir: Path = GAME_DATA_DIR) -> "EntityChunkManifest":
+        source_digest = cls.digest_sources(game_data_dir)
+        with (game_data_dir / ENTITIES_FILENAME).open("r", encoding="utf-8") as file_:
+            entities_json = json.load(file_)
+        with (game_data_dir / TEXTURES_FILENAME).open("r", encoding="utf-8") as file_:
+            textures_json = json.load(file_)
+        return cls.compile(entities_json, textures_json, source_digest)
+
+    @classmethod
+    def read(cls, path: Path) -> Optional["EntityChunkManifest"]:
+        try:
+            with path.open("r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError) as err:
+            logger.debug("Ignoring unreadable entity chunks %s: %s", path, err)
+            return None
+
+        if data.get("version") != cls.VERSION:
+            return None
+        return cls(data["source_digest"], data["textures"], data["entities"])
+
+    @classmethod
+    def load(cls, game_data_dir: Path = GAME_DATA_DIR) -> "EntityChunkManifest":
+        """The manifest of the json in `game_data_dir`, compiling it again if
+        the json changed since it was saved."""
+        path = game_data_dir / cls.FILENAME
+        manifest = cls.read(path)
+        source_digest = cls.digest_sources(game_data_dir)
+        if manifest is not None and manifest.source_digest == source_digest:
+            return manifest
+
+        logger.info("Compiling %s", path)
+        manifest = cls.compile_dir(game_data_dir)
+        try:
+            manifest.save(path)
+        except OSError as err:
+            # e.g. installed somewhere read-only, it's compiled every run then.
+            logger.warning("Failed to save %s: %s", path, err)
+        return manifest
+
+    def save(self, path: Path):
+        data = {
+            "version": self.VERSION,
+            "source_digest": self.source_digest,
+            "textures": self.textures,
+            "entities": self.entities,
+        }
+        with path.open("w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file, separators=(",", ":"), sort_keys=True)
+
+    def chunks(self, entity_name: str, chunk_size: int) -> chunk_map_type:
+        """Like `chunks_from_json`."""
+        entity = self.entities.get(entity_name)
+        if entity is None:
+            logger.error(
+                "Failed generating chunks for entity '%s': Could not find entity in entities.json",
+                entity_name,
+            )
+            return {}
+
+        texture_id, frames = entity
+        layout = self.textures.get(texture_id)
+        if layout is None:
+            logger.error(
+                "Failed generating chunks for entity '%s': Could not find texture %s in textures.json",
+                entity_name,
+                texture_id,
+            )
+            return {}
+        return chunks_from_frames(entity_name, layout, frames, chunk_size)
+
+    def target_chunks(self, entity_name: str, chunk_size: int) -> chunk_map_type:
+        """Like `target_chunks_from_json`."""
+        return target_chunks_from_chunks(self.chunks(entity_name, chunk_size))
+
+
+_LOADED_MANIFESTS: Dict[Path, EntityChunkManifest] = {}
+_LOAD_LOCK = Lock()
+
+
+def load_entity_chunks(game_data_dir: Path = GAME_DATA_DIR) -> EntityChunkManifest:
+    """`EntityChunkManifest.load`, kept for the rest of the process."""
+    with _LOAD_LOCK:
+        manifest = _LOADED_MANIFESTS.get(game_data_dir)
+        if manifest is None:
+            manifest = EntityChunkManifest.load(game_data_dir)
+            _LOADED_MANIFESTS[game_data_dir] = manifest
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compile the entity chunk manifest from entities.json and textures.json."
+        )
+    )
+    parser.add_argument(
+        "game_data_dir",
+        type=Path,
+        nargs="?",
+        default=GAME_DATA_DIR,
+        help="Directory with entities.json and textures.json",
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+
+    manifest = EntityChunkManifest.compile_dir(args.game_data_dir)
+    path = args.game_data_dir / EntityChunkManifest.FILENAME
+    manifest.save(path)
+    logger.info(
+        "Compiled %s entities and %s textures to %s",
+        len(manifest.entities),
+        len(manifest.textures),
+        path,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+from modlunky2.assets.hashing import FingerprintCache, md5sum_path
+from modlunky2.sprites.base_classes.base_sprite_loader import BaseSpriteLoader
+from modlunky2.sprites.base_classes.base_sprite_merger import (
+    BaseSpriteMerger,
+    SpriteLoaderIndex,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SpriteMergeCache:
+    """Records what each merged sprite sheet was made from.
+
+    Entries are keyed by the merged sheet's path and hold its
+    `BaseSpriteMerger.merge_key`, a digest of the source sheets and chunk
+    maps, and the size and mtime of every file it wrote. A merge whose key
+    and outputs are unchanged doesn't need running again.
+
+    Source sheets that were rewritten with the same pixels, see
+    `record_rewrite`, keep hashing as they were before.
+    """
+
+    FILENAME = "sprite-merge-cache.json"
+    # Bump when a change to merging would give different sheets from the
+    # same sources.
+    VERSION = 2
+
+    def __init__(
+        self,
+        path: Path,
+        entries: Optional[Dict[str, Dict]] = None,
+        fingerprint_cache: Optional[FingerprintCache] = None,
+        rewritten: Optional[Dict[str, Dict[str, str]]] = None,
+    ):
+        self.path = path
+        self.entries = entries or {}
+        self.fingerprint_cache = fingerprint_cache
+        self.rewritten = rewritten or {}
+        self.reused: List[str] = []
+        self.merged: List[str] = []
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, cache_dir: Path, fingerprint_cache=None):
+        path = cache_dir / cls.FILENAME
+        if not path.exists():
+            return cls(path, fingerprint_cache=fingerprint_cache)
+
+        try:
+            with path.open("r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable sprite merge cache %s: %s", path, err)
+            return cls(path, fingerprint_cache=fingerprint_cache)
+
+        if data.get("version") != cls.VERSION:
+            return cls(path, fingerprint_cache=fingerprint_cache)
+        return cls(
+            path,
+            data.get("entries", {}),
+            fingerprint_cache,
+            data.get("rewritten", {}),
+        )
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {
+                "version": self.VERSION,
+                "entries": self.entries,
+                "rewritten": self.rewritten,
+            }
+        with self.path.open("w", encoding="utf-8") as cache_file:
+            json.dump(data, cache_file, indent=1, sort_keys=True)
+        if self.fingerprint_cache is not None:
+            self.fingerprint_cache.save()
+
+    def _md5sum(self, path: Path) -> bytes:
+        if self.fingerprint_cache is not None:
+            md5sum = self.fingerprint_cache.md5sum(path)
+        else:
+            md5sum = md5sum_path(path)
+        with self._lock:
+            rewrite = self.rewritten.get(str(path))
+        if rewrite is not None and rewrite["md5sum"] == md5sum.decode():
+            return rewrite["source_md5sum"].encode()
+        return md5sum
+
+    def record_rewrite(self, path: Path, old_md5sum: str, new_md5sum: str):
+        """Record that the source sheet at `path` was rewritten without
+        changing its pixels, so sheets merged from it stay current."""
+        with self._lock:
+            previous = self.rewritten.get(str(path))
+            if previous is not None and previous["md5sum"] == old_md5sum:
+                old_md5sum = previous["source_md5sum"]
+            self.rewritten[str(path)] = {
+                "md5sum": new_md5sum,
+                "source_md5sum": old_md5sum,
+            }
+        if self.fingerprint_cache is not None:
+            self.fingerprint_cache.record(path, new_md5sum.encode())
+
+    @staticmethod
+    def _outputs(sprite_merger: BaseSpriteMerger) -> Dict[str, List[int]]:
+        outputs = {}
+        for path in sprite_merger.output_paths:
+            stat = path.stat()
+            outputs[str(path)] = [stat.st_size, stat.st_mtime_ns]
+        return outputs
+
+    def merge_key(
+        self,
+        sprite_merger: BaseSpriteMerger,
+        sprite_loaders: Union[List[BaseSpriteLoader], SpriteLoaderIndex],
+    ) -> str:
+        return sprite_merger.merge_key(sprite_loaders, self._md5sum)
+
+    def is_current(self, sprite_merger: BaseSpriteMerger, merge_key: str) -> bool:
+        """Whether the merged sheet on disk was made from `merge_key` and
+        hasn't been touched since."""
+        with self._lock:
+            entry = self.entries.get(str(sprite_merger.output_paths[0]))
+        if entry is None or entry.get("merge_key") != merge_key:
+            return False
+        try:
+            return entry.get("outputs") == self._outputs(sprite_merger)
+        except OSError:
+            return False
+
+    def record(self, sprite_merger: BaseSpriteMerger, merge_key: str, reused: bool):
+        """Record the sheet as made from `merge_key`, either by merging it or
+        because it was already current."""
+        entry = {"merge_key": merge_key, "outputs": self._outputs(sprite_merger)}
+        with self._lock:
+            self.entries[str(sprite_merger.output_paths[0])] = entry
+            if reused:
+                self.reused.append(sprite_merger.stem)
+            else:
+                self.merged.append(sprite_merger.stem)
+
+    def log_summary(self):
+        logger.info(
+            "Reused %s merged sprite sheets, merged %s",
+            len(self.reused),
+            len(self.merged),
+        )
@@ -0,0 +1,98 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Maps the path of each sheet to the name of its shared memory block and the
+# sheet's size.
+SheetDescriptors = Dict[str, Tuple[str, Tuple[int, int]]]
+
+
+class SharedSheets:
+    """Source sprite sheets decoded once, as raw RGBA, into shared memory.
+
+    Worker processes `attach_shared_sheets` to crop from the blocks instead of
+    each decoding the same PNGs again. The blocks are freed by `close`, so
+    this must outlive the workers using it.
+    """
+
+    def __init__(self):
+        self._blocks: Dict[str, SharedMemory] = {}
+        self._sizes: Dict[str, Tuple[int, int]] = {}
+        self._lock = Lock()
+
+    def _share(self, path: Path):
+        try:
+            with Image.open(path) as sheet:
+                sheet = sheet.convert("RGBA")
+        except OSError as err:
+            # Left for the workers to report, like any other missing sheet.
+            logger.debug("Not sharing sprite sheet %s: %s", path, err)
+            return
+
+        data = sheet.tobytes()
+        block = SharedMemory(create=True, size=len(data))
+        block.buf[: len(data)] = data
+        with self._lock:
+            self._blocks[str(path)] = block
+            self._sizes[str(path)] = sheet.size
+
+    @classmethod
+    def create(cls, paths: Iterable[Path], max_workers: Optional[int] = None):
+        """Decode the sheets at `paths`. PIL releases the GIL while decoding,
+        so this is done on threads."""
+        shared_sheets = cls()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(shared_sheets._share, set(paths)))
+        except BaseException:
+            shared_sheets.close()
+            raise
+        return shared_sheets
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks.values())
+
+    def descriptors(self) -> SheetDescriptors:
+        return {
+            path: (block.name, self._sizes[path])
+            for path, block in self._blocks.items()
+        }
+
+    def close(self):
+        with self._lock:
+            blocks, self._blocks = self._blocks, {}
+            self._sizes = {}
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_shared_sheets(
+    descriptors: SheetDescriptors,
+) -> Tuple[List[SharedMemory], Dict[str, Image.Image]]:
+    """Images backed by the blocks of a `SharedSheets`, keyed by path.
+
+    The images don't copy the pixels, so the returned blocks must be kept
+    open for as long as the images are used.
+    """
+    blocks = []
+    sheets = {}
+    for path, (name, size) in descriptors.items():
+        block = SharedMemory(name=name)
+        blocks.append(block)
+        sheets[path] = Image.frombuffer("RGBA", size, block.buf, "raw", "RGBA", 0, 1)
+    return blocks, sheets
@@ -59,7 +59,7 @@ class SpelunkySpriteFetcher:
         sheets = []
         for sheet in _sheets:
             if issubclass(sheet, BaseJsonSpriteLoader):
-                sheets.append(sheet(None, None, self.base_path))
+                sheets.append(sheet(None, self.base_path))
             else:
                 sheets.append(sheet(self.base_path))
 
@@ -92,6 +92,20 @@ class SpelunkySpriteFetcher:
                     break
         return img
 
+    def cache_stats(self) -> Dict[str, int]:
+        """`BaseSpriteLoader.cache_stats` summed over every sheet, along with
+        how many sheets have been read so far."""
+        sheets = list(self._non_biome_sheets)
+        for biome in self._biome_dict.values():
+            sheets.extend(biome.sprite_loaders)
+
+        totals = {"sheets": len(sheets), "sheets_loaded": 0}
+        for sheet in sheets:
+            totals["sheets_loaded"] += sheet.sheet_loaded
+            for key, value in sheet.cache_stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
     def get_dyn(self, name: str) -> Image.Image:
         if name in self._dyn_cache:
             return self._dyn_cache[name]
@@ -1,6 +1,7 @@
 from typing import Optional
 
 from modlunky2.constants import BASE_DIR
+from modlunky2.sprites.entity_chunks import EntityChunkManifest
 
 from modlunky2.sprites.items import ItemSheet
 from modlunky2.sprites.coffins import CoffinSheet
@@ -66,7 +67,7 @@ from modlunky2.sprites.deco_sheet import CaveDecoSheet
 
 
 def get_all_sprite_loaders(
-    entities_json: Optional[dict], textures_json: Optional[dict], base_path: str
+    entity_chunks: Optional[EntityChunkManifest], base_path: str
 ):
     return [
         ItemSheet(base_path),
@@ -100,26 +101,26 @@ def get_all_sprite_loaders(
         CharacterIrisSheet(base_path),
         CharacterKhakiSheet(base_path),
         CharacterLemonSheet(base_path),
-        Mounts(entities_json, textures_json, base_path),
-        Pets(entities_json, textures_json, base_path),
+        Mounts(entity_chunks, base_path),
+        Pets(entity_chunks, base_path),
         MenuLeaderSheet(base_path),
         MenuBasicSheet(base_path),
         PetHeadsSheet(BASE_DIR / "static"),
-        Basic1(entities_json, textures_json, base_path),
-        Basic2(entities_json, textures_json, base_path),
-        Basic3(entities_json, textures_json, base_path),
-        Monsters1(entities_json, textures_json, base_path),
-        Monsters2(entities_json, textures_json, base_path),
-        Monsters3(entities_json, textures_json, base_path),
-        Big1(entities_json, textures_json, base_path),
-        Big2(entities_json, textures_json, base_path),
-        Big3(entities_json, textures_json, base_path),
-        Big4(entities_json, textures_json, base_path),
-        Big5(entities_json, textures_json, base_path),
-        Big6(entities_json, textures_json, base_path),
-        OsirisAndAlienQueen(entities_json, textures_json, base_path),
-        OlmecAndMech(entities_json, textures_json, base_path),
-        Ghost(entities_json, textures_json, base_path),
+        Basic1(entity_chunks, base_path),
+        Basic2(entity_chunks, base_path),
+        Basic3(entity_chunks, base_path),
+        Monsters1(entity_chunks, base_path),
+        Monsters2(entity_chunks, base_path),
+        Monsters3(entity_chunks, base_path),
+        Big1(entity_chunks, base_path),
+        Big2(entity_chunks, base_path),
+        Big3(entity_chunks, base_path),
+        Big4(entity_chunks, base_path),
+        Big5(entity_chunks, base_path),
+        Big6(entity_chunks, base_path),
+        OsirisAndAlienQueen(entity_chunks, base_path),
+        OlmecAndMech(entity_chunks, base_path),
+        Ghost(entity_chunks, base_path),
         CaveDecoSheet(base_path),
         # These uses the constant BASE_DIR as the base path as this
         # texture is bundled with the source rather than coming
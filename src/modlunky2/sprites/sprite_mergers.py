@@ -1,3 +1,4 @@
+from modlunky2.sprites.entity_chunks import EntityChunkManifest
 from modlunky2.sprites.full_sheets import (
     AlienQueenSpriteMerger,
     AlienSpriteMerger,
@@ -132,7 +133,7 @@ from modlunky2.sprites.full_sheets.monsters.big import OlmecSpriteMerger
 _SPRITE_MERGERS = []
 
 
-def get_all_sprite_mergers(entities_json: dict, textures_json: dict, base_path: str):
+def get_all_sprite_mergers(entity_chunks: EntityChunkManifest, base_path: str):
     # There's some kind of leak when these mergers on constructed multiple times.
     # This is a hack to only construct them a single time, just cache all of them.
     if not _SPRITE_MERGERS:
@@ -160,119 +161,117 @@ def get_all_sprite_mergers(entities_json: dict, textures_json: dict, base_path:
                 CharacterLemonSpriteMerger(base_path),
                 CharacterEggChildSpriteMerger(base_path),
                 CharacterHiredHandSpriteMerger(base_path),
-                TurkeySpriteMerger(entities_json, textures_json, base_path),
-                RockdogSpriteMerger(entities_json, textures_json, base_path),
-                AxolotlSpriteMerger(entities_json, textures_json, base_path),
-                QilinSpriteMerger(entities_json, textures_json, base_path),
-                MontySpriteMerger(entities_json, textures_json, base_path),
-                PercySpriteMerger(entities_json, textures_json, base_path),
-                PoochiSpriteMerger(entities_json, textures_json, base_path),
-                SnakeSpriteMerger(entities_json, textures_json, base_path),
-                BatSpriteMerger(entities_json, textures_json, base_path),
-                FlySpriteMerger(entities_json, textures_json, base_path),
-                SkeletonSpriteMerger(entities_json, textures_json, base_path),
-                SpiderSpriteMerger(entities_json, textures_json, base_path),
-                # EarSpriteMerger(entities_json, textures_json, base_path),  # RIP Ear
-                ShopkeeperSpriteMerger(entities_json, textures_json, base_path),
-                UfoSpriteMerger(entities_json, textures_json, base_path),
-                AlienSpriteMerger(entities_json, textures_json, base_path),
-                CobraSpriteMerger(entities_json, textures_json, base_path),
-                ScorpionSpriteMerger(entities_json, textures_json, base_path),
-                GoldenMonkeySpriteMerger(entities_json, textures_json, base_path),
-                BeeSpriteMerger(entities_json, textures_json, base_path),
-                MagmarSpriteMerger(entities_json, textures_json, base_path),
-                VampireSpriteMerger(entities_json, textures_json, base_path),
-                VladSpriteMerger(entities_json, textures_json, base_path),
-                LeprechaunSpriteMerger(entities_json, textures_json, base_path),
-                CaveManSpriteMerger(entities_json, textures_json, base_path),
-                BodyguardSpriteMerger(entities_json, textures_json, base_path),
-                OldHunterSpriteMerger(entities_json, textures_json, base_path),
-                MerchantSpriteMerger(entities_json, textures_json, base_path),
-                HundunsServantSpriteMerger(entities_json, textures_json, base_path),
-                ThiefSpriteMerger(entities_json, textures_json, base_path),
-                ParmesanSpriteMerger(entities_json, textures_json, base_path),
-                ParsleySpriteMerger(entities_json, textures_json, base_path),
-                ParsnipSpriteMerger(entities_json, textures_json, base_path),
-                YangSpriteMerger(entities_json, textures_json, base_path),
-                BirdiesSpriteMerger(entities_json, textures_json, base_path),
-                RobotSpriteMerger(entities_json, textures_json, base_path),
-                ImpSpriteMerger(entities_json, textures_json, base_path),
-                TikiManSpriteMerger(entities_json, textures_json, base_path),
-                ManTrapSpriteMerger(entities_json, textures_json, base_path),
-                CritterSnailSpriteMerger(entities_json, textures_json, base_path),
-                CritterDungBeetleSpriteMerger(entities_json, textures_json, base_path),
-                FireBugSpriteMerger(entities_json, textures_json, base_path),
-                MoleSpriteMerger(entities_json, textures_json, base_path),
-                WitchDoctorSpriteMerger(entities_json, textures_json, base_path),
-                CritterButterflySpriteMerger(entities_json, textures_json, base_path),
-                HornedLizardSpriteMerger(entities_json, textures_json, base_path),
-                WitchDoctorSkullSpriteMerger(entities_json, textures_json, base_path),
-                MonkeySpriteMerger(entities_json, textures_json, base_path),
-                HangSpiderSpriteMerger(entities_json, textures_json, base_path),
-                MosquitoSpriteMerger(entities_json, textures_json, base_path),
-                JiangshiSpriteMerger(entities_json, textures_json, base_path),
-                HermitCrabSpriteMerger(entities_json, textures_json, base_path),
-                FlyingFishSpriteMerger(entities_json, textures_json, base_path),
-                OctopusSpriteMerger(entities_json, textures_json, base_path),
-                CritterCrabSpriteMerger(entities_json, textures_json, base_path),
+                TurkeySpriteMerger(entity_chunks, base_path),
+                RockdogSpriteMerger(entity_chunks, base_path),
+                AxolotlSpriteMerger(entity_chunks, base_path),
+                QilinSpriteMerger(entity_chunks, base_path),
+                MontySpriteMerger(entity_chunks, base_path),
+                PercySpriteMerger(entity_chunks, base_path),
+                PoochiSpriteMerger(entity_chunks, base_path),
+                SnakeSpriteMerger(entity_chunks, base_path),
+                BatSpriteMerger(entity_chunks, base_path),
+                FlySpriteMerger(entity_chunks, base_path),
+                SkeletonSpriteMerger(entity_chunks, base_path),
+                SpiderSpriteMerger(entity_chunks, base_path),
+                # EarSpriteMerger(entity_chunks, base_path),  # RIP Ear
+                ShopkeeperSpriteMerger(entity_chunks, base_path),
+                UfoSpriteMerger(entity_chunks, base_path),
+                AlienSpriteMerger(entity_chunks, base_path),
+                CobraSpriteMerger(entity_chunks, base_path),
+                ScorpionSpriteMerger(entity_chunks, base_path),
+                GoldenMonkeySpriteMerger(entity_chunks, base_path),
+                BeeSpriteMerger(entity_chunks, base_path),
+                MagmarSpriteMerger(entity_chunks, base_path),
+                VampireSpriteMerger(entity_chunks, base_path),
+                VladSpriteMerger(entity_chunks, base_path),
+                LeprechaunSpriteMerger(entity_chunks, base_path),
+                CaveManSpriteMerger(entity_chunks, base_path),
+                BodyguardSpriteMerger(entity_chunks, base_path),
+                OldHunterSpriteMerger(entity_chunks, base_path),
+                MerchantSpriteMerger(entity_chunks, base_path),
+                HundunsServantSpriteMerger(entity_chunks, base_path),
+                ThiefSpriteMerger(entity_chunks, base_path),
+                ParmesanSpriteMerger(entity_chunks, base_path),
+                ParsleySpriteMerger(entity_chunks, base_path),
+                ParsnipSpriteMerger(entity_chunks, base_path),
+                YangSpriteMerger(entity_chunks, base_path),
+                BirdiesSpriteMerger(entity_chunks, base_path),
+                RobotSpriteMerger(entity_chunks, base_path),
+                ImpSpriteMerger(entity_chunks, base_path),
+                TikiManSpriteMerger(entity_chunks, base_path),
+                ManTrapSpriteMerger(entity_chunks, base_path),
+                CritterSnailSpriteMerger(entity_chunks, base_path),
+                CritterDungBeetleSpriteMerger(entity_chunks, base_path),
+                FireBugSpriteMerger(entity_chunks, base_path),
+                MoleSpriteMerger(entity_chunks, base_path),
+                WitchDoctorSpriteMerger(entity_chunks, base_path),
+                CritterButterflySpriteMerger(entity_chunks, base_path),
+                HornedLizardSpriteMerger(entity_chunks, base_path),
+                WitchDoctorSkullSpriteMerger(entity_chunks, base_path),
+                MonkeySpriteMerger(entity_chunks, base_path),
+                HangSpiderSpriteMerger(entity_chunks, base_path),
+                MosquitoSpriteMerger(entity_chunks, base_path),
+                JiangshiSpriteMerger(entity_chunks, base_path),
+                HermitCrabSpriteMerger(entity_chunks, base_path),
+                FlyingFishSpriteMerger(entity_chunks, base_path),
+                OctopusSpriteMerger(entity_chunks, base_path),
+                CritterCrabSpriteMerger(entity_chunks, base_path),
                 CritterBlueCrabSpriteMerger(base_path),
-                FemaleJiangshiSpriteMerger(entities_json, textures_json, base_path),
-                CritterFishSpriteMerger(entities_json, textures_json, base_path),
-                CrocManSpriteMerger(entities_json, textures_json, base_path),
-                SorceressSpriteMerger(entities_json, textures_json, base_path),
-                CatMummySpriteMerger(entities_json, textures_json, base_path),
-                CritterAnchovySpriteMerger(entities_json, textures_json, base_path),
-                NecromancerSpriteMerger(entities_json, textures_json, base_path),
-                CrittersLocustSpriteMerger(entities_json, textures_json, base_path),
-                YetiSpriteMerger(entities_json, textures_json, base_path),
-                ProtoShopkeeperSpriteMerger(entities_json, textures_json, base_path),
-                CritterFireflySpriteMerger(entities_json, textures_json, base_path),
-                PenguinSpriteMerger(entities_json, textures_json, base_path),
-                DroneSpriteMerger(entities_json, textures_json, base_path),
-                SlimeSpriteMerger(entities_json, textures_json, base_path),
-                JumpdogSpriteMerger(entities_json, textures_json, base_path),
-                TadpoleSpriteMerger(entities_json, textures_json, base_path),
-                OlmiteNakedSpriteMerger(entities_json, textures_json, base_path),
+                FemaleJiangshiSpriteMerger(entity_chunks, base_path),
+                CritterFishSpriteMerger(entity_chunks, base_path),
+                CrocManSpriteMerger(entity_chunks, base_path),
+                SorceressSpriteMerger(entity_chunks, base_path),
+                CatMummySpriteMerger(entity_chunks, base_path),
+                CritterAnchovySpriteMerger(entity_chunks, base_path),
+                NecromancerSpriteMerger(entity_chunks, base_path),
+                CrittersLocustSpriteMerger(entity_chunks, base_path),
+                YetiSpriteMerger(entity_chunks, base_path),
+                ProtoShopkeeperSpriteMerger(entity_chunks, base_path),
+                CritterFireflySpriteMerger(entity_chunks, base_path),
+                PenguinSpriteMerger(entity_chunks, base_path),
+                DroneSpriteMerger(entity_chunks, base_path),
+                SlimeSpriteMerger(entity_chunks, base_path),
+                JumpdogSpriteMerger(entity_chunks, base_path),
+                TadpoleSpriteMerger(entity_chunks, base_path),
+                OlmiteNakedSpriteMerger(entity_chunks, base_path),
                 OlmitedArmoredSpriteMerger(base_path),
                 OlmiteHelmetSpriteMerger(base_path),
-                GrubSpriteMerger(entities_json, textures_json, base_path),
-                FrogSpriteMerger(entities_json, textures_json, base_path),
-                FireFrogSpriteMerger(entities_json, textures_json, base_path),
-                QuillbackSpriteMerger(entities_json, textures_json, base_path),
-                GiantSpiderSpriteMerger(entities_json, textures_json, base_path),
-                QueenBeeSpriteMerger(entities_json, textures_json, base_path),
-                MummySpriteMerger(entities_json, textures_json, base_path),
-                # AnubisSpriteMerger(entities_json, textures_json, base_path),  # RIP
-                # Anubis2SpriteMerger(entities_json, textures_json, base_path),  # RIP
-                LamassuSpriteMerger(entities_json, textures_json, base_path),
-                YetiKingSpriteMerger(entities_json, textures_json, base_path),
-                YetiQueenSpriteMerger(entities_json, textures_json, base_path),
-                CrabManSpriteMerger(entities_json, textures_json, base_path),
-                LavamanderSpriteMerger(entities_json, textures_json, base_path),
-                GiantFlySpriteMerger(entities_json, textures_json, base_path),
-                GiantClamSpriteMerger(entities_json, textures_json, base_path),
-                AmmitSpriteMerger(entities_json, textures_json, base_path),
-                MadameTuskSpriteMerger(entities_json, textures_json, base_path),
-                EggplantMinisterSpriteMerger(entities_json, textures_json, base_path),
-                GiantFrogSpriteMerger(entities_json, textures_json, base_path),
-                GiantFishSpriteMerger(entities_json, textures_json, base_path),
-                # KinguSpriteMerger(entities_json, textures_json, base_path),  # RIP
-                StorageGuySpriteMerger(entities_json, textures_json, base_path),
-                OsirisSpriteMerger(entities_json, textures_json, base_path),
-                AlienQueenSpriteMerger(entities_json, textures_json, base_path),
-                OlmecSpriteMerger(entities_json, textures_json, base_path),  # RIP
-                # MechSpriteMerger(entities_json, textures_json, base_path),  # RIP
-                GhistSpriteMerger(entities_json, textures_json, base_path),
-                GhostSpriteMerger(entities_json, textures_json, base_path),
-                GhostMediumSadSpriteMerger(entities_json, textures_json, base_path),
-                GhostMediumHappySpriteMerger(entities_json, textures_json, base_path),
-                GhostSmallSadSpriteMerger(entities_json, textures_json, base_path),
-                GhostSmallHappySpriteMerger(entities_json, textures_json, base_path),
-                GhostSmallSurprisedSpriteMerger(
-                    entities_json, textures_json, base_path
-                ),
-                GhostSmallAngrySpriteMerger(entities_json, textures_json, base_path),
-                # MegaJellySpriteMerger(entities_json, textures_json, base_path),  # RIP
+                GrubSpriteMerger(entity_chunks, base_path),
+                FrogSpriteMerger(entity_chunks, base_path),
+                FireFrogSpriteMerger(entity_chunks, base_path),
+                QuillbackSpriteMerger(entity_chunks, base_path),
+                GiantSpiderSpriteMerger(entity_chunks, base_path),
+                QueenBeeSpriteMerger(entity_chunks, base_path),
+                MummySpriteMerger(entity_chunks, base_path),
+                # AnubisSpriteMerger(entity_chunks, base_path),  # RIP
+                # Anubis2SpriteMerger(entity_chunks, base_path),  # RIP
+                LamassuSpriteMerger(entity_chunks, base_path),
+                YetiKingSpriteMerger(entity_chunks, base_path),
+                YetiQueenSpriteMerger(entity_chunks, base_path),
+                CrabManSpriteMerger(entity_chunks, base_path),
+                LavamanderSpriteMerger(entity_chunks, base_path),
+                GiantFlySpriteMerger(entity_chunks, base_path),
+                GiantClamSpriteMerger(entity_chunks, base_path),
+                AmmitSpriteMerger(entity_chunks, base_path),
+                MadameTuskSpriteMerger(entity_chunks, base_path),
+                EggplantMinisterSpriteMerger(entity_chunks, base_path),
+                GiantFrogSpriteMerger(entity_chunks, base_path),
+                GiantFishSpriteMerger(entity_chunks, base_path),
+                # KinguSpriteMerger(entity_chunks, base_path),  # RIP
+                StorageGuySpriteMerger(entity_chunks, base_path),
+                OsirisSpriteMerger(entity_chunks, base_path),
+                AlienQueenSpriteMerger(entity_chunks, base_path),
+                OlmecSpriteMerger(entity_chunks, base_path),  # RIP
+                # MechSpriteMerger(entity_chunks, base_path),  # RIP
+                GhistSpriteMerger(entity_chunks, base_path),
+                GhostSpriteMerger(entity_chunks, base_path),
+                GhostMediumSadSpriteMerger(entity_chunks, base_path),
+                GhostMediumHappySpriteMerger(entity_chunks, base_path),
+                GhostSmallSadSpriteMerger(entity_chunks, base_path),
+                GhostSmallHappySpriteMerger(entity_chunks, base_path),
+                GhostSmallSurprisedSpriteMerger(entity_chunks, base_path),
+                GhostSmallAngrySpriteMerger(entity_chunks, base_path),
+                # MegaJellySpriteMerger(entity_chunks, base_path),  # RIP
                 UdjatWallHeads(base_path),
             ]
         )
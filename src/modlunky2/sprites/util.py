@@ -1,5 +1,6 @@
 from math import ceil, sqrt
 from logging import getLogger
+from typing import List, Tuple
 
 from modlunky2.sprites.base_classes.types import chunk_map_type, image_crop_tuple
 
@@ -24,6 +25,64 @@ def chunks_from_animation(
     return chunks
 
 
+# How a texture is laid out: its number of tiles across, the offset of the
+# first tile and the size of each tile, in pixels.
+TextureLayout = Tuple[int, float, float, float, float]
+# The frames of an entity: animation id, index of its first tile and count.
+AnimationFrames = List[Tuple[str, int, int]]
+
+
+def texture_layout(texture_data: dict) -> TextureLayout:
+    return (
+        texture_data["num_tiles"]["width"],
+        texture_data["offset"]["width"],
+        texture_data["offset"]["height"],
+        texture_data["tile_width"],
+        texture_data["tile_height"],
+    )
+
+
+def entity_animation_frames(entity_data: dict, num_tiles_width: int) -> AnimationFrames:
+    animations = sorted(entity_data["animations"].items(), key=lambda x: int(x[0]))
+    if not animations:
+        tile_x = entity_data["tile_x"]
+        tile_y = entity_data["tile_y"]
+        return [("0", tile_y * num_tiles_width + tile_x, 1)]
+    return [
+        (animation_id, animation_data["texture"], animation_data["count"])
+        for animation_id, animation_data in animations
+    ]
+
+
+def chunks_from_frames(
+    entity_name: str,
+    layout: TextureLayout,
+    frames: AnimationFrames,
+    chunk_size: int,
+) -> chunk_map_type:
+    num_chunks_width, offset_width, offset_height, tile_width, tile_height = layout
+    (offset_width, offset_height) = (
+        offset_width / chunk_size,
+        offset_height / chunk_size,
+    )
+
+    chunk_height_scaling = tile_height / chunk_size
+    chunk_width_scaling = tile_width / chunk_size
+
+    chunks = {}
+    for animation_id, first_chunk, count in frames:
+        for i in range(0, count):
+            chunk_x = (first_chunk + i) % num_chunks_width
+            chunk_y = (first_chunk + i) // num_chunks_width
+            chunks[f"{entity_name}_{animation_id}_{i}"] = (
+                offset_width + chunk_x * chunk_width_scaling,
+                offset_height + chunk_y * chunk_height_scaling,
+                offset_width + (chunk_x + 1) * chunk_width_scaling,
+                offset_height + (chunk_y + 1) * chunk_height_scaling,
+            )
+    return chunks
+
+
 def chunks_from_json(
     entities_json: dict, textures_json: dict, entity_name: str, chunk_size: int
 ) -> chunk_map_type:
@@ -31,44 +90,9 @@ def chunks_from_json(
         entity_data = entities_json[entity_name]
         texture_id = str(entity_data["texture"])
         if texture_id in textures_json:
-            texture_data = textures_json[texture_id]
-            num_chunks_width = texture_data["num_tiles"]["width"]
-            (offset_width, offset_height) = (
-                texture_data["offset"]["width"] / chunk_size,
-                texture_data["offset"]["height"] / chunk_size,
-            )
-
-            chunk_height_scaling = texture_data["tile_height"] / chunk_size
-            chunk_width_scaling = texture_data["tile_width"] / chunk_size
-
-            chunks = {}
-            animations = sorted(
-                entity_data["animations"].items(), key=lambda x: int(x[0])
-            )
-            if not animations:
-                tile_x = entity_data["tile_x"]
-                tile_y = entity_data["tile_y"]
-                animations.append(
-                    (
-                        "0",
-                        {
-                            "count": 1,
-                            "texture": tile_y * num_chunks_width + tile_x,
-                        },
-                    )
-                )
-            for animation_id, animation_data in animations:
-                first_chunk = animation_data["texture"]
-                for i in range(0, animation_data["count"]):
-                    chunk_x = (first_chunk + i) % num_chunks_width
-                    chunk_y = (first_chunk + i) // num_chunks_width
-                    chunks[f"{entity_name}_{animation_id}_{i}"] = (
-                        offset_width + chunk_x * chunk_width_scaling,
-                        offset_height + chunk_y * chunk_height_scaling,
-                        offset_width + (chunk_x + 1) * chunk_width_scaling,
-                        offset_height + (chunk_y + 1) * chunk_height_scaling,
-                    )
-            return chunks
+            layout = texture_layout(textures_json[texture_id])
+            frames = entity_animation_frames(entity_data, layout[0])
+            return chunks_from_frames(entity_name, layout, frames, chunk_size)
         logger.error(
             "Failed generating chunks for entity '%s': Could not find texture %s in textures.json",
             entity_name,
@@ -77,16 +101,13 @@ def chunks_from_json(
         return {}
 
     logger.error(
-        "Failed generating chunks for entity '%s': Could not find entity in entities.json"
+        "Failed generating chunks for entity '%s': Could not find entity in entities.json",
+        entity_name,
     )
     return {}
 
 
-def chunk_mapping_from_json(
-    entities_json: dict, textures_json: dict, entity_name: str, chunk_size: int
-):
-    chunks = chunks_from_json(entities_json, textures_json, entity_name, chunk_size)
-
+def chunk_mapping_from_chunks(chunks: chunk_map_type):
     def get_unique_chunks(chunks: chunk_map_type):
         unique_chunks = {}
         for chunk_name, chunk_coords in chunks.items():
@@ -126,14 +147,24 @@ def chunk_mapping_from_json(
     return chunk_mapping
 
 
-def target_chunks_from_json(
+def chunk_mapping_from_json(
     entities_json: dict, textures_json: dict, entity_name: str, chunk_size: int
 ):
-    chunk_mapping = chunk_mapping_from_json(
-        entities_json, textures_json, entity_name, chunk_size
+    return chunk_mapping_from_chunks(
+        chunks_from_json(entities_json, textures_json, entity_name, chunk_size)
     )
 
+
+def target_chunks_from_chunks(chunks: chunk_map_type):
     target_chunks = {}
-    for chunk_name, chunk_mapping in chunk_mapping.items():
+    for chunk_name, chunk_mapping in chunk_mapping_from_chunks(chunks).items():
         target_chunks[chunk_name] = chunk_mapping["to"]
     return target_chunks
+
+
+def target_chunks_from_json(
+    entities_json: dict, textures_json: dict, entity_name: str, chunk_size: int
+):
+    return target_chunks_from_chunks(
+        chunks_from_json(entities_json, textures_json, entity_name, chunk_size)
+    )
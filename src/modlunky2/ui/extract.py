@@ -9,10 +9,13 @@ from fsb5.utils import load_lib, LibraryNotFoundException
 
 from modlunky2.assets.assets import AssetStore
 from modlunky2.assets.constants import (
+    DEFAULT_PNG_COMPRESS_LEVEL,
     EXTRACTED_DIR,
+    FAST_PNG_COMPRESS_LEVEL,
     FILEPATH_DIRS,
     PACKS_DIR,
 )
+from modlunky2.assets.png_optimizer import optimize_extracted_pngs
 from modlunky2.config import Config
 from modlunky2.utils import open_directory
 from modlunky2.ui.widgets import Tab, ToolTip
@@ -22,8 +25,10 @@ logger = logging.getLogger(__name__)
 
 
 MODS = Path("Mods")
+TIMINGS_FILENAME = "extract-timings.json"
 
 TOP_LEVEL_DIRS = [EXTRACTED_DIR, PACKS_DIR]
+TIMINGS_COLUMNS = ("Stage", "Time", "Items", "MB In", "MB Out")
 
 LEGACY_ENTITIES = [
     "axolotl_full_grid.png",
@@ -52,13 +57,15 @@ def try_load_vorbis():
 
 
 def extract_assets(
-    _call,
+    call,
     install_dir,
     target,
     generate_string_hashes,
     create_entity_sheets,
     extract_sound_extensions,
     reuse_extracted,
+    incremental=True,
+    fast_pngs=False,
 ):
     exe_filename = install_dir / target
 
@@ -82,14 +89,21 @@ def extract_assets(
 
     with exe_filename.open("rb") as exe:
         asset_store = AssetStore.load_from_file(exe)
-        unextracted = asset_store.extract(
-            mods_dir / EXTRACTED_DIR,
-            mods_dir / ".compressed" / EXTRACTED_DIR,
-            generate_string_hashes=generate_string_hashes,
-            create_entity_sheets=create_entity_sheets,
-            extract_sound_extensions=extract_sound_extensions,
-            reuse_extracted=reuse_extracted,
-        )
+        try:
+            unextracted = asset_store.extract(
+                mods_dir / EXTRACTED_DIR,
+                mods_dir / ".compressed" / EXTRACTED_DIR,
+                generate_string_hashes=generate_string_hashes,
+                create_entity_sheets=create_entity_sheets,
+                extract_sound_extensions=extract_sound_extensions,
+                reuse_extracted=reuse_extracted,
+                incremental=incremental,
+                png_compress_level=(
+                    FAST_PNG_COMPRESS_LEVEL if fast_pngs else DEFAULT_PNG_COMPRESS_LEVEL
+                ),
+            )
+        finally:
+            asset_store.close_mapping()
 
     for asset in unextracted:
         logger.warning("Un-extracted Asset %s", asset.asset_block)
@@ -101,6 +115,23 @@ def extract_assets(
 
     logger.info("Extraction complete!")
 
+    timings = asset_store.timings
+    timings.save(mods_dir / ".compressed" / EXTRACTED_DIR / TIMINGS_FILENAME)
+    call(
+        "extract:timings",
+        rows=timings.summary_rows(),
+        wall_seconds=timings.wall_seconds,
+    )
+
+
+def optimize_pngs(_call, install_dir):
+    # Everything is usable already, this only makes the PNGs smaller.
+    mods_dir = install_dir / MODS
+    optimize_extracted_pngs(
+        mods_dir / EXTRACTED_DIR, mods_dir / ".compressed" / EXTRACTED_DIR
+    )
+    logger.info("PNG optimization complete!")
+
 
 class ExtractTab(Tab):
     def __init__(
@@ -116,11 +147,22 @@ class ExtractTab(Tab):
             True,
             on_complete="extract:extract_finished",
         )
+        self.task_manager.register_task(
+            "extract:optimize_pngs",
+            optimize_pngs,
+            True,
+            on_complete="extract:optimize_finished",
+        )
         self.task_manager.register_handler(
             "extract:extract_finished", self.extract_finished
         )
+        self.task_manager.register_handler(
+            "extract:optimize_finished", self.optimize_finished
+        )
+        self.task_manager.register_handler("extract:timings", self.show_timings)
 
         self.vorbis_loaded = try_load_vorbis()
+        self.optimize_after_extract = False
 
         self.columnconfigure(0, weight=1)
         self.rowconfigure(0, weight=1)
@@ -235,9 +277,77 @@ class ExtractTab(Tab):
             ),
         )
 
+        self.incremental = tk.BooleanVar()
+        self.incremental.set(True)
+        self.checkbox_incremental = ttk.Checkbutton(
+            self.config_frame,
+            text="Only Extract Changed Assets",
+            variable=self.incremental,
+            onvalue=True,
+            offvalue=False,
+        )
+        self.checkbox_incremental.grid(row=6, sticky="nw")
+        ToolTip(
+            self.checkbox_incremental,
+            (
+                "If checked we keep previously extracted files whose\n"
+                "asset hasn't changed in the binary."
+            ),
+        )
+
+        self.fast_pngs = tk.BooleanVar()
+        self.fast_pngs.set(False)
+        self.checkbox_fast_pngs = ttk.Checkbutton(
+            self.config_frame,
+            text="Fast PNG Writes",
+            variable=self.fast_pngs,
+            onvalue=True,
+            offvalue=False,
+        )
+        self.checkbox_fast_pngs.grid(row=7, sticky="nw")
+        ToolTip(
+            self.checkbox_fast_pngs,
+            (
+                "If checked textures are written with light compression\n"
+                "and optimized in a separate step once the extraction is\n"
+                "complete."
+            ),
+        )
+
         self.list_box.config(yscrollcommand=self.scrollbar.set)
         self.scrollbar.config(command=self.list_box.yview)
 
+        self.timings_frame = ttk.LabelFrame(self.top_frame, text="Last Extraction")
+        self.timings_frame.grid(
+            row=2, column=0, columnspan=2, pady=5, padx=5, sticky="nswe"
+        )
+        self.timings_frame.columnconfigure(0, weight=1)
+        self.timings_tree = ttk.Treeview(
+            self.timings_frame,
+            columns=TIMINGS_COLUMNS,
+            show="headings",
+            height=6,
+        )
+        for column in TIMINGS_COLUMNS:
+            self.timings_tree.heading(column, text=column)
+            self.timings_tree.column(
+                column, anchor=tk.W if column == "Stage" else tk.E, width=90
+            )
+        self.timings_tree.grid(row=0, column=0, sticky="nswe")
+        self.timings_scrollbar = ttk.Scrollbar(
+            self.timings_frame, command=self.timings_tree.yview
+        )
+        self.timings_scrollbar.grid(row=0, column=1, sticky="nes")
+        self.timings_tree.config(yscrollcommand=self.timings_scrollbar.set)
+        ToolTip(
+            self.timings_tree,
+            (
+                "Time spent in each stage of the last extraction, added up\n"
+                "over all workers. Also saved to .compressed/Extracted/"
+                f"{TIMINGS_FILENAME}"
+            ),
+        )
+
         self.button_extract = ttk.Button(self, text="Extract", command=self.extract)
         self.button_extract.grid(row=1, column=0, pady=5, padx=5, sticky="nswe")
         ToolTip(self.button_extract, ("Extract assets from EXE."))
@@ -250,8 +360,34 @@ class ExtractTab(Tab):
         open_directory(extract_dir)
 
     def extract_finished(self):
+        if self.optimize_after_extract:
+            self.optimize_after_extract = False
+            self.task_manager.call(
+                "extract:optimize_pngs", install_dir=self.modlunky_config.install_dir
+            )
+            return
         self.button_extract["state"] = tk.NORMAL
 
+    def optimize_finished(self):
+        self.button_extract["state"] = tk.NORMAL
+
+    def show_timings(self, rows, wall_seconds):
+        self.timings_tree.delete(*self.timings_tree.get_children())
+        if wall_seconds is not None:
+            self.timings_frame.configure(text=f"Last Extraction ({wall_seconds:.1f}s)")
+        for stage, seconds, count, bytes_in, bytes_out in rows:
+            self.timings_tree.insert(
+                "",
+                tk.END,
+                values=(
+                    stage,
+                    f"{seconds:.2f}s",
+                    count,
+                    f"{bytes_in / (1024 * 1024):.1f}",
+                    f"{bytes_out / (1024 * 1024):.1f}",
+                ),
+            )
+
     def extract(self):
         idx = self.list_box.curselection()
         if not idx:
@@ -267,6 +403,7 @@ class ExtractTab(Tab):
         if self.extract_oggs.get():
             extract_sound_extensions.append(SoundExtension.OGG)
 
+        self.optimize_after_extract = self.fast_pngs.get()
         selected_exe = self.list_box.get(idx)
         self.task_manager.call(
             "extract:extract_assets",
@@ -276,6 +413,8 @@ class ExtractTab(Tab):
             create_entity_sheets=self.create_entity.get(),
             extract_sound_extensions=extract_sound_extensions,
             reuse_extracted=self.reuse_extracted.get(),
+            incremental=self.incremental.get(),
+            fast_pngs=self.fast_pngs.get(),
         )
 
     def get_exes(self):
@@ -9,7 +9,8 @@ from PIL import Image, ImageTk
 
 from modlunky2.assets.assets import AssetStore
 from modlunky2.assets.exc import MissingAsset
-from modlunky2.assets.hashing import md5sum_path
+from modlunky2.assets.hashing import FingerprintCache, md5sum_path
+from modlunky2.assets.manifest import PackState
 from modlunky2.assets.patcher import Patcher
 from modlunky2.config import Config
 from modlunky2.constants import BASE_DIR
@@ -19,6 +20,7 @@ from modlunky2.utils import is_patched
 logger = logging.getLogger(__name__)
 
 MODS = Path("Mods")
+PACK_TIMINGS_FILENAME = "pack-timings.json"
 
 
 def pack_assets(_call, install_dir, packs):
@@ -52,7 +54,20 @@ def pack_assets(_call, install_dir, packs):
             )
             return
 
-    shutil.copy2(source_exe, dest_exe)
+    compressed_dir = mods_dir / ".compressed"
+    compressed_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint_cache = FingerprintCache.load(compressed_dir)
+    source_md5 = fingerprint_cache.md5sum(source_exe).decode()
+    fingerprint_cache.save()
+
+    # If the destination is what we packed last time, only the blocks that
+    # changed since then need rewriting. Otherwise start from a fresh copy.
+    pack_state = PackState.load(compressed_dir)
+    incremental = pack_state.matches(source_md5, dest_exe)
+    if incremental:
+        logger.info("Packing incrementally in to %s", dest_exe)
+    else:
+        shutil.copy2(source_exe, dest_exe)
 
     with dest_exe.open("rb+") as dest_file:
         asset_store = AssetStore.load_from_file(dest_file)
@@ -60,7 +75,9 @@ def pack_assets(_call, install_dir, packs):
             asset_store.repackage(
                 packs,
                 extract_dir,
-                mods_dir / ".compressed",
+                compressed_dir,
+                incremental=incremental,
+                pack_state=pack_state,
             )
         except MissingAsset as err:
             logger.error(
@@ -69,9 +86,14 @@ def pack_assets(_call, install_dir, packs):
             return
 
         patcher = Patcher(dest_file)
-        patcher.patch_checksum()
-        patcher.patch_release()
-        logger.info("Repacking complete!")
+        if not patcher.is_checksum_patched():
+            patcher.patch_checksum()
+            patcher.patch_release()
+
+    pack_state.record_dest(source_md5, dest_exe)
+    pack_state.save()
+    asset_store.timings.save(compressed_dir / PACK_TIMINGS_FILENAME)
+    logger.info("Repacking complete!")
 
 
 class WarningFrame(ttk.Frame):
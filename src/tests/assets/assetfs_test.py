@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from modlunky2.assets import assetfs
+from modlunky2.assets.assetfs import AssetFS, DecryptingReader
+from modlunky2.assets.chacha import chacha
+from modlunky2.assets.synthetic import build_synthetic_exe, random_bytes
+
+FILES = {
+    "Data/Levels/abzu.lvl": b"level data " * 100,
+    "Data/Levels/Arena/dm1-1.lvl": b"arena level",
+    "Data/Textures/items.DDS": bytes(range(256)) * 300,
+    "strings00.str": b"Hello\n",
+}
+
+
+@pytest.fixture(name="asset_fs")
+def fixture_asset_fs(tmp_path):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(build_synthetic_exe(FILES))
+    with AssetFS.from_exe(exe_path, cache_bytes=50_000) as asset_fs:
+        yield asset_fs
+
+
+def test_read(asset_fs):
+    for filepath, data in FILES.items():
+        assert asset_fs.read_bytes(filepath) == data
+        with asset_fs.open(filepath) as asset_file:
+            assert asset_file.read() == data
+
+    # Windows style and leading separators are accepted
+    assert (
+        asset_fs.read_bytes("\\Data\\Levels\\abzu.lvl") == FILES["Data/Levels/abzu.lvl"]
+    )
+
+
+def test_read_errors(asset_fs):
+    with pytest.raises(FileNotFoundError):
+        asset_fs.read_bytes("Data/Levels/missing.lvl")
+    with pytest.raises(IsADirectoryError):
+        asset_fs.read_bytes("Data/Levels")
+    with pytest.raises(ValueError):
+        asset_fs.open("strings00.str", "wb")
+
+
+def test_listdir(asset_fs):
+    assert asset_fs.listdir() == ["Data", "strings00.str"]
+    assert asset_fs.listdir("Data") == ["Levels", "Textures"]
+    assert asset_fs.listdir("Data/Levels") == ["Arena", "abzu.lvl"]
+    with pytest.raises(NotADirectoryError):
+        asset_fs.listdir("strings00.str")
+    with pytest.raises(FileNotFoundError):
+        asset_fs.listdir("Sounds")
+
+
+def test_stat(asset_fs):
+    stat = asset_fs.stat("Data/Levels/abzu.lvl")
+    assert not stat.is_dir
+    assert stat.is_encrypted
+    assert stat.size == len(FILES["Data/Levels/abzu.lvl"])
+    assert stat.stored_size < stat.size
+    assert asset_fs.stat("Data/Levels").is_dir
+    assert asset_fs.exists("Data/Textures/items.DDS")
+    assert not asset_fs.exists("Data/Textures/missing.DDS")
+
+
+def test_lru_cache(asset_fs):
+    asset_fs.read_bytes("Data/Levels/abzu.lvl")
+    asset_fs.read_bytes("Data/Levels/abzu.lvl")
+    assert (asset_fs.hits, asset_fs.misses) == (1, 1)
+
+    # The texture is bigger than the whole cache so is never kept
+    asset_fs.read_bytes("Data/Textures/items.DDS")
+    asset_fs.read_bytes("Data/Textures/items.DDS")
+    assert asset_fs.misses == 3
+    assert asset_fs.cached_bytes == len(FILES["Data/Levels/abzu.lvl"])
+
+
+def test_lru_eviction(asset_fs):
+    asset_fs.cache_bytes = len(FILES["Data/Levels/abzu.lvl"]) + 5
+    asset_fs.read_bytes("Data/Levels/abzu.lvl")
+    asset_fs.read_bytes("Data/Levels/Arena/dm1-1.lvl")
+    assert asset_fs.cached_bytes == len(FILES["Data/Levels/Arena/dm1-1.lvl"])
+
+
+def test_open_stream(asset_fs):
+    expected = FILES["Data/Textures/items.DDS"]
+    with asset_fs.open_stream("Data/Textures/items.DDS") as stream:
+        chunks = []
+        while True:
+            chunk = stream.read(1000)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    assert b"".join(chunks) == expected
+    assert asset_fs.misses == 0
+
+
+def test_decrypting_reader_readall_in_pieces(monkeypatch):
+    monkeypatch.setattr(assetfs, "STREAM_READ_SIZE", 100)
+    rng = random.Random(0)
+    data = random_bytes(rng, 1000 + 0x2B)
+    filepath, key = b"Data/Levels/abzu.lvl", 0x9E6C63D0676A9A99
+
+    reader = DecryptingReader(data, filepath, key)
+    head = reader.read(10)
+    assert head + reader.readall() == chacha(filepath, data, key)
+    assert reader.read() == b""
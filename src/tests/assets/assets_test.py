@@ -0,0 +1,282 @@
+from io import BytesIO
+from random import Random
+
+import pytest
+
+from modlunky2.assets.assets import (
+    AssetStore,
+    DiskAsset,
+    DiskBundle,
+    ExeAsset,
+    ExeAssetBlock,
+)
+from modlunky2.assets.constants import BANK_ALIGNMENT
+from modlunky2.assets.exc import MissingAsset
+from modlunky2.assets.manifest import ExtractManifest
+from modlunky2.assets.pipeline import WorkerPool
+from modlunky2.assets.synthetic import build_synthetic_exe, random_bytes
+
+
+def make_asset(filepath_hash, padding=0):
+    filepath_hash = filepath_hash + b"\x00" * padding
+    return ExeAsset(
+        ExeAssetBlock(
+            offset=0,
+            filepath_len=len(filepath_hash),
+            filepath_hash=filepath_hash,
+            is_encrypted=True,
+            asset_offset=0,
+            asset_len=1,
+        ),
+        None,
+    )
+
+
+def make_store(filepaths, padded=()):
+    asset_store = AssetStore(None)
+    for filepath in filepaths:
+        padding = BANK_ALIGNMENT - 1 if filepath in padded else 0
+        asset_store.assets.append(
+            make_asset(asset_store.hash_filepath(filepath), padding)
+        )
+    return asset_store
+
+
+def test_find_asset_uses_index():
+    filepaths = ["Data/Levels/abzu.lvl", "Data/Textures/items.png", "soundbank.bank"]
+    asset_store = make_store(filepaths, padded={"soundbank.bank"})
+    asset_store.build_hash_index()
+
+    for idx, filepath in enumerate(filepaths):
+        assert asset_store.find_asset(filepath) is asset_store.assets[idx]
+    assert asset_store.find_asset("Data/Levels/missing.lvl") is None
+    assert asset_store.find_asset(None) is None
+
+
+def test_find_assets_many_matches_linear_scan():
+    filepaths = ["Data/Levels/abzu.lvl", "Data/Textures/items.png", "soundbank.bank"]
+    asset_store = make_store(filepaths, padded={"soundbank.bank"})
+    # Short hashes can't be indexed and must still be found.
+    asset_store.assets.append(make_asset(b"abc"))
+    lookups = filepaths + ["Data/Levels/missing.lvl", None]
+
+    linear = [asset_store.find_asset(filepath) for filepath in lookups]
+    asset_store.build_hash_index()
+    assert asset_store.find_assets_many(lookups) == linear
+    assert asset_store.find_asset_by_hash(b"abc") is asset_store.assets[-1]
+
+
+FILES = {
+    "Data/Levels/abzu.lvl": b"\\?abzu\n" * 100,
+    "Data/Fonts/fontdebug.fnb": bytes(range(256)) * 3,
+}
+
+
+def test_load_from_file_mmap_matches_handle(tmp_path):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(build_synthetic_exe(FILES))
+
+    handle_store = AssetStore.load_from_file(BytesIO(exe_path.read_bytes()))
+    with exe_path.open("rb") as exe:
+        mmap_store = AssetStore.load_from_file(exe)
+        assert mmap_store.data_source is not exe
+
+        assert mmap_store.key == handle_store.key
+        assert [asset.asset_block for asset in mmap_store.assets] == [
+            asset.asset_block for asset in handle_store.assets
+        ]
+        assert [asset.filepath for asset in mmap_store.assets] == list(FILES)
+
+        asset = mmap_store.assets[0]
+        asset.load_data(mmap_store.data_source)
+        assert isinstance(asset.data, memoryview)
+        handle_store.assets[0].load_data(handle_store.exe_handle)
+        assert asset.data == handle_store.assets[0].data
+
+        mmap_store.close_mapping()
+        assert asset.data is None
+        assert mmap_store.data_source is exe
+
+
+def test_decoded_size(tmp_path):
+    files = {
+        "Data/Levels/abzu.lvl": FILES["Data/Levels/abzu.lvl"],
+        "Data/Fonts/fontdebug.fnb": random_bytes(Random(0), 1024),
+    }
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(build_synthetic_exe(files))
+
+    with exe_path.open("rb") as exe:
+        for use_mmap in [True, False]:
+            asset_store = AssetStore.load_from_file(exe, use_mmap=use_mmap)
+            levels, font = asset_store.assets
+            # Assets are charged their decompressed size, unless the block
+            # is larger because it didn't compress.
+            assert levels.decoded_size(asset_store.data_source, asset_store.key) == (
+                len(files["Data/Levels/abzu.lvl"])
+            )
+            assert font.decoded_size(asset_store.data_source, asset_store.key) == (
+                font.asset_block.asset_len
+            )
+            asset_store.close_mapping()
+
+
+@pytest.mark.parametrize("worker_pool", list(WorkerPool))
+def test_extract(tmp_path, worker_pool, extract_exe):
+    asset_store, extract_dir = extract_exe(tmp_path, FILES, worker_pool=worker_pool)
+
+    for filepath, data in FILES.items():
+        assert (extract_dir / filepath).read_bytes() == data
+    # Buffers are released once each asset is written.
+    assert all(asset.data is None for asset in asset_store.assets)
+
+    # Timings from worker processes are merged in to the store's.
+    timings = asset_store.timings
+    assert timings.stages["write"].count == len(FILES)
+    assert timings.stages["decompress"].bytes_out == sum(map(len, FILES.values()))
+    assert set(timings.assets) == set(FILES)
+
+
+def test_extract_with_tiny_budget_hashes_strings(tmp_path, extract_exe):
+    files = {
+        **FILES,
+        "strings00.str": b"# Section\nHello\nWorld\n",
+        "strings01.str": b"# Section\nHallo\nWelt\n",
+    }
+    _, extract_dir = extract_exe(tmp_path, files, max_in_flight_bytes=1)
+
+    for filepath, data in files.items():
+        assert (extract_dir / filepath).read_bytes() == data
+    hashed = (extract_dir / "strings01_hashed.str").read_text().splitlines()
+    assert hashed[0] == "# Section"
+    assert hashed[1].endswith(": Hallo")
+
+
+def test_incremental_extract_only_refreshes_changed(tmp_path, extract_exe):
+    asset_store, extract_dir = extract_exe(tmp_path, FILES, incremental=True)
+    assert (tmp_path / ".compressed" / "Extracted" / ExtractManifest.FILENAME).exists()
+
+    # Changing the size of one asset changes the bundle key, and so the
+    # encrypted bytes of every asset.
+    changed = {**FILES, "Data/Levels/abzu.lvl": b"\\?abzu2\n" * 200}
+    asset_store, extract_dir = extract_exe(tmp_path, changed, incremental=True)
+
+    manifest = asset_store.extract_manifest
+    assert manifest.refreshed == ["Data/Levels/abzu.lvl"]
+    assert manifest.reused == ["Data/Fonts/fontdebug.fnb"]
+    assert set(manifest.entries) == set(FILES)
+    for filepath, data in changed.items():
+        assert (extract_dir / filepath).read_bytes() == data
+
+    # Extract the same exe again, nothing should be rewritten.
+    (extract_dir / "Data/Levels/abzu.lvl").touch()
+    mtime = (extract_dir / "Data/Levels/abzu.lvl").stat().st_mtime_ns
+    asset_store, _ = extract_exe(tmp_path, changed, incremental=True)
+    assert len(asset_store.extract_manifest.reused) == len(FILES)
+    assert (extract_dir / "Data/Levels/abzu.lvl").stat().st_mtime_ns == mtime
+
+    # An edit that keeps the size is still noticed.
+    (extract_dir / "Data/Levels/abzu.lvl").write_bytes(b"\\?abzu3\n" * 200)
+    asset_store, _ = extract_exe(tmp_path, changed, incremental=True)
+    assert asset_store.extract_manifest.refreshed == ["Data/Levels/abzu.lvl"]
+    assert (extract_dir / "Data/Levels/abzu.lvl").read_bytes() == (
+        changed["Data/Levels/abzu.lvl"]
+    )
+
+
+def read_bundle(exe_path):
+    with exe_path.open("rb") as exe:
+        asset_store = AssetStore.load_from_file(exe)
+        end = AssetStore.BUNDLE_OFFSET + asset_store.total_size + 8
+        asset_store.close_mapping()
+    return exe_path.read_bytes()[:end]
+
+
+def test_incremental_repackage_matches_full(tmp_path, extract_exe, repackage_exe):
+    mods_dir = tmp_path / "Mods"
+    mods_dir.mkdir()
+    extract_exe(mods_dir, FILES)
+    source_exe = mods_dir / "Spel2.exe"
+    pack_dir = mods_dir / "Packs" / "mod"
+    pack_dir.mkdir(parents=True)
+
+    dest_exe = tmp_path / "Spel2.exe"
+    dest_exe.write_bytes(source_exe.read_bytes())
+    repackage_exe(dest_exe, pack_dir, mods_dir, incremental=False)
+    packed = read_bundle(dest_exe)
+
+    # Nothing changed, so nothing should be rewritten.
+    asset_store = repackage_exe(dest_exe, pack_dir, mods_dir, incremental=True)
+    assert read_bundle(dest_exe) == packed
+    assert "write" not in asset_store.timings.stages
+    assert [asset.filepath for asset in asset_store.assets] == list(FILES)
+
+    # A modded file should give the same bundle as a full repack.
+    (pack_dir / "fontdebug.fnb").write_bytes(bytes(range(256)) * 4)
+    repackage_exe(dest_exe, pack_dir, mods_dir, incremental=True)
+
+    full_exe = tmp_path / "full.exe"
+    full_exe.write_bytes(source_exe.read_bytes())
+    asset_store = repackage_exe(full_exe, pack_dir, mods_dir, incremental=False)
+    assert asset_store.timings.stages["write"].count == len(FILES)
+    assert read_bundle(dest_exe) == read_bundle(full_exe)
+    assert read_bundle(dest_exe) != packed
+
+
+def test_repackage_missing_asset_closes_mapping(tmp_path, extract_exe):
+    mods_dir = tmp_path / "Mods"
+    mods_dir.mkdir()
+    extract_exe(mods_dir, FILES)
+    (mods_dir / "Extracted" / "Data/Fonts/fontdebug.fnb").unlink()
+
+    with (mods_dir / "Spel2.exe").open("rb+") as exe:
+        asset_store = AssetStore.load_from_file(exe)
+        with pytest.raises(MissingAsset):
+            asset_store.repackage([], mods_dir / "Extracted", mods_dir / ".compressed")
+        assert asset_store.data_source is exe
+
+
+def test_incremental_repackage_reuses_prefix(tmp_path, extract_exe, repackage_exe):
+    # The soundbank isn't encrypted, so changing its contents but not its size
+    # keeps the bundle key and every block before it.
+    files = {**FILES, "soundbank.strings.bank": b"strings!" * 64}
+    mods_dir = tmp_path / "Mods"
+    mods_dir.mkdir()
+    extract_exe(mods_dir, files)
+    source_exe = mods_dir / "Spel2.exe"
+    pack_dir = mods_dir / "Packs" / "mod"
+    pack_dir.mkdir(parents=True)
+
+    dest_exe = tmp_path / "Spel2.exe"
+    dest_exe.write_bytes(source_exe.read_bytes())
+    repackage_exe(dest_exe, pack_dir, mods_dir, incremental=False)
+
+    (pack_dir / "soundbank.strings.bank").write_bytes(b"STRINGS!" * 64)
+    asset_store = repackage_exe(dest_exe, pack_dir, mods_dir, incremental=True)
+    rewritten = [
+        filepath
+        for filepath, stages in asset_store.timings.assets.items()
+        if "write" in stages
+    ]
+    assert rewritten == ["soundbank.strings.bank"]
+    assert "encrypt" not in asset_store.timings.stages
+
+    # The same as packing a fresh copy of the source exe, padding included.
+    full_exe = tmp_path / "full.exe"
+    full_exe.write_bytes(source_exe.read_bytes())
+    repackage_exe(full_exe, pack_dir, mods_dir, incremental=False)
+    assert read_bundle(dest_exe) == read_bundle(full_exe)
+
+
+def test_compress_failure_in_worker_is_logged(tmp_path, caplog):
+    asset_path = tmp_path / "abzu.lvl"
+    asset_path.write_bytes(b"abzu\n" * 100)
+    exe_asset = make_asset(b"abzu")
+    exe_asset.filepath = "Data/Levels/abzu.lvl"
+    # Asset data can't be pickled, so this never reaches the worker.
+    exe_asset.data = memoryview(b"abzu")
+    disk_asset = DiskAsset(asset_path, tmp_path / ".compressed", exe_asset)
+    disk_bundle = DiskBundle({"abzu.lvl": disk_asset})
+
+    disk_bundle.compress_if_needed(max_workers=1, worker_pool=WorkerPool.PROCESS)
+    assert "Failed compressing" in caplog.text
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from modlunky2.assets.chacha import (
+    KEYSTREAM_CHUNK_SIZE,
+    chacha,
+    chacha_rest,
+    chacha_rest_range,
+    hash_filepath,
+    hash_filepaths,
+    sxor,
+)
+from modlunky2.assets.constants import KNOWN_FILEPATHS
+from modlunky2.assets.reference import chacha_rest_bytewise, sxor_bytewise
+from modlunky2.assets.synthetic import random_bytes
+
+
+@pytest.mark.parametrize(
+    "size",
+    [0, 1, 0x3F, 0x40, 0x41, 0x1000 + 0x17, KEYSTREAM_CHUNK_SIZE + 0x40 + 5],
+)
+def test_chacha_rest_matches_bytewise(size):
+    rng = random.Random(size)
+    data = random_bytes(rng, size)
+    key = random_bytes(rng, 0x40)
+
+    assert chacha_rest(data, key) == chacha_rest_bytewise(data, key)
+
+
+def test_sxor_truncates_to_shorter():
+    assert sxor(b"\x01\x02\x03", b"\xff\xff") == sxor_bytewise(
+        b"\x01\x02\x03", b"\xff\xff"
+    )
+    assert sxor(b"", b"\x01") == b""
+
+
+def test_chacha_roundtrip():
+    data = random_bytes(random.Random(0), 0x1234)
+    for version, key in (("v1", None), ("v2", 0x1234ABCD)):
+        encrypted = chacha(b"Data/Textures/items.png", data, key, version)
+        assert encrypted != data
+        assert chacha(b"Data/Textures/items.png", encrypted, key, version) == data
+
+
+def test_hash_filepath_versions_differ():
+    filepath = b"Data/Levels/abzu.lvl"
+    assert len(hash_filepath(filepath, version="v1")) == len(filepath)
+    assert hash_filepath(filepath, version="v1") != hash_filepath(filepath, 1)
+
+
+@pytest.mark.parametrize("version,key", [("v1", None), ("v2", 0x9E6C63D0676A9A99)])
+def test_hash_filepaths_matches_single(version, key):
+    filepaths = [filepath.encode() for filepath in KNOWN_FILEPATHS]
+    # Cover empty and multi-partial filepaths too.
+    filepaths += [b"", b"a" * 0x40, b"b" * 0x41, b"c" * 0x90]
+
+    assert hash_filepaths(filepaths, key, version) == [
+        hash_filepath(filepath, key, version) for filepath in filepaths
+    ]
+
+
+@pytest.mark.parametrize("size", [0x3F, 0x40, 0x1000 + 0x17])
+def test_chacha_rest_range_matches_whole(size):
+    rng = random.Random(size)
+    data = random_bytes(rng, size)
+    key = random_bytes(rng, 0x40)
+    expected = chacha_rest(data, key)
+
+    for _ in range(20):
+        start = rng.randrange(size)
+        end = rng.randrange(start, size + 1)
+        assert chacha_rest_range(data[start:end], key, start, size) == (
+            expected[start:end]
+        )
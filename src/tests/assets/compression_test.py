@@ -0,0 +1,42 @@
+import os
+import threading
+
+import zstandard as zstd
+
+from modlunky2.assets.compression import (
+    MULTITHREAD_MIN_SIZE,
+    compress,
+    decompress,
+    get_compressor,
+    threads_per_worker,
+)
+
+
+def test_compress_roundtrip():
+    small = b"\\?abzu\n" * 100
+    large = bytes(range(256)) * (MULTITHREAD_MIN_SIZE // 256 + 1)
+
+    for data in (small, large):
+        compressed = compress(data, level=3)
+        # The game relies on the frame header recording the size.
+        assert zstd.frame_content_size(compressed) == len(data)
+        assert decompress(compressed) == data
+
+
+def test_compressors_are_reused_per_thread():
+    compressor = get_compressor(level=3)
+    assert get_compressor(level=3) is compressor
+    assert get_compressor(level=4) is not compressor
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_compressor(level=3)))
+    thread.start()
+    thread.join()
+    assert other[0] is not compressor
+
+
+def test_threads_per_worker_shares_cores():
+    cores = os.cpu_count() or 1
+    assert threads_per_worker(cores) == 0
+    assert threads_per_worker(1) * 1 <= cores
+    assert threads_per_worker(2) * 2 <= cores
@@ -0,0 +1,49 @@
+import pytest
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.synthetic import build_synthetic_exe
+
+
+def extract_exe(tmp_path, files, **kwargs):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(build_synthetic_exe(files))
+    extract_dir = tmp_path / "Extracted"
+    compressed_dir = tmp_path / ".compressed" / "Extracted"
+    for filepath in files:
+        (extract_dir / filepath).parent.mkdir(parents=True, exist_ok=True)
+        (compressed_dir / filepath).parent.mkdir(parents=True, exist_ok=True)
+
+    with exe_path.open("rb") as exe:
+        asset_store = AssetStore.load_from_file(exe)
+        kwargs.setdefault("create_entity_sheets", False)
+        unextracted = asset_store.extract(
+            extract_dir, compressed_dir, max_workers=2, **kwargs
+        )
+        asset_store.close_mapping()
+
+    assert not unextracted
+    return asset_store, extract_dir
+
+
+def repackage_exe(exe_path, pack_dir, mods_dir, incremental):
+    with exe_path.open("rb+") as exe:
+        asset_store = AssetStore.load_from_file(exe)
+        asset_store.repackage(
+            [pack_dir],
+            mods_dir / "Extracted",
+            mods_dir / ".compressed",
+            incremental=incremental,
+        )
+    return asset_store
+
+
+@pytest.fixture(name="extract_exe")
+def fixture_extract_exe():
+    """Builds a synthetic exe of `files` in a dir and extracts it there."""
+    return extract_exe
+
+
+@pytest.fixture(name="repackage_exe")
+def fixture_repackage_exe():
+    """Repackages an exe from a pack dir and the mods dir it was extracted to."""
+    return repackage_exe
@@ -0,0 +1,32 @@
+from io import BytesIO
+
+from PIL import Image
+
+from modlunky2.assets.converters import dds_to_png, png_to_dds
+from modlunky2.assets.reference import png_to_dds_pixelwise
+from modlunky2.assets.synthetic import random_rgba_image
+
+
+def test_png_to_dds_golden():
+    img = Image.new("RGBA", (2, 1))
+    img.putdata([(255, 255, 255, 0), (1, 2, 3, 4)])
+
+    data = png_to_dds(img)
+    assert data[:4] == b"DDS "
+    assert len(data) == 128 + 2 * 4
+    assert data[128:] == bytes([0, 0, 0, 0, 1, 2, 3, 4])
+
+
+def test_png_to_dds_matches_pixelwise():
+    img = random_rgba_image(67, 45)
+    assert png_to_dds(img) == png_to_dds_pixelwise(img)
+
+    rgb = img.convert("RGB")
+    assert png_to_dds(rgb) == png_to_dds_pixelwise(rgb)
+
+
+def test_png_to_dds_roundtrip():
+    img = random_rgba_image(16, 16)
+    png = Image.open(BytesIO(dds_to_png(png_to_dds(img))))
+    for original, converted in zip(img.getdata(), png.convert("RGBA").getdata()):
+        assert converted == (original if original[3] else (0, 0, 0, 0))
@@ -0,0 +1,37 @@
+import os
+
+from modlunky2.assets.hashing import FingerprintCache, md5sum_path
+
+
+def test_fingerprint_cache_skips_unchanged(tmp_path):
+    path = tmp_path / "items.png"
+    path.write_bytes(b"original")
+
+    cache = FingerprintCache.load(tmp_path)
+    assert cache.md5sum(path) == md5sum_path(path)
+    assert cache.md5sum(path) == md5sum_path(path)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Same size, but a different mtime.
+    path.write_bytes(b"modified")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.md5sum(path) == md5sum_path(path)
+    assert cache.misses == 2
+
+
+def test_fingerprint_cache_persists_and_invalidates(tmp_path):
+    path = tmp_path / "items.png"
+    path.write_bytes(b"original")
+
+    cache = FingerprintCache.load(tmp_path)
+    cache.md5sum(path)
+    cache.save()
+
+    cache = FingerprintCache.load(tmp_path)
+    assert cache.md5sum(path) == md5sum_path(path)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    cache.invalidate()
+    assert not (tmp_path / FingerprintCache.FILENAME).exists()
+    assert not FingerprintCache.load(tmp_path).entries
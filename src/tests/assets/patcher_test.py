@@ -0,0 +1,89 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from modlunky2.assets.patcher import (
+    CHECKSUM_PATCH_REPLACE,
+    EXE_SCANNER,
+    RELEASE_AOB_PRODUCTION,
+    RELEASE_AOB_REPLACE,
+    Patcher,
+    Signature,
+    SignatureScanner,
+)
+from modlunky2.utils import is_patched
+
+CHECKSUM_CHECK = bytes.fromhex("48 3B C1 74 09 33 C9 FF 15 12 34 56 78 CC")
+
+
+def make_exe(checksum_offset, release_offset, size):
+    exe = bytearray(os.urandom(size))
+    # Random bytes could contain a stray anchor, clear the obvious one.
+    exe = exe.replace(b"\x48\x3B\xC1", b"\x00\x00\x00")
+    exe[checksum_offset : checksum_offset + 14] = CHECKSUM_CHECK
+    exe[release_offset : release_offset + 12] = RELEASE_AOB_PRODUCTION
+    return bytes(exe)
+
+
+def test_signature_from_aob():
+    signature = Signature.from_aob("test", "FF ?? 0a ?? ??")
+    assert signature.aob == (0xFF, None, 0x0A, None, None)
+    assert signature.anchor == (0, b"\xFF")
+    assert signature.matches(b"\x00\xFF\x01\x0A\x02\x03", 1)
+    assert not signature.matches(b"\x00\xFF\x01\x0B\x02\x03", 1)
+    # Wildcards still have to be inside the buffer
+    assert not signature.matches(b"\x00\xFF\x01\x0A\x02", 1)
+
+
+def test_signature_without_fixed_bytes():
+    with pytest.raises(ValueError):
+        _ = Signature.from_aob("test", "?? ??").anchor
+
+
+def test_scan_across_windows(monkeypatch):
+    monkeypatch.setattr(SignatureScanner, "WINDOW_SIZE", 64)
+    scanner = SignatureScanner(
+        [
+            Signature.from_aob("wild", "AA ?? BB CC DD"),
+            Signature.from_aob("fixed", "01 02 03 04"),
+            Signature.from_aob("missing", "01 02 03 05"),
+        ]
+    )
+    # Anchors straddling the window boundary and a false candidate first.
+    buffer = bytearray(256)
+    buffer[10:15] = b"\xAA\x00\xBB\xCC\x00"
+    buffer[62:67] = b"\xAA\x00\xBB\xCC\xDD"
+    buffer[126:130] = b"\x01\x02\x03\x04"
+
+    assert scanner.scan(bytes(buffer)) == {"wild": 62, "fixed": 126, "missing": -1}
+
+
+def test_patch_file(tmp_path):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(make_exe(0x2345, 0x10001, 0x20000))
+
+    assert not is_patched(exe_path)
+    assert EXE_SCANNER.scan_file(exe_path) == {"checksum": 0x2345, "release": 0x10001}
+
+    # Patching can happen within the mtime resolution of the scan above.
+    with exe_path.open("rb+") as exe:
+        patcher = Patcher(exe)
+        assert patcher.patch_checksum()
+        assert patcher.patch_release()
+        assert patcher.is_checksum_patched()
+
+    assert is_patched(exe_path)
+    data = exe_path.read_bytes()
+    assert data[0x2345 : 0x2345 + 14] == CHECKSUM_PATCH_REPLACE
+    assert data[0x10001 : 0x10001 + 12] == RELEASE_AOB_REPLACE
+
+
+def test_patch_unnamed_handle():
+    exe = BytesIO(make_exe(0x100, 0x200, 0x400))
+    patcher = Patcher(exe)
+    assert not patcher.is_checksum_patched()
+    assert patcher.patch_checksum()
+    assert patcher.patch_release()
+    assert patcher.is_checksum_patched()
+    assert not patcher.patch_release()
@@ -0,0 +1,129 @@
+import shutil
+
+import pytest
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.constants import DDS_PNGS, KNOWN_FILEPATHS
+from modlunky2.assets.patcher import EXE_SCANNER
+from modlunky2.assets.synthetic import build_synthetic_exe, synthetic_files
+
+pytest.importorskip("pytest_benchmark")
+
+# Every asset the game has, at a fraction of the size.
+SIZES = {".DDS": 16 * 1024, ".lvl": 16 * 1024}
+
+# Timings on shared CI runners are too noisy to fail the normal test run on,
+# so these only run when asked for.
+benchmark_only = pytest.mark.skipif(
+    "not (config.getoption('benchmark_enable') or config.getoption('benchmark_only'))",
+    reason="Timing benchmark, run with --benchmark-enable",
+)
+
+# Generous upper bounds on the mean time of each benchmark. They're meant to
+# catch large regressions, e.g. going back to reading assets one by one or
+# scanning the exe byte by byte, not small changes in speed.
+LOAD_THRESHOLD = 0.5
+EXTRACT_THRESHOLD = 10.0
+REPACKAGE_THRESHOLD = 10.0
+SCAN_THRESHOLD = 0.5
+
+
+def assert_faster_than(benchmark, seconds):
+    # With --benchmark-disable the function runs once and no stats are kept.
+    if benchmark.disabled:
+        return
+    assert benchmark.stats.stats.mean < seconds
+
+
+@pytest.fixture(name="files", scope="module")
+def fixture_files():
+    return synthetic_files(sizes=SIZES)
+
+
+@pytest.fixture(name="exe_data", scope="module")
+def fixture_exe_data(files):
+    return build_synthetic_exe(files, patch_signatures=True)
+
+
+def test_synthetic_files_are_extractable():
+    files = synthetic_files(filepaths=["Data/Textures/items.DDS", "strings00.str"])
+    assert "Data/Textures/items.DDS" in DDS_PNGS
+    assert files["Data/Textures/items.DDS"].startswith(b"DDS ")
+    assert len(synthetic_files(3)) == 3
+    assert list(synthetic_files(3)) == KNOWN_FILEPATHS[:3]
+
+    sized = synthetic_files(filepaths=["strings00.str"], asset_size=1000)
+    assert len(sized["strings00.str"]) == 1000
+
+
+@benchmark_only
+def test_load_from_file(benchmark, tmp_path, files, exe_data):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(exe_data)
+
+    def load():
+        with exe_path.open("rb") as exe:
+            asset_store = AssetStore.load_from_file(exe)
+            asset_store.close_mapping()
+        return asset_store
+
+    asset_store = benchmark(load)
+    assert [asset.filepath for asset in asset_store.assets] == list(files)
+    assert_faster_than(benchmark, LOAD_THRESHOLD)
+
+
+@benchmark_only
+def test_extract(benchmark, tmp_path, files, extract_exe):
+    def setup():
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir()
+
+    asset_store, extract_dir = benchmark.pedantic(
+        extract_exe, args=(tmp_path, files), setup=setup, rounds=3
+    )
+    assert len(asset_store.assets) == len(files)
+    assert (extract_dir / "Data/Textures/base_eggship.png").exists()
+    assert_faster_than(benchmark, EXTRACT_THRESHOLD)
+
+
+@benchmark_only
+def test_repackage(benchmark, tmp_path, files, extract_exe, repackage_exe):
+    mods_dir = tmp_path / "Mods"
+    mods_dir.mkdir()
+    extract_exe(mods_dir, files)
+    pack_dir = mods_dir / "Packs" / "mod"
+    pack_dir.mkdir(parents=True)
+    (pack_dir / "abzu.lvl").write_bytes(b"\\?abzu\n" * 100)
+    source_exe = mods_dir / "Spel2.exe"
+    dest_exe = tmp_path / "Spel2.exe"
+
+    def setup():
+        shutil.copyfile(source_exe, dest_exe)
+
+    asset_store = benchmark.pedantic(
+        repackage_exe,
+        args=(dest_exe, pack_dir, mods_dir, False),
+        setup=setup,
+        rounds=3,
+    )
+    assert len(asset_store.assets) == len(files)
+    assert_faster_than(benchmark, REPACKAGE_THRESHOLD)
+
+
+@benchmark_only
+def test_signature_scan(benchmark, exe_data):
+    found = benchmark(EXE_SCANNER.scan, exe_data)
+    assert set(found) == {"checksum", "release"}
+    assert all(offset > AssetStore.BUNDLE_OFFSET for offset in found.values())
+    assert_faster_than(benchmark, SCAN_THRESHOLD)
+
+
+@benchmark_only
+def test_signature_scan_file_is_cached(benchmark, tmp_path, exe_data):
+    exe_path = tmp_path / "Spel2.exe"
+    exe_path.write_bytes(exe_data)
+    expected = EXE_SCANNER.scan(exe_data)
+
+    assert benchmark(EXE_SCANNER.scan_file, exe_path) == expected
+    # A cache hit is only a stat of the file.
+    assert_faster_than(benchmark, SCAN_THRESHOLD / 100)
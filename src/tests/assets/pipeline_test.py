@@ -0,0 +1,35 @@
+from threading import Thread
+
+import pytest
+
+from modlunky2.assets.pipeline import ByteBudget
+
+
+def test_byte_budget_blocks_until_released():
+    budget = ByteBudget(10)
+    budget.acquire(6)
+
+    acquired = []
+    thread = Thread(target=lambda: acquired.append(budget.acquire(6)))
+    thread.start()
+    thread.join(timeout=0.1)
+    assert not acquired
+
+    budget.release(6)
+    thread.join(timeout=5)
+    assert acquired
+    assert budget.in_flight == 6
+    assert budget.peak == 6
+
+
+def test_byte_budget_allows_oversized_when_idle():
+    budget = ByteBudget(10)
+    budget.acquire(100)
+    assert budget.in_flight == 100
+    budget.release(100)
+    assert budget.in_flight == 0
+
+
+def test_byte_budget_rejects_empty():
+    with pytest.raises(ValueError):
+        ByteBudget(0)
@@ -0,0 +1,98 @@
+from PIL import Image
+
+from modlunky2.assets.constants import FAST_PNG_COMPRESS_LEVEL
+from modlunky2.assets.converters import png_to_dds
+from modlunky2.assets.png_optimizer import OptimizeManifest, optimize_extracted_pngs
+from modlunky2.assets.pipeline import WorkerPool
+
+TEXTURE = "Data/Textures/base_eggship.DDS"
+TEXTURE_PNG = "Data/Textures/base_eggship.png"
+
+
+def make_texture():
+    # Stripes compress a lot better at higher levels.
+    img = Image.new("RGBA", (256, 256))
+    img.putdata(
+        [
+            (x % 7 * 30, y % 5 * 50, (x * y) % 256, 255)
+            for y in range(256)
+            for x in range(256)
+        ]
+    )
+    return img
+
+
+def test_fast_pngs_are_optimized(tmp_path, extract_exe):
+    img = make_texture()
+    files = {TEXTURE: png_to_dds(img), "Data/Levels/abzu.lvl": b"abzu\n" * 100}
+    asset_store, extract_dir = extract_exe(
+        tmp_path,
+        files,
+        incremental=True,
+        recompress=True,
+        png_compress_level=FAST_PNG_COMPRESS_LEVEL,
+    )
+    compressed_dir = tmp_path / ".compressed" / "Extracted"
+    fast_size = (extract_dir / TEXTURE_PNG).stat().st_size
+
+    assert (
+        optimize_extracted_pngs(
+            extract_dir, compressed_dir, max_workers=2, worker_pool=WorkerPool.THREAD
+        )
+        == 1
+    )
+    png_path = extract_dir / TEXTURE_PNG
+    assert png_path.stat().st_size < fast_size
+    with Image.open(png_path) as optimized:
+        assert optimized.convert("RGBA").tobytes() == img.tobytes()
+    assert (compressed_dir / OptimizeManifest.FILENAME).exists()
+
+    # Nothing is optimized twice
+    assert (
+        optimize_extracted_pngs(
+            extract_dir, compressed_dir, worker_pool=WorkerPool.THREAD
+        )
+        == 0
+    )
+
+    # The optimized file is still seen as extracted from the same asset
+    asset_store, _ = extract_exe(
+        tmp_path,
+        files,
+        incremental=True,
+        recompress=True,
+        png_compress_level=FAST_PNG_COMPRESS_LEVEL,
+    )
+    assert sorted(asset_store.extract_manifest.reused) == sorted(files)
+
+
+def test_optimized_sources_keep_merged_sheets_current(tmp_path, extract_exe):
+    # Only the ghosts are merged from this sheet alone, the other mergers
+    # fail for lack of sources.
+    files = {"Data/Textures/monsters_ghost.DDS": png_to_dds(make_texture())}
+    compressed_dir = tmp_path / ".compressed" / "Extracted"
+    asset_store, extract_dir = extract_exe(
+        tmp_path,
+        files,
+        incremental=True,
+        create_entity_sheets=True,
+        png_compress_level=FAST_PNG_COMPRESS_LEVEL,
+    )
+    merged = asset_store.merge_cache.merged
+    assert merged and all(stem.startswith("ghost") for stem in merged)
+
+    assert (
+        optimize_extracted_pngs(
+            extract_dir, compressed_dir, worker_pool=WorkerPool.THREAD
+        )
+        == 1
+    )
+    asset_store, _ = extract_exe(
+        tmp_path,
+        files,
+        incremental=True,
+        create_entity_sheets=True,
+        png_compress_level=FAST_PNG_COMPRESS_LEVEL,
+    )
+    assert sorted(asset_store.merge_cache.reused) == sorted(merged)
+    assert not asset_store.merge_cache.merged
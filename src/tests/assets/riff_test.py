@@ -0,0 +1,52 @@
+import pytest
+
+from modlunky2.assets.riff import RIFFIndex
+from modlunky2.assets.synthetic import build_riff_chunk
+
+
+def make_riff():
+    chunks = build_riff_chunk(b"FMT ", b"abc")
+    chunks += build_riff_chunk(
+        b"LIST",
+        b"PROJ" + build_riff_chunk(b"ONE ", b"1") + build_riff_chunk(b"TWO ", b"22"),
+    )
+    chunks += build_riff_chunk(b"SND ", b"sound")
+    return build_riff_chunk(b"RIFF", b"FEV " + chunks)
+
+
+def test_index():
+    riff = RIFFIndex(make_riff())
+
+    assert riff.type == b"FEV "
+    assert [(entry.name, entry.parent) for entry in riff] == [
+        (b"RIFF", -1),
+        (b"FMT ", 0),
+        (b"LIST", 0),
+        (b"ONE ", 2),
+        (b"TWO ", 2),
+        (b"SND ", 0),
+    ]
+    assert riff[2].type == b"PROJ"
+    assert riff.children() == [1, 2, 5]
+    assert riff.children(2) == [3, 4]
+    # Odd sized chunks are padded, which doesn't show up in the payload.
+    assert bytes(riff.payload(1)) == b"abc"
+    assert bytes(riff.payload(3)) == b"1"
+    assert bytes(riff.payload(5)) == b"sound"
+
+
+def test_payload_is_a_view():
+    data = bytearray(make_riff())
+    riff = RIFFIndex(data)
+    payload = riff.payload(5)
+    data[riff[5].offset] = ord("S")
+    assert bytes(payload) == b"Sound"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"RIFX\x04\x00\x00\x00FEV ", b"RIFF\x10\x00\x00\x00FEV ", make_riff()[:-3]],
+)
+def test_invalid(data):
+    with pytest.raises(ValueError):
+        RIFFIndex(data)
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from modlunky2.assets.assets import DiskBundle
+from modlunky2.assets.exc import MultipleMatchingAssets
+from modlunky2.assets.scan_index import ScanIndex
+
+# Far enough in the past that listings aren't considered racy.
+OLD_MTIME_NS = 1_000_000_000 * 1_000_000_000
+
+
+def make_tree(mods_dir):
+    pack_dir = mods_dir / "Packs" / "mod"
+    (pack_dir / "Data" / "Levels").mkdir(parents=True)
+    (pack_dir / ".compressed").mkdir()
+    (pack_dir / "Data" / "Levels" / "abzu.lvl").write_bytes(b"abzu")
+    (pack_dir / "items.png").write_bytes(b"png")
+    (pack_dir / "notes.txt").write_bytes(b"not an asset")
+    (pack_dir / ".compressed" / "dwellingarea.lvl").write_bytes(b"compressed")
+    (mods_dir / ".compressed").mkdir()
+    age_dirs(mods_dir)
+    return pack_dir
+
+
+def age_dirs(top, mtime_ns=OLD_MTIME_NS):
+    for root, _, _ in os.walk(top):
+        os.utime(root, ns=(mtime_ns, mtime_ns))
+
+
+def test_matches_walk(tmp_path):
+    pack_dir = make_tree(tmp_path)
+    scan_index = ScanIndex.load(tmp_path / ".compressed")
+
+    expected = DiskBundle.get_files_from_search_dir(pack_dir)
+    assert set(expected) == {"abzu.lvl", "items.png"}
+    assert DiskBundle.get_files_from_search_dir(pack_dir, scan_index) == expected
+    assert scan_index.relative_path(expected["abzu.lvl"]) == (
+        expected["abzu.lvl"].relative_to(tmp_path)
+    )
+
+    (pack_dir / "abzu.lvl").write_bytes(b"duplicate")
+    with pytest.raises(MultipleMatchingAssets):
+        DiskBundle.get_files_from_search_dir(pack_dir, scan_index)
+
+
+def test_unchanged_dirs_are_not_listed_again(tmp_path):
+    pack_dir = make_tree(tmp_path)
+    scan_index = ScanIndex.load(tmp_path / ".compressed")
+    first = list(scan_index.files(pack_dir))
+    assert scan_index.misses == 3
+    scan_index.save()
+
+    scan_index = ScanIndex.load(tmp_path / ".compressed")
+    assert list(scan_index.files(pack_dir)) == first
+    assert (scan_index.hits, scan_index.misses) == (3, 0)
+
+    # Only the changed directory is listed again.
+    levels_dir = pack_dir / "Data" / "Levels"
+    (levels_dir / "dwellingarea.lvl").write_bytes(b"dwelling")
+    age_dirs(levels_dir, OLD_MTIME_NS + 1)
+    scan_index = ScanIndex.load(tmp_path / ".compressed")
+    assert len(list(scan_index.files(pack_dir))) == len(first) + 1
+    assert (scan_index.hits, scan_index.misses) == (2, 1)
+
+
+def test_recent_changes_and_removed_dirs(tmp_path):
+    pack_dir = make_tree(tmp_path)
+    scan_index = ScanIndex(tmp_path / ScanIndex.FILENAME, tmp_path.resolve())
+    list(scan_index.files(pack_dir))
+
+    # A directory changed just now is listed every time, its mtime could
+    # still change without it.
+    (pack_dir / "Data" / "Levels" / "dwellingarea.lvl").write_bytes(b"dwelling")
+    for _ in range(2):
+        assert pack_dir / "Data" / "Levels" / "dwellingarea.lvl" in set(
+            scan_index.files(pack_dir)
+        )
+    assert scan_index.misses == 5
+
+    (pack_dir / "Data" / "Levels" / "dwellingarea.lvl").unlink()
+    (pack_dir / "Data" / "Levels" / "abzu.lvl").unlink()
+    (pack_dir / "Data" / "Levels").rmdir()
+    (pack_dir / "Data").rmdir()
+    assert list(scan_index.files(pack_dir)) == [pack_dir / "items.png"]
+    assert set(scan_index.entries) == {str(pack_dir)}
+
+
+def test_invalidate(tmp_path):
+    pack_dir = make_tree(tmp_path)
+    scan_index = ScanIndex.load(tmp_path / ".compressed")
+    list(scan_index.files(pack_dir))
+    scan_index.save()
+    assert scan_index.path.exists()
+
+    scan_index.invalidate()
+    assert not scan_index.path.exists()
+    assert not scan_index.entries
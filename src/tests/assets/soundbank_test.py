@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from modlunky2.assets.soundbank import (
+    MANIFEST_FILENAME,
+    Extension,
+    extract_soundbank,
+)
+from modlunky2.assets.synthetic import build_synthetic_soundbank
+
+SAMPLE_DATA = [bytes(range(32)), bytes(range(32, 96))]
+
+
+def make_soundbank(samples):
+    return build_synthetic_soundbank([samples])
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_extract_soundbank(tmp_path, max_workers):
+    soundbank_path = tmp_path / "soundbank.bank"
+    soundbank_path.write_bytes(make_soundbank(SAMPLE_DATA))
+    dest_path = tmp_path / "soundbank"
+
+    extract_soundbank(
+        soundbank_path, dest_path, [Extension.WAV], max_workers=max_workers
+    )
+
+    wavs = sorted((dest_path / "wav").iterdir())
+    assert [wav.name for wav in wavs] == ["0000.wav", "0001.wav"]
+    for wav, data in zip(wavs, SAMPLE_DATA):
+        assert wav.read_bytes().endswith(data)
+    assert (dest_path / MANIFEST_FILENAME).exists()
+
+
+def test_extract_soundbank_skip_existing(tmp_path):
+    soundbank_path = tmp_path / "soundbank.bank"
+    soundbank_path.write_bytes(make_soundbank(SAMPLE_DATA))
+    dest_path = tmp_path / "soundbank"
+    extract_soundbank(soundbank_path, dest_path, [Extension.WAV])
+
+    first, second = dest_path / "wav" / "0000.wav", dest_path / "wav" / "0001.wav"
+    first.write_bytes(b"x" * first.stat().st_size)
+    second.write_bytes(b"truncated")
+    extract_soundbank(soundbank_path, dest_path, [Extension.WAV], skip_existing=True)
+
+    # Only the output with the wrong size is rebuilt.
+    assert first.read_bytes().startswith(b"x")
+    assert second.read_bytes().endswith(SAMPLE_DATA[1])
+
+
+def test_extract_soundbank_keeps_other_extensions(tmp_path):
+    soundbank_path = tmp_path / "soundbank.bank"
+    soundbank_path.write_bytes(make_soundbank(SAMPLE_DATA))
+    dest_path = tmp_path / "soundbank"
+    dest_path.mkdir()
+    ogg_entry = {"size": 10, "crc32": 1234}
+    (dest_path / MANIFEST_FILENAME).write_text(
+        json.dumps({"ogg/0000.ogg": ogg_entry, "wav/gone.wav": ogg_entry})
+    )
+
+    extract_soundbank(soundbank_path, dest_path, [Extension.WAV])
+
+    manifest = json.loads((dest_path / MANIFEST_FILENAME).read_text())
+    assert manifest["ogg/0000.ogg"] == ogg_entry
+    assert set(manifest) == {"ogg/0000.ogg", "wav/0000.wav", "wav/0001.wav"}
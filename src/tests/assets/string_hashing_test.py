@@ -0,0 +1,56 @@
+import zlib
+
+import pytest
+
+from modlunky2.assets.string_hashing import (
+    StringHashes,
+    hash_strings_dir,
+    main,
+)
+
+ENGLISH = "# Menu\nPlay\n#\nQuit\n".encode()
+GERMAN = "# Menu\nSpielen\n#\nBeenden\n".encode()
+
+
+def expected_hash(line):
+    return f"0x{zlib.crc32(line.encode()):08x}"
+
+
+def test_hashed_strings():
+    string_hashes = StringHashes.from_data(ENGLISH)
+    assert string_hashes.hashed_strings(GERMAN).decode().splitlines() == [
+        "# Menu",
+        f"{expected_hash('PlayMenu')}: Spielen",
+        "#",
+        f"{expected_hash('QuitMenu')}: Beenden",
+    ]
+    assert string_hashes.hashed_strings(b"Too short\n") is None
+
+
+def test_hash_strings_dir(tmp_path):
+    (tmp_path / "strings00.str").write_bytes(ENGLISH)
+    (tmp_path / "strings01.str").write_bytes(GERMAN)
+    (tmp_path / "strings02.str").write_bytes(b"Mismatched\n")
+    (tmp_path / "other.str").write_bytes(GERMAN)
+
+    assert hash_strings_dir(tmp_path, max_workers=2)
+    string_hashes = StringHashes.from_data(ENGLISH)
+    assert (tmp_path / "strings00_hashed.str").read_bytes() == (
+        string_hashes.hashed_strings(ENGLISH)
+    )
+    assert (tmp_path / "strings01_hashed.str").read_bytes() == (
+        string_hashes.hashed_strings(GERMAN)
+    )
+    assert not (tmp_path / "strings02_hashed.str").exists()
+    assert not (tmp_path / "other_hashed.str").exists()
+
+    # Hashed files aren't hashed again on a second run
+    assert hash_strings_dir(tmp_path)
+    assert not (tmp_path / "strings00_hashed_hashed.str").exists()
+
+
+def test_main_without_english_strings(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.argv", ["modlunky2-hash-strings", str(tmp_path)])
+    with pytest.raises(SystemExit) as err:
+        main()
+    assert err.value.code == 1
@@ -0,0 +1,38 @@
+import json
+
+from modlunky2.assets.timings import PipelineTimings
+
+
+def test_stage_records_time_and_bytes():
+    timings = PipelineTimings("extract")
+    with timings.stage("decrypt", "Data/Levels/abzu.lvl", bytes_in=10) as timer:
+        timer.bytes_out = 8
+    timings.record("decrypt", 1.5, "Data/Levels/dwelling.lvl", 20, 16)
+    timings.record("write", 0.5, "Data/Levels/abzu.lvl", 8, 8)
+
+    stats = timings.stages["decrypt"]
+    assert stats.count == 2
+    assert stats.seconds >= 1.5
+    assert (stats.bytes_in, stats.bytes_out) == (30, 24)
+    assert set(timings.assets["Data/Levels/abzu.lvl"]) == {"decrypt", "write"}
+    assert [row[0] for row in timings.summary_rows()] == ["decrypt", "write"]
+    assert timings.slowest_assets(1) == [("Data/Levels/dwelling.lvl", 1.5)]
+
+
+def test_merge_and_save(tmp_path):
+    worker = PipelineTimings("extract")
+    worker.record("convert", 2.0, "Data/Textures/items.DDS", 100, 50)
+    timings = PipelineTimings("extract")
+    timings.record("convert", 1.0, "Data/Textures/items.DDS", 100, 50)
+    timings.merge(worker.to_dict())
+    timings.finish()
+
+    assert timings.stages["convert"].count == 2
+    assert timings.assets["Data/Textures/items.DDS"] == {"convert": 3.0}
+
+    path = tmp_path / "timings.json"
+    timings.save(path)
+    data = json.loads(path.read_text())
+    assert data["version"] == PipelineTimings.VERSION
+    assert data["stages"]["convert"]["bytes_in"] == 200
+    assert data["wall_seconds"] is not None
@@ -0,0 +1,55 @@
+from PIL import Image
+
+
+def test_sheet_is_read_on_first_get(tmp_path, sheets, make_sheet):
+    # The sheet doesn't have to exist until it's needed.
+    loader = sheets.ColorSheet(tmp_path)
+    assert not loader.sheet_loaded
+    assert set(loader.key_map()) == {"red", "green", "blue", "green_blue"}
+
+    make_sheet(tmp_path / "colors.png")
+    assert loader.get("green").getpixel((0, 0)) == sheets.GREEN
+    assert loader.sheet_loaded
+    assert loader.cache_stats()["sheet_bytes"] == 48 * 16 * 4
+
+    loader.clear_cache()
+    assert not loader.sheet_loaded
+    assert loader.cache_stats()["cached_crops"] == 0
+
+
+def test_clear_cache_leaves_used_sheet_open(tmp_path, sheets, make_sheet):
+    make_sheet(tmp_path / "colors.png")
+    sheet = Image.open(tmp_path / "colors.png")
+    sheet.load()
+    loader = sheets.ColorSheet(tmp_path)
+    loader.use_sheet(sheet)
+    assert loader.get("blue").getpixel((0, 0)) == sheets.BLUE
+
+    loader.clear_cache()
+    assert not loader.sheet_loaded
+    # The sheet belongs to the caller, so it's still usable.
+    assert sheet.getpixel((0, 0)) == sheets.RED
+
+    # Without a sheet it reads its own again.
+    assert loader.get("green").getpixel((0, 0)) == sheets.GREEN
+    assert loader.sheet_loaded
+
+
+def test_crop_cache_is_bounded_by_bytes(tmp_path, sheets, make_sheet):
+    make_sheet(tmp_path / "colors.png")
+    loader = sheets.ColorSheet(tmp_path)
+    loader.crop_cache_bytes = 2 * 16 * 16 * 4
+
+    red = loader.get("red")
+    assert loader.get("red") is red
+    assert loader.get("missing") is None
+    assert loader.get("missing") is None
+    loader.get("green")
+    # Least recently used first, so red goes when blue is cached.
+    loader.get("blue")
+
+    stats = loader.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    assert stats["cached_bytes"] == 2 * 16 * 16 * 4
+    assert loader.get("red") is not red
+    assert loader.get("blue").getpixel((0, 0)) == sheets.BLUE
@@ -0,0 +1,13 @@
+from PIL import Image
+
+
+def test_grid_file(tmp_path, sheets, make_sheet):
+    make_sheet(tmp_path / "colors.png")
+    merger = sheets.WideMerger(tmp_path)
+    merger.do_merge([sheets.ColorSheet(tmp_path)])
+    merger.save()
+    with Image.open(tmp_path / "merged" / "wide_full_grid.png") as grid:
+        # Alternating colors, with the edge shared by two chunks drawn last
+        # by the second.
+        assert grid.getpixel((0, 0)) == sheets.RED
+        assert grid.getpixel((16, 8)) == sheets.BLUE
@@ -0,0 +1,132 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from modlunky2.assets.assets import AssetStore
+from modlunky2.assets.pipeline import WorkerPool
+from modlunky2.assets.timings import PipelineTimings
+from modlunky2.sprites.base_classes.base_sprite_loader import BaseSpriteLoader
+from modlunky2.sprites.base_classes.base_sprite_merger import BaseSpriteMerger
+
+RED = (255, 0, 0, 255)
+GREEN = (0, 255, 0, 255)
+BLUE = (0, 0, 255, 255)
+
+COLOR_CHUNKS = {
+    "red": (0, 0, 1, 1),
+    "green": (1, 0, 2, 1),
+    "blue": (2, 0, 3, 1),
+    "green_blue": (1, 0, 3, 1),
+}
+
+
+class ColorSheet(BaseSpriteLoader):
+    _sprite_sheet_path = Path("colors.png")
+    _chunk_size = 16
+    _chunk_map = COLOR_CHUNKS
+
+
+class DerivedColorSheet(ColorSheet):
+    _sprite_sheet_path = Path("derived.png")
+
+
+class OtherColorSheet(BaseSpriteLoader):
+    _sprite_sheet_path = Path("other_colors.png")
+    _chunk_size = 16
+    _chunk_map = COLOR_CHUNKS
+
+
+class MissingSheet(BaseSpriteLoader):
+    _sprite_sheet_path = Path("missing.png")
+    _chunk_size = 16
+    _chunk_map = {"gone": (0, 0, 1, 1)}
+
+
+class ColorMerger(BaseSpriteMerger):
+    _target_sprite_sheet_path = Path("merged/colors_full.png")
+    _grid_hint_size = 1
+    _origin_map = {ColorSheet: {"red": (0, 0, 1, 1), "blue": (1, 0, 2, 1)}}
+
+
+class BothMerger(BaseSpriteMerger):
+    _target_sprite_sheet_path = Path("merged/both_full.png")
+    _grid_hint_size = 1
+    _origin_map = {
+        ColorSheet: {"red": (0, 0, 1, 1)},
+        OtherColorSheet: {"blue": (0, 0, 1, 1)},
+    }
+
+
+class WideMerger(BaseSpriteMerger):
+    _target_sprite_sheet_path = Path("merged/wide_full.png")
+    _grid_hint_size = 2
+    _origin_map = {ColorSheet: {"red": (0, 0, 1, 1), "green_blue": (1, 0, 3, 1)}}
+
+
+def make_flipped_merger():
+    # Like the factories of full_sheets, which make classes that can't be
+    # pickled.
+    class _FlippedMerger(BaseSpriteMerger):
+        _target_sprite_sheet_path = Path("merged/flipped_full.png")
+        _grid_hint_size = 1
+        _origin_map = {ColorSheet: {"blue": (0, 0, 1, 1), "red": (1, 0, 2, 1)}}
+
+    return _FlippedMerger
+
+
+class MissingMerger(BaseSpriteMerger):
+    _target_sprite_sheet_path = Path("merged/missing_full.png")
+    _grid_hint_size = 1
+    _origin_map = {MissingSheet: {"gone": (0, 0, 1, 1)}}
+
+
+SHEETS = SimpleNamespace(
+    RED=RED,
+    GREEN=GREEN,
+    BLUE=BLUE,
+    ColorSheet=ColorSheet,
+    DerivedColorSheet=DerivedColorSheet,
+    OtherColorSheet=OtherColorSheet,
+    MissingSheet=MissingSheet,
+    ColorMerger=ColorMerger,
+    BothMerger=BothMerger,
+    WideMerger=WideMerger,
+    FlippedMerger=make_flipped_merger(),
+    MissingMerger=MissingMerger,
+)
+
+
+def make_sheet(path, colors=(RED, GREEN, BLUE), chunk_size=16):
+    sheet = Image.new("RGBA", (chunk_size * len(colors), chunk_size))
+    for idx, color in enumerate(colors):
+        sheet.paste(color, (idx * chunk_size, 0, (idx + 1) * chunk_size, chunk_size))
+    sheet.save(path)
+
+
+def merge_sheets(mergers, loaders, worker_pool=WorkerPool.THREAD, merge_cache=None):
+    timings = PipelineTimings("extract")
+    # pylint: disable=protected-access
+    AssetStore._merge_entity_sheets(
+        mergers, loaders, 2, worker_pool, timings, merge_cache
+    )
+    return timings
+
+
+@pytest.fixture(name="sheets")
+def fixture_sheets():
+    """Sprite loaders and mergers over one row of 16px chunks, and their colors."""
+    return SHEETS
+
+
+@pytest.fixture(name="make_sheet")
+def fixture_make_sheet():
+    """Saves a sheet of one row of chunks, each filled with one of `colors`."""
+    return make_sheet
+
+
+@pytest.fixture(name="merge_sheets")
+def fixture_merge_sheets():
+    """Merges entity sheets like an extract would, returning the timings."""
+    return merge_sheets
@@ -0,0 +1,54 @@
+import json
+import shutil
+
+from modlunky2.sprites.entity_chunks import GAME_DATA_DIR, EntityChunkManifest
+from modlunky2.sprites.util import chunks_from_json, target_chunks_from_json
+
+
+def load_game_data():
+    with (GAME_DATA_DIR / "entities.json").open("r", encoding="utf-8") as file_:
+        entities_json = json.load(file_)
+    with (GAME_DATA_DIR / "textures.json").open("r", encoding="utf-8") as file_:
+        textures_json = json.load(file_)
+    return entities_json, textures_json
+
+
+def test_shipped_manifest_is_current():
+    # Run modlunky2-compile-entity-chunks after changing the json.
+    manifest = EntityChunkManifest.read(GAME_DATA_DIR / EntityChunkManifest.FILENAME)
+    assert manifest is not None
+    assert manifest.source_digest == EntityChunkManifest.digest_sources(GAME_DATA_DIR)
+
+
+def test_matches_json():
+    entities_json, textures_json = load_game_data()
+    manifest = EntityChunkManifest.read(GAME_DATA_DIR / EntityChunkManifest.FILENAME)
+    for entity_name in list(entities_json) + ["ENT_TYPE_MISSING"]:
+        for chunk_size in (64, 128):
+            assert manifest.chunks(entity_name, chunk_size) == chunks_from_json(
+                entities_json, textures_json, entity_name, chunk_size
+            )
+    assert manifest.target_chunks(
+        "ENT_TYPE_MONS_SNAKE", 128
+    ) == target_chunks_from_json(
+        entities_json, textures_json, "ENT_TYPE_MONS_SNAKE", 128
+    )
+
+
+def test_recompiled_when_json_changes(tmp_path):
+    for filename in ("entities.json", "textures.json"):
+        shutil.copy(GAME_DATA_DIR / filename, tmp_path / filename)
+    manifest = EntityChunkManifest.load(tmp_path)
+    assert (tmp_path / EntityChunkManifest.FILENAME).exists()
+    saved = EntityChunkManifest.load(tmp_path)
+    assert saved.chunks("ENT_TYPE_MONS_SNAKE", 128) == manifest.chunks(
+        "ENT_TYPE_MONS_SNAKE", 128
+    )
+
+    entities_json, _ = load_game_data()
+    entities_json["ENT_TYPE_MONS_SNAKE"]["animations"] = {}
+    with (tmp_path / "entities.json").open("w", encoding="utf-8") as file_:
+        json.dump(entities_json, file_)
+    reloaded = EntityChunkManifest.load(tmp_path)
+    assert reloaded.source_digest != manifest.source_digest
+    assert len(reloaded.chunks("ENT_TYPE_MONS_SNAKE", 128)) == 1
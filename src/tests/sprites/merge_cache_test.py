@@ -0,0 +1,50 @@
+from PIL import Image
+
+from modlunky2.sprites.merge_cache import SpriteMergeCache
+
+
+def merge_all(tmp_path, sheets, merge_sheets):
+    cache = SpriteMergeCache.load(tmp_path / ".compressed")
+    merge_sheets(
+        [sheets.ColorMerger(tmp_path), sheets.BothMerger(tmp_path)],
+        [sheets.ColorSheet(tmp_path), sheets.OtherColorSheet(tmp_path)],
+        merge_cache=cache,
+    )
+    cache.save()
+    return cache
+
+
+def test_only_sheets_with_changed_sources_are_merged(
+    tmp_path, sheets, make_sheet, merge_sheets
+):
+    make_sheet(tmp_path / "colors.png")
+    make_sheet(tmp_path / "other_colors.png")
+
+    cache = merge_all(tmp_path, sheets, merge_sheets)
+    assert sorted(cache.merged) == ["both_full", "colors_full"]
+    assert (tmp_path / "merged" / "both_full_grid.png").exists()
+    cache = merge_all(tmp_path, sheets, merge_sheets)
+    assert sorted(cache.reused) == ["both_full", "colors_full"]
+
+    make_sheet(tmp_path / "other_colors.png", [sheets.GREEN] * 3)
+    assert merge_all(tmp_path, sheets, merge_sheets).merged == ["both_full"]
+    with Image.open(tmp_path / "merged" / "both_full.png") as merged:
+        assert merged.getpixel((0, 16)) == sheets.GREEN
+
+    # A removed or edited output is made again.
+    (tmp_path / "merged" / "colors_full_grid.png").unlink()
+    assert merge_all(tmp_path, sheets, merge_sheets).merged == ["colors_full"]
+
+
+def test_key_depends_on_chunk_maps(tmp_path, sheets, make_sheet):
+    make_sheet(tmp_path / "colors.png")
+    loaders = [sheets.ColorSheet(tmp_path)]
+    cache = SpriteMergeCache(tmp_path / SpriteMergeCache.FILENAME)
+    merger = sheets.ColorMerger(tmp_path)
+    key = cache.merge_key(merger, loaders)
+
+    class MovedMerger(sheets.ColorMerger):
+        _origin_map = {sheets.ColorSheet: {"red": (1, 0, 2, 1)}}
+
+    assert cache.merge_key(MovedMerger(tmp_path), loaders) != key
+    assert cache.merge_key(merger, []) != key
@@ -0,0 +1,64 @@
+from PIL import Image, ImageChops
+
+from modlunky2.assets.pipeline import WorkerPool
+from modlunky2.sprites.base_classes.base_sprite_merger import index_sprite_loaders
+from modlunky2.sprites.merge_cache import SpriteMergeCache
+from modlunky2.sprites.shared_sheets import SharedSheets, attach_shared_sheets
+
+
+def test_attach_shared_sheets(tmp_path, sheets, make_sheet):
+    make_sheet(tmp_path / "colors.png")
+    paths = [tmp_path / "colors.png", tmp_path / "missing.png"]
+    with SharedSheets.create(paths) as shared_sheets:
+        descriptors = shared_sheets.descriptors()
+        assert set(descriptors) == {str(tmp_path / "colors.png")}
+        assert shared_sheets.nbytes >= 48 * 16 * 4
+
+        blocks, shared = attach_shared_sheets(descriptors)
+        loader = sheets.ColorSheet(tmp_path)
+        loader.use_sheet(shared.pop(str(tmp_path / "colors.png")))
+        assert loader.get("blue").getpixel((0, 0)) == sheets.BLUE
+
+        # The blocks can only be closed once nothing uses them.
+        del loader
+        for block in blocks:
+            block.close()
+
+
+def test_index_matches_first_instance(tmp_path, sheets):
+    derived = sheets.DerivedColorSheet(tmp_path)
+    colors = sheets.ColorSheet(tmp_path)
+    index = index_sprite_loaders([derived, colors])
+    assert index[sheets.ColorSheet] is derived
+    assert index[sheets.DerivedColorSheet] is derived
+    assert sheets.MissingSheet not in index
+    assert sheets.ColorMerger(tmp_path).sprite_loaders_needed(index) == [derived]
+
+
+def test_process_merge_matches_threads(tmp_path, sheets, make_sheet, merge_sheets):
+    for worker_pool in WorkerPool:
+        base_path = tmp_path / worker_pool.value
+        base_path.mkdir()
+        make_sheet(base_path / "colors.png")
+        merge_cache = SpriteMergeCache(base_path / SpriteMergeCache.FILENAME)
+        timings = merge_sheets(
+            [
+                sheets.ColorMerger(base_path),
+                sheets.FlippedMerger(base_path),
+                sheets.MissingMerger(base_path),
+            ],
+            [sheets.ColorSheet(base_path), sheets.MissingSheet(base_path)],
+            worker_pool,
+            merge_cache,
+        )
+        # The missing sheet fails to merge, leaving the others.
+        assert timings.stages["merge"].count == 2
+        assert sorted(merge_cache.merged) == ["colors_full", "flipped_full"]
+
+    for name in ["colors_full.png", "flipped_full.png", "colors_full_grid.png"]:
+        with Image.open(tmp_path / "thread" / "merged" / name) as expected:
+            with Image.open(tmp_path / "process" / "merged" / name) as actual:
+                assert ImageChops.difference(expected, actual).getbbox() is None
+
+    with Image.open(tmp_path / "process" / "merged" / "flipped_full.png") as flipped:
+        assert flipped.getpixel((0, 0)) == sheets.BLUE